@@ -5,14 +5,17 @@ from collections import defaultdict
 
 from classtime.logging import logging
 
+from classtime import app
 from classtime.core import api_manager, db
-from classtime.models import Institution, Term, Schedule, Course, Section
+from classtime.models import Institution, Term, Schedule, Course, Section, DataVersion
 
 import classtime.brain.institutions
+from classtime.brain import academic_calendar
 import classtime.brain.scheduling as scheduling
 
 def fill_institutions(search_params=None): #pylint: disable=W0613
-    db.create_all()
+    if app.config.get('AUTO_CREATE_DB'):
+        db.create_all()
     if Institution.query.first() is None:
         config_file = os.path.join(classtime.brain.institutions.CONFIG_FOLDER_PATH,
             'institutions.json')
@@ -22,6 +25,7 @@ def fill_institutions(search_params=None): #pylint: disable=W0613
         for institution in institutions:
             if not Institution.query.get(institution.get('institution')):
                 db.session.add(Institution(institution))
+        DataVersion.bump_global(db.session)
         try:
             db.session.commit()
         except:
@@ -40,9 +44,18 @@ api_manager.create_api(Term,
                        methods=['GET'],
                        exclude_columns=['courses', 'courses.sections'])
 
+def save_requested_schedule(instance_id=None, **kw): #pylint: disable=W0613
+    """Saves the requested schedule first, if its identifier was handed
+    out without saving it"""
+    if instance_id is not None:
+        academic_calendar.save_unsaved_schedule(instance_id)
+
 api_manager.create_api(Schedule,
                        collection_name='schedules',
-                       methods=['GET'])
+                       methods=['GET'],
+                       preprocessors={
+                           'GET_SINGLE': [save_requested_schedule]
+                       })
 
 api_manager.create_api(Course,
                        collection_name='courses',
@@ -140,7 +153,7 @@ def find_schedules(result=None, search_params=None):
     result['objects'] = list()
     for schedule in schedules:
         result['objects'].append({
-            'sections': schedule.sections,
+            'sections': [section.to_dict() for section in schedule.sections],
             'more_like_this': schedule.more_like_this
         })
     return
@@ -1,18 +1,27 @@
 
 import os
 import json
-from collections import defaultdict
 
 from classtime.logging import logging
 
+from flask import request, make_response, jsonify, abort, g
+from flask.ext.restless import ProcessingException
+
+from classtime import app
 from classtime.core import api_manager, db
-from classtime.models import Institution, Term, Schedule, Course, Section
+from classtime.models import Institution, Term, Schedule, Course, Section, CourseCatalog, DataVersion
+
+from classtime.brain import course_catalog, academic_calendar
+from classtime.brain.local_db import LocalDatabaseFactory
+from classtime.api import schedule_format
 
 import classtime.brain.institutions
 import classtime.brain.scheduling as scheduling
+from classtime.brain.scheduling import sessions, cursors, constraints
 
 def fill_institutions(search_params=None): #pylint: disable=W0613
-    db.create_all()
+    if app.config.get('AUTO_CREATE_DB'):
+        db.create_all()
     if Institution.query.first() is None:
         config_file = os.path.join(classtime.brain.institutions.CONFIG_FOLDER_PATH,
             'institutions.json')
@@ -22,6 +31,7 @@ def fill_institutions(search_params=None): #pylint: disable=W0613
         for institution in institutions:
             if not Institution.query.get(institution.get('institution')):
                 db.session.add(Institution(institution))
+        DataVersion.bump_global(db.session)
         try:
             db.session.commit()
         except:
@@ -42,9 +52,18 @@ api_manager.create_api(Term,
                        exclude_columns=['courses', 'courses.sections'],
                        url_prefix='/api/v1')
 
+def save_requested_schedule(instance_id=None, **kw): #pylint: disable=W0613
+    """Saves the requested schedule first, if its identifier was handed
+    out without saving it"""
+    if instance_id is not None:
+        academic_calendar.save_unsaved_schedule(instance_id)
+
 api_manager.create_api(Schedule,
                        collection_name='schedules',
                        methods=['GET'],
+                       preprocessors={
+                           'GET_SINGLE': [save_requested_schedule]
+                       },
                        url_prefix='/api/v1')
 
 api_manager.create_api(Course,
@@ -77,49 +96,16 @@ def courses_min_structured(result=None, search_params=None):
     """Depends on result list being sorted by:
     - faculty, then subject, then asString
     """
-    def new_list_and_set():
-        return list(defaultdict(list)), set()
     if result is None:
         return
-    obj_courses = result['objects']
-    faculty_list, faculty_set = new_list_and_set()
-    subject_list, subject_set = new_list_and_set()
-    for course in obj_courses:
-        if course.get('faculty') not in faculty_set:
-            faculty_set.add(course.get('faculty'))
-            faculty_list.append({
-                'faculty': course.get('faculty'),
-                'subjects': list()
-            })
-            subject_list, subject_set = new_list_and_set()
-
-        if course.get('subject') not in subject_set:
-            subject_set.add(course.get('subject'))
-            subject_list.append({
-                'subject': course.get('subject'),
-                'subjectTitle': course.get('subjectTitle'),
-                'courses': list()
-            })
-            faculty_list[-1]['subjects'] = subject_list
-
-        subject_list[-1]['courses'].append({
-            'course': course.get('course'),
-            'asString': course.get('asString'),
-            'courseTitle': course.get('courseTitle')
-        })
-    result['objects'] = faculty_list
+    result['objects'] = course_catalog.courses_min_structured(result['objects'])
     return
 
 COURSES_PER_PAGE = 1000
 api_manager.create_api(Course,
                        collection_name='courses-min',
                        methods=['GET'],
-                       include_columns=['asString',
-                                        'faculty',
-                                        'subject',
-                                        'subjectTitle',
-                                        'course',
-                                        'courseTitle'],
+                       include_columns=course_catalog.COURSES_MIN_COLUMNS,
                        preprocessors={
                            'GET_MANY': [courses_min_order_faculty_subject]
                        },
@@ -130,6 +116,59 @@ api_manager.create_api(Course,
                        max_results_per_page=COURSES_PER_PAGE,
                        url_prefix='/api/v1')
 
+EQUALS_OPERATORS = ['==', 'eq', 'equals', 'equals_to']
+def _course_catalog_identifiers(args):
+    """Returns (institution, term) if the courses-min request is for
+    the first page of exactly one term, otherwise None
+    """
+    if set(args.keys()) - set(['q', 'page']) or args.get('page', '1') != '1':
+        return None
+    try:
+        query = json.loads(args.get('q', '{}'))
+    except ValueError:
+        return None
+    if not isinstance(query, dict) or set(query.keys()) - set(['filters']):
+        return None
+    values = dict()
+    for search_filter in query.get('filters', list()):
+        if not isinstance(search_filter, dict) \
+        or search_filter.get('name') not in ['institution', 'term'] \
+        or search_filter.get('name') in values \
+        or search_filter.get('op') not in EQUALS_OPERATORS:
+            return None
+        values[search_filter.get('name')] = search_filter.get('val')
+    if set(values.keys()) != set(['institution', 'term']):
+        return None
+    return values.get('institution'), values.get('term')
+
+@app.before_request
+def serve_course_catalog():
+    """Serves a term's courses-min from its precomputed catalog, bypassing
+    Flask-Restless. Any other courses-min request falls through to it.
+    """
+    if request.path.rstrip('/') != '/api/v1/courses-min':
+        return None
+    identifiers = _course_catalog_identifiers(request.args)
+    if identifiers is None:
+        return None
+    catalog = CourseCatalog.query.get(identifiers)
+    if catalog is None:
+        return None
+
+    if catalog.hash_id in request.if_none_match:
+        response = make_response('', 304)
+    elif 'gzip' in request.headers.get('Accept-Encoding', '').lower():
+        response = make_response(catalog.data)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = make_response(course_catalog.decompress(catalog.data))
+    response.mimetype = 'application/json'
+    response.set_etag(catalog.hash_id)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config.get('CATALOG_MAX_AGE')
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
   
 # --------------------------------
 # Schedule Generation
@@ -139,19 +178,49 @@ NUM_SCHEDULES = 50
 def find_schedules(result=None, search_params=None):
     if result is None:
         result = dict()
-    result['page'] = 1
-    result['total_pages'] = 1
+    if search_params.get('cursor'):
+        return next_schedules(result, search_params.get('cursor'))
 
-    schedules = scheduling.find_schedules(search_params, NUM_SCHEDULES)
+    stream = cursors.ResultStream(search_params, NUM_SCHEDULES)
+    schedules = stream.next_page()
+    budget = stream.budget
     result['num_results'] = len(schedules)
-    result['objects'] = list()
-    for schedule in schedules:
-        result['objects'].append({
-            'sections': schedule.sections,
-            'more_like_this': schedule.more_like_this
-        })
+    result['truncated'] = budget.truncated
+    result['total_possible'] = stream.count_schedules()
+    result['conflicts'] = list()
+    if not schedules and not budget.truncated:
+        result['conflicts'] = stream.explain_infeasible()
+    _page_result(result, stream)
+    schedule_format.format_schedules(result, schedules, search_params)
     return
 
+def next_schedules(result, cursor):
+    """Fills in the next page of the schedules a cursor was returned for
+    """
+    stream = cursors.store().get(cursor)
+    if stream is None:
+        raise ProcessingException(description='Unknown or expired cursor', code=404)
+    _select_institution(stream.params)
+    schedules = stream.next_page()
+    result['num_results'] = len(schedules)
+    result['truncated'] = stream.budget.truncated
+    if not stream.has_more():
+        cursors.store().remove(cursor)
+    _page_result(result, stream, cursor)
+    schedule_format.format_schedules(result, schedules, stream.params)
+
+def _select_institution(schedule_params):
+    if app.config.get('INSTITUTION_DATABASES'):
+        g.institution = schedule_params.get('institution')
+
+def _page_result(result, stream, cursor=None):
+    result['page'] = stream.page
+    result['total_pages'] = stream.page
+    result['cursor'] = None
+    if stream.has_more():
+        result['total_pages'] = stream.page + 1
+        result['cursor'] = cursor or cursors.store().add(stream)
+
 api_manager.create_api(Section,
                        collection_name='generate-schedules',
                        include_columns=[],
@@ -160,3 +229,100 @@ api_manager.create_api(Section,
                            'GET_MANY': [find_schedules]
                        },
                        url_prefix='/api/v1')
+
+def count_schedules(result=None, search_params=None):
+    if result is None:
+        result = dict()
+    for key in result.keys():
+        del result[key]
+    budget = scheduling.Budget.from_config(app.config,
+                                           search_params.get('budget'))
+    result['total_possible'] = scheduling.count_schedules(search_params, budget)
+    return
+
+api_manager.create_api(Section,
+                       collection_name='count-schedules',
+                       include_columns=[],
+                       methods=['GET'],
+                       postprocessors={
+                           'GET_MANY': [count_schedules]
+                       },
+                       url_prefix='/api/v1')
+
+def swap_course(result=None, search_params=None):
+    if result is None:
+        result = dict()
+    for key in result.keys():
+        del result[key]
+    for param in ['term', 'schedule', 'course']:
+        if not search_params.get(param):
+            raise ProcessingException(description='Missing <{}>'.format(param), code=400)
+    local_db = LocalDatabaseFactory.build(search_params.get('institution', 'ualberta'))
+    term = search_params.get('term')
+    sections = academic_calendar.saved_schedule_sections(local_db, term,
+                                                         search_params.get('schedule'))
+    if sections is None:
+        raise ProcessingException(description='Unknown schedule', code=404)
+    course = search_params.get('course')
+    components = academic_calendar.local_course_components(local_db, term, course)
+    if components is None:
+        raise ProcessingException(description='Unknown course', code=404)
+    busy_mask, _, _ = constraints.request_constraints(search_params)
+    options = scheduling.swap_options(sections, course, components,
+                                      search_params.get('preferences'), busy_mask)
+    result['num_results'] = len(options)
+    result['objects'] = [{
+        'score_delta': score_delta,
+        'sections': [section.to_dict() for section in sections]
+    } for score_delta, sections in options]
+    return
+
+api_manager.create_api(Section,
+                       collection_name='swap-course',
+                       include_columns=[],
+                       methods=['GET'],
+                       postprocessors={
+                           'GET_MANY': [swap_course]
+                       },
+                       url_prefix='/api/v1')
+
+# --------------------------------
+# Refinement Sessions
+# --------------------------------
+
+def _session_response(session_id, session):
+    result = {
+        'session': session_id,
+        'num_solves': session.num_solves,
+        'truncated': session.truncated
+    }
+    schedules = session.schedules()
+    result['num_results'] = len(schedules)
+    schedule_format.format_schedules(result, schedules, session.params)
+    return jsonify(result)
+
+@app.route('/api/v1/sessions', methods=['POST'])
+def create_session():
+    schedule_params = request.get_json(force=True, silent=True)
+    if not isinstance(schedule_params, dict):
+        abort(400)
+    _select_institution(schedule_params)
+    session = sessions.RefinementSession(schedule_params, NUM_SCHEDULES)
+    session_id = sessions.store().add(session)
+    return _session_response(session_id, session)
+
+@app.route('/api/v1/sessions/<session_id>', methods=['GET', 'POST', 'DELETE'])
+def refine_session(session_id):
+    session = sessions.store().get(session_id)
+    if session is None:
+        abort(404)
+    if request.method == 'DELETE':
+        sessions.store().remove(session_id)
+        return make_response('', 204)
+    _select_institution(session.params)
+    if request.method == 'POST':
+        changes = request.get_json(force=True, silent=True)
+        if not isinstance(changes, dict):
+            abort(400)
+        session.update(changes)
+    return _session_response(session_id, session)
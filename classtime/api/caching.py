@@ -0,0 +1,144 @@
+"""Conditional GET support for read-only catalog endpoints
+
+Responses from these endpoints only change when the sync worker saves new
+data, which bumps a :py:class:`DataVersion`. Each response is tagged with
+an ETag derived from the request and the data version it depends on, so a
+repeat request can be answered with 304 before Flask-Restless runs.
+
+Requests which do not name the institution and term their endpoint's
+data version depends on are not cached.
+
+Single schedules are named by a hash of their sections, so they are
+tagged from their path alone, without reading any data version.
+"""
+import json
+import time
+import hashlib
+
+from flask import request, make_response, g
+
+from classtime.logging import logging
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+from classtime import app
+from classtime.models import DataVersion
+from classtime.brain.local_db import LocalDatabaseFactory
+
+CACHED_ENDPOINTS = {
+    '/api/v1/institutions': [],
+    '/api/v1/terms': ['institution'],
+    '/api/v1/courses': ['institution', 'term']
+}
+"""Map from endpoint prefix to the filters which narrow its data version"""
+
+HASHED_ITEM_ENDPOINTS = ['/api/v1/schedules']
+"""Endpoints whose single items are named by a hash of their contents.
+Their items are cached, but not their collection.
+"""
+
+_version_cache = dict()
+
+
+def data_version(institution, term):
+    """Returns (version, updated) of the data for a term, read from the
+    institution's own database if it has one
+
+    Versions are cached in-process for VERSION_CACHE_SECONDS, so that
+    most conditional requests never touch the database.
+    """
+    key = (institution, term)
+    cached = _version_cache.get(key)
+    if cached is not None and cached[0] > time.time():
+        return cached[1]
+    row = LocalDatabaseFactory.session(institution).query(DataVersion).get(key)
+    if row is None:
+        value = (0, None)
+    else:
+        value = (row.version, row.updated)
+    _version_cache[key] = (time.time() + app.config.get('VERSION_CACHE_SECONDS', 0),
+                           value)
+    return value
+
+
+def _endpoint(path):
+    path = path.rstrip('/')
+    for endpoint in CACHED_ENDPOINTS:
+        if path == endpoint or path.startswith(endpoint + '/'):
+            return endpoint
+    return None
+
+
+def _is_hashed_item(path):
+    path = path.rstrip('/')
+    return any(path.startswith(endpoint + '/')
+               for endpoint in HASHED_ITEM_ENDPOINTS)
+
+
+def _version_identifiers(endpoint, args):
+    """Returns the (institution, term) whose data version the request
+    depends on, taken from the ``q`` argument's filters or from plain
+    arguments. Endpoints which need no narrowing depend on the global
+    version ('', '').
+
+    :returns: (institution, term), or None if the request does not name
+        all of them
+    """
+    narrowing = CACHED_ENDPOINTS.get(endpoint)
+    if not narrowing:
+        return '', ''
+    try:
+        query = json.loads(args.get('q', '{}'))
+        filters = query.get('filters', list())
+        values = dict((f.get('name'), f.get('val'))
+                      for f in filters
+                      if f.get('op') in ['==', 'eq', 'equals', 'equals_to'])
+    except (ValueError, AttributeError):
+        return None
+    for name in narrowing:
+        values.setdefault(name, args.get(name))
+    if any(not values.get(name) for name in narrowing):
+        return None
+    return values.get('institution'), values.get('term', '')
+
+
+@app.before_request
+def answer_not_modified():
+    if request.method != 'GET':
+        return None
+    if _is_hashed_item(request.path):
+        etag, updated = hashlib.md5(request.full_path).hexdigest(), None
+    else:
+        endpoint = _endpoint(request.path)
+        if endpoint is None:
+            return None
+        identifiers = _version_identifiers(endpoint, request.args)
+        if identifiers is None:
+            return None
+        version, updated = data_version(*identifiers)
+        etag = hashlib.md5('{}|{}'.format(request.full_path, version)).hexdigest()
+    g.data_version = (etag, updated)
+    not_modified = etag in request.if_none_match
+    if not request.if_none_match and updated is not None \
+    and request.if_modified_since is not None:
+        not_modified = updated.replace(microsecond=0) <= request.if_modified_since
+    if not_modified:
+        return _tag(make_response('', 304))
+    return None
+
+
+@app.after_request
+def tag_cacheable(response):
+    if getattr(g, 'data_version', None) is not None \
+    and response.status_code == 200:
+        _tag(response)
+    return response
+
+
+def _tag(response):
+    etag, updated = g.data_version
+    response.set_etag(etag)
+    if updated is not None:
+        response.last_modified = updated
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config.get('DATA_MAX_AGE')
+    return response
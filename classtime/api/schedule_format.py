@@ -0,0 +1,84 @@
+"""Serialization of generated schedules for the API
+
+Two formats are supported, chosen by the request's ``format`` parameter:
+
+- ``full`` (default): every schedule carries complete section objects,
+  with all course attributes merged in
+- ``compact``: sections and courses are each listed once, in shared
+  tables, and schedules refer to them by id
+"""
+from classtime.models import Course, Section
+from classtime.brain.scheduling import Schedule
+
+LARGE_FIELDS = ['courseDescription', 'classNotes']
+"""Descriptive fields left out of compact responses unless requested"""
+
+SECTION_FIELDS = [column for column in Section.__table__.columns.keys()
+                  if column != 'schedule'
+                  and column not in Schedule.TIMETABLE_COLUMNS] + \
+                 ['class', 'autoEnrollComponent']
+COURSE_FIELDS = Course.__table__.columns.keys()
+
+
+def format_schedules(result, schedules, schedule_params):
+    """Fills in ``result`` with the given schedules
+
+    :param dict result: the response being built
+    :param list schedules: list of :py:class:`Schedule`
+    :param dict schedule_params: the request's parameters
+    """
+    if schedule_params.get('format') == 'compact':
+        result.update(compact_schedules(schedules,
+                                        schedule_params.get('include')))
+    else:
+        result['objects'] = full_schedules(schedules)
+    return result
+
+
+def full_schedules(schedules):
+    return [{
+        'identifier': schedule.identifier,
+        'sections': [section.to_dict() for section in schedule.sections],
+        'more_like_this': schedule.more_like_this
+    } for schedule in schedules]
+
+
+def compact_schedules(schedules, include=None):
+    """Lists each section and course once, keyed by id
+
+    :param list schedules: list of :py:class:`Schedule`
+    :param list include: (optional) names of :py:data:`LARGE_FIELDS`
+        to include anyway
+    :returns: dict with ``format``, ``sections``, ``courses`` and
+        ``objects``. Each object has its identifier, section ids,
+        timetable bitmaps and more_like_this.
+    """
+    excluded = set(LARGE_FIELDS) - set(include or list())
+    sections = dict()
+    courses = dict()
+    objects = list()
+    for schedule in schedules:
+        for section in schedule.sections:
+            if section.id not in sections:
+                sections[section.id] = _pick(section.to_dict(), SECTION_FIELDS, excluded)
+            if section.course not in courses:
+                courses[section.course] = _pick(section.course_info or section.row,
+                                                COURSE_FIELDS, excluded)
+        objects.append({
+            'identifier': schedule.identifier,
+            'sections': [section.id for section in schedule.sections],
+            'bitmaps': list(schedule.timetable_bitmap),
+            'more_like_this': schedule.more_like_this
+        })
+    return {
+        'format': 'compact',
+        'sections': sections,
+        'courses': courses,
+        'objects': objects
+    }
+
+
+def _pick(attributes, fields, excluded):
+    return dict((field, attributes.get(field))
+                for field in fields
+                if field not in excluded)
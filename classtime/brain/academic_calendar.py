@@ -1,12 +1,134 @@
 
 import threading
+import collections
 
-from classtime.logging import logging
+from classtime.logging import logging, lazy
 logging = logging.getLogger(__name__) # pylint: disable=C0103
 
 from classtime.brain.remote_db import RemoteDatabaseFactory
 from classtime.brain.local_db import LocalDatabaseFactory
 from classtime.models.schedule import calculate_schedule_hash
+from classtime.brain.scheduling.schedule import Schedule, SectionRecord
+from classtime.brain import course_catalog
+
+MAX_UNSAVED_SCHEDULES = 10000
+"""Most schedule identifiers handed out without saving, which are kept
+so that they can be saved when first looked up"""
+_unsaved_schedules = collections.OrderedDict()
+"""Map from hash identifier to (institution, term, list of (course,
+section id)), least recently added first"""
+_unsaved_lock = threading.Lock()
+
+
+def save_unsaved_schedule(hash_id):
+    """Saves a schedule whose identifier was handed out without saving
+    it, by :py:meth:`AcademicCalendar.get_schedule_identifiers`
+
+    Unsaved schedules are only known to the process which handed out
+    their identifiers.
+
+    :param str hash_id: the schedule's hash identifier
+    :returns: whether the schedule was saved
+    """
+    with _unsaved_lock:
+        entry = _unsaved_schedules.pop(hash_id, None)
+    if entry is None:
+        return False
+    institution, term, section_keys = entry
+    local_db = LocalDatabaseFactory.build(institution)
+    _add_schedule(local_db, term, hash_id, section_keys)
+    try:
+        local_db.commit()
+    except Exception as e:
+        logging.error(str(e))
+        logging.error("Failed to save <{}> schedule <{}> to local_db".format(
+            institution, hash_id))
+        return False
+    return True
+
+
+def saved_schedule_sections(local_db, term, hash_id):
+    """Returns the sections of a schedule saved by
+    :py:meth:`AcademicCalendar.get_schedule_identifiers`, from the local
+    database alone
+
+    The records are built from the sections' precomputed timetable
+    columns, without their course's info.
+
+    :param local_db: the institution's local database
+    :param str term: the schedule's term
+    :param str hash_id: the schedule's hash identifier
+    :returns: list of :py:class:`SectionRecord`, or None if the schedule
+        is unknown
+    """
+    schedule = local_db.get('schedule', identifiers=(term, hash_id))
+    if schedule is None and save_unsaved_schedule(hash_id):
+        schedule = local_db.get('schedule', identifiers=(term, hash_id))
+    if schedule is None:
+        return None
+    return [SectionRecord.from_dict(section.to_dict())
+            for section in schedule.sections]
+
+
+def local_course_components(local_db, term, course):
+    """Returns the sections of a course, grouped by component, from the
+    local database alone
+
+    :param local_db: the institution's local database
+    :param str term: the course's term
+    :param str course: :ref:`6-digit course identifier <6-digit-course-identifier>`
+    :returns: list of components, each a list of
+        :py:class:`SectionRecord`, or None if the course is unknown.
+        Each record refers to the course's info, which is only merged in
+        when serializing.
+    """
+    course_info = local_db.get(datatype='course', identifiers=(term, course))
+    if course_info is None:
+        return None
+    course_info = course_info.to_dict()
+    section_query = local_db.query(datatype='sections') \
+                            .filter_by(term=term, course=course)
+    components = list()
+    section_code_to_section = dict()
+    for component in ['LEC', 'LAB', 'SEM', 'LBL']:
+        section_models = section_query \
+            .filter_by(component=component) \
+            .order_by(local_db.Section.day.desc()) \
+            .order_by(local_db.Section.startTime.desc()) \
+            .order_by(local_db.Section.endTime.desc()) \
+            .all()
+        if len(section_models) == 0:
+            continue
+        logging.debug(lazy('{}:{} - {} found',
+            course, component, len(section_models)))
+        sections = [section_model.to_dict()
+                    for section_model in section_models]
+        section_code_to_section.update({
+            section['section']: section
+            for section in sections
+        })
+        components.append(sections)
+
+    for component in components:
+        for section in component:
+            if 'autoEnroll' in section and section['autoEnroll'] is not None:
+                section['autoEnrollComponent'] = section_code_to_section[section['autoEnroll']]['component']
+
+    return [[SectionRecord.from_dict(section, course_info)
+             for section in component]
+            for component in components]
+
+
+def _add_schedule(local_db, term, hash_id, section_keys):
+    if local_db.exists('schedule', identifiers=(term, hash_id)):
+        return
+    local_db.add({
+        'term': term,
+        'sections': [local_db.get('section', identifiers=(term, course, section_id))
+                     for course, section_id in section_keys],
+        'hash_id': hash_id
+    }, 'schedule')
+
 
 class AcademicCalendar(object):
     """Manages academic calendar data for a particular institution
@@ -66,6 +188,7 @@ class AcademicCalendar(object):
 
             terms.reverse()
             for termid in terms:
+                self._fill_timetable_columns(termid)
                 if force_refresh or self.doesnt_know_about(datatype='courses', term=termid):
                     logging.info('[worker] Fetching courses - <{}> <term={}>'.format(institution, termid))
                     courses = self._fetch(datatype='courses', term=termid)
@@ -159,78 +282,62 @@ class AcademicCalendar(object):
         Returns the hash identifier of the given schedule.
 
         If the given schedule has not been cached in the DB yet,
-        a new entry will be created for it.
+        a new entry will be saved for it.
 
         :param Schedule schedule: the schedule in question
         :returns str: the md5 hash of the schedule, whose details can
             be found by hitting api/schedules/<md5hash>
         """
-        if not schedule.sections:
-            return 'noschedulesections'
-        section_ids = [section.get('class')
-                       for section in schedule.sections]
-        institution = schedule.sections[0].get('institution')
-        term = schedule.sections[0].get('term')
-        course = schedule.sections[0].get('course')
-        hash_id = calculate_schedule_hash(section_ids, institution, term)
-
-        identifiers = (term, hash_id)
-        if not self._local_db.exists('schedule', identifiers=identifiers):
-            schedule_dict = {
-                'term': term,
-                'sections': [self._local_db.get('section', identifiers=(term, course, section_id) )
-                             for section_id in section_ids],
-                'hash_id': hash_id
-            }
-            self._local_db.add(schedule_dict, 'schedule')
-
-        return hash_id
+        return self.get_schedule_identifiers([schedule])[0]
 
-    def _get_components_single(self, course):
-        def _attach_course_info(section_dict, course_dict):
-            clone = dict(section_dict)
-            section_dict.update(course_dict)
-            section_dict.update(clone)
-            section_dict['class_'] = clone.get('class')
-            section_dict['asString'] = ' '.join([course_dict.get('asString'),
-                                                 section_dict.get('component'),
-                                                 section_dict.get('section')])
-            return section_dict
-
-        identifiers = (self._term, course)
-        course_info = self._local_db.get(datatype='course', identifiers=identifiers) \
-                                    .to_dict()
-        section_query = self._local_db.query(datatype='sections') \
-                                      .filter_by(term=self._term, course=course)
-        components = list()
-        section_code_to_section = dict()
-        for component in ['LEC', 'LAB', 'SEM', 'LBL']:
-            section_models = section_query \
-                .filter_by(component=component) \
-                .order_by(self._local_db.Section.day.desc()) \
-                .order_by(self._local_db.Section.startTime.desc()) \
-                .order_by(self._local_db.Section.endTime.desc()) \
-                .all()
-            if len(section_models) == 0:
+    def get_schedule_identifiers(self, schedules, save=True):
+        """
+        Returns the hash identifiers of the given schedules, as
+        :py:meth:`get_schedule_identifier` does, saving every new entry
+        in a single commit.
+
+        :param list schedules: list of :py:class:`Schedule`
+        :param bool save: (optional) whether to save new entries now.
+            If False, they are only saved when first looked up, with
+            :py:func:`save_unsaved_schedule`, which saves the database
+            work for schedules which are never looked up.
+        :returns: list of str
+        """
+        hash_ids = list()
+        for schedule in schedules:
+            if not schedule.sections:
+                hash_ids.append('noschedulesections')
                 continue
-            logging.debug('{}:{} - {} found'.format(
-                course, component, len(section_models)))
-            sections = [section_model.to_dict()
-                        for section_model in section_models]
-            sections = [_attach_course_info(section, course_info)
-                        for section in sections]
-            section_code_to_section.update({
-                section['section']: section
-                for section in sections
-            })
-            components.append(sections)
-
-        for component in components:
-            for section in component:
-                if 'autoEnroll' in section and section['autoEnroll'] is not None:
-                    section['autoEnrollComponent'] = section_code_to_section[section['autoEnroll']]['component']
-
-        return components
+            section_keys = [(section.get('course'), section.get('class'))
+                            for section in schedule.sections]
+            institution = schedule.sections[0].get('institution')
+            term = schedule.sections[0].get('term')
+            hash_id = calculate_schedule_hash([section_id for _, section_id in section_keys],
+                                              institution, term)
+            hash_ids.append(hash_id)
+            if save:
+                _add_schedule(self._local_db, term, hash_id, section_keys)
+            else:
+                with _unsaved_lock:
+                    _unsaved_schedules.pop(hash_id, None)
+                    _unsaved_schedules[hash_id] = (institution, term, section_keys)
+                    while len(_unsaved_schedules) > MAX_UNSAVED_SCHEDULES:
+                        _unsaved_schedules.popitem(last=False)
+        if not save:
+            return hash_ids
+        try:
+            self._local_db.commit()
+        except Exception as e:
+            logging.error(str(e))
+            logging.error("Failed to save <{}> schedules to local_db".format(
+                self._institution))
+        return hash_ids
+
+    def _get_components_single(self, course):
+        """Returns the sections of a course, grouped by component, as
+        :py:func:`local_course_components` does
+        """
+        return local_course_components(self._local_db, self._term, course)
 
     def _fetch(self, datatype, **kwargs):
         if datatype not in self._remote_db.known_searches():
@@ -238,7 +345,7 @@ class AcademicCalendar(object):
                 self._institution, datatype))
             results = list()
         else:
-            logging.debug("Fetching <{}> <{}> ({}) from remote db".format(
+            logging.debug(lazy("Fetching <{}> <{}> ({}) from remote db",
                 self._institution, datatype, kwargs))
             results = self._remote_db.search(datatype, **kwargs)
 
@@ -300,11 +407,14 @@ class AcademicCalendar(object):
             return i == num or num < 5 or i % (num / 5) == 0
 
         def _report_progress(i, num):
-            logging.debug('...{}%\t({}/{})'.format(i * 100 / num, i, num))
+            logging.debug(lazy('...{}%\t({}/{})', i * 100 / num, i, num))
 
         logging.debug("Saving some <{}> <{}> to local db".format(
             self._institution, datatype))
         for i, obj in enumerate(objects, start=1):
+            if self.cur_datatype() in ['sections', 'status'] \
+            and 'startTime' in obj:
+                obj.update(Schedule.timetable_columns(obj))
             identifiers = tuple(obj.get(pkey) for pkey in self.cur_primary_keys())
             should_add = self.doesnt_know_about(datatype=self.cur_datatype(),
                                                 identifiers=identifiers)
@@ -312,7 +422,7 @@ class AcademicCalendar(object):
                 self._local_db.add(obj, datatype=self.cur_datatype())
             elif should_update:
                 self._local_db.update(obj, datatype=self.cur_datatype(),
-                                           identifiers=primary_key_values)
+                                           identifiers=identifiers)
             if _should_report_progress(i, len(objects)):
                 _report_progress(i, len(objects))
         try:
@@ -325,9 +435,100 @@ class AcademicCalendar(object):
             verb = "Updated" if should_update else "Saved"
             logging.debug("{} some <{}> <{}> to local_db".format(
                 verb, self._institution, self.cur_datatype()))
+            if self.cur_datatype() == 'courses':
+                for term in set(obj.get('term') for obj in objects):
+                    self._save_course_catalog(term)
+            if self.cur_datatype() == 'terms':
+                self._bump_data_versions([''])
+            else:
+                self._bump_data_versions(set(obj.get('term') for obj in objects))
 
         self.pop_datatype()
 
+    def _bump_data_versions(self, terms):
+        """Records that data changed for the given terms, so that
+        cached API responses which depend on them are invalidated
+
+        :param terms: :ref:`4-digit term identifiers
+            <4-digit-term-identifier>`. An empty term stands for the
+            list of terms itself.
+        """
+        try:
+            self._local_db.bump_versions(terms)
+            self._local_db.commit()
+        except Exception as e:
+            logging.error(str(e))
+            logging.error("Failed to bump <{}> data versions".format(
+                self._institution))
+
+    def _fill_timetable_columns(self, term):
+        """Precomputes the timetable columns of a term's sections which
+        were saved without them
+
+        Columns are otherwise computed whenever a section is saved or its
+        times are updated. See :py:meth:`Schedule.timetable_columns`.
+        Sections whose times cannot be parsed get a ``dayMask`` of 0, so
+        they are only selected once.
+
+        :param str term: :ref:`4-digit term identifier
+            <4-digit-term-identifier>`
+        """
+        Section = self._local_db.Section # pylint: disable=C0103
+        sections = self._local_db.query(datatype='sections') \
+                                 .filter_by(term=term) \
+                                 .filter(Section.dayMask == None) \
+                                 .filter(Section.startTime != None) \
+                                 .all()
+        if not sections:
+            return
+        for section in sections:
+            columns = Schedule.timetable_columns(section.to_dict())
+            for column, value in columns.items():
+                setattr(section, column, value)
+        try:
+            self._local_db.commit()
+        except Exception as e:
+            logging.error(str(e))
+            logging.error("Failed to fill <{}> <term={}> timetable columns".format(
+                self._institution, term))
+        else:
+            logging.info('[worker] Filled timetable columns of {} sections - <{}> <term={}>'.format(
+                len(sections), self._institution, term))
+
+    def _save_course_catalog(self, term):
+        """Rebuilds the precomputed courses-min catalog of a term
+
+        :param str term: :ref:`4-digit term identifier
+            <4-digit-term-identifier>`
+        """
+        Course = self._local_db.Course # pylint: disable=C0103
+        courses = self._local_db.query(datatype='courses') \
+                                .filter_by(term=term) \
+                                .order_by(Course.faculty.asc()) \
+                                .order_by(Course.subject.asc()) \
+                                .order_by(Course.asString.asc()) \
+                                .all()
+        courses = [dict((column, getattr(course, column))
+                        for column in course_catalog.COURSES_MIN_COLUMNS)
+                   for course in courses]
+        catalog = course_catalog.build_catalog(courses)
+        catalog['term'] = term
+        identifiers = (term,)
+        if self.knows_about(datatype='catalog', identifiers=identifiers):
+            self._local_db.update(catalog, datatype='catalog',
+                                  identifiers=identifiers)
+        else:
+            self._local_db.add(catalog, datatype='catalog')
+        try:
+            self._local_db.commit()
+        except Exception as e:
+            logging.error(str(e))
+            logging.error("Failed to save <{}> <term={}> course catalog".format(
+                self._institution, term))
+        else:
+            logging.debug("Saved <{}> <term={}> course catalog <{}>".format(
+                self._institution, term, catalog.get('hash_id')))
+
     def doesnt_know_about(self, datatype, identifiers=None, **kwargs):
         retval = not self._local_db.exists(datatype=datatype,
                                            identifiers=identifiers,
@@ -0,0 +1,77 @@
+import gzip
+import json
+import hashlib
+from io import BytesIO
+
+COURSES_MIN_COLUMNS = ['asString',
+                       'faculty',
+                       'subject',
+                       'subjectTitle',
+                       'course',
+                       'courseTitle']
+"""Course attributes included in the courses-min catalog"""
+
+def courses_min_structured(courses):
+    """Builds the faculty -> subject -> course tree of courses-min
+
+    Depends on courses being sorted by:
+    - faculty, then subject, then asString
+
+    :param list courses: course dicts
+    :returns: list of faculty objects
+    """
+    faculty_list, faculty_set = list(), set()
+    subject_list, subject_set = list(), set()
+    for course in courses:
+        if course.get('faculty') not in faculty_set:
+            faculty_set.add(course.get('faculty'))
+            faculty_list.append({
+                'faculty': course.get('faculty'),
+                'subjects': list()
+            })
+            subject_list, subject_set = list(), set()
+
+        if course.get('subject') not in subject_set:
+            subject_set.add(course.get('subject'))
+            subject_list.append({
+                'subject': course.get('subject'),
+                'subjectTitle': course.get('subjectTitle'),
+                'courses': list()
+            })
+            faculty_list[-1]['subjects'] = subject_list
+
+        subject_list[-1]['courses'].append({
+            'course': course.get('course'),
+            'asString': course.get('asString'),
+            'courseTitle': course.get('courseTitle')
+        })
+    return faculty_list
+
+def build_catalog(courses):
+    """Builds a complete, single-page courses-min response
+
+    :param list courses: course dicts, sorted like
+        :py:func:`courses_min_structured` requires
+    :returns: dict of the :py:class:`CourseCatalog` attributes
+        ``hash_id``, ``numCourses`` and ``data`` (gzipped JSON)
+    """
+    response = {
+        'num_results': len(courses),
+        'objects': courses_min_structured(courses),
+        'page': 1,
+        'total_pages': 1
+    }
+    body = json.dumps(response, sort_keys=True, separators=(',', ':'))
+    buf = BytesIO()
+    # mtime=0 so that identical catalogs compress identically
+    with gzip.GzipFile(mode='wb', fileobj=buf, mtime=0) as gzip_file:
+        gzip_file.write(body)
+    return {
+        'hash_id': hashlib.sha1(body).hexdigest(),
+        'numCourses': len(courses),
+        'data': buf.getvalue()
+    }
+
+def decompress(data):
+    with gzip.GzipFile(mode='rb', fileobj=BytesIO(data)) as gzip_file:
+        return gzip_file.read()
@@ -1,10 +1,42 @@
 
+import threading
+
+from classtime import app
+from classtime.core import db, institution_bind
 from .stdlocaldb import StandardLocalDatabase
 
 class LocalDatabaseFactory(object):
+    _sessions = dict()
+    _sessions_lock = threading.Lock()
+
     @staticmethod
     def build(institution):
         """Build a local database view for the given
         institution
+
+        Institutions listed in INSTITUTION_DATABASES get a session of
+        their own, bound to their own database. All others share the
+        main database's session.
         """
-        return StandardLocalDatabase(institution)
+        return StandardLocalDatabase(institution,
+                                     LocalDatabaseFactory.session(institution))
+
+    @staticmethod
+    def session(institution):
+        """Returns the scoped session for an institution's data
+        """
+        if institution_bind(institution) is None:
+            return db.session
+        with LocalDatabaseFactory._sessions_lock:
+            if institution not in LocalDatabaseFactory._sessions:
+                LocalDatabaseFactory._sessions[institution] = \
+                    db.create_scoped_session({'institution': institution})
+            return LocalDatabaseFactory._sessions[institution]
+
+@app.teardown_appcontext
+def remove_institution_sessions(exception=None): # pylint: disable=W0613
+    """Ends institutions' sessions along with each request, as
+    Flask-SQLAlchemy does for the main database's session
+    """
+    for session in LocalDatabaseFactory._sessions.values(): # pylint: disable=W0212
+        session.remove()
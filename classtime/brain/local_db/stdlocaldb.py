@@ -2,8 +2,10 @@
 from classtime.logging import logging
 logging = logging.getLogger(__name__) #pylint: disable=C0103
 
-from classtime.core import db
-from classtime.models import Term, Schedule, Course, Section
+from classtime import app
+from classtime.core import db, institution_bind, SHARED_TABLES
+from classtime.core import create_missing_columns, create_missing_indexes
+from classtime.models import Term, Schedule, Course, Section, CourseCatalog, DataVersion
 
 class StandardLocalDatabase(object):
     """A single institution's view of the local database
@@ -14,23 +16,66 @@ class StandardLocalDatabase(object):
     self.pop_<datatype>()
     """
 
-    def __init__(self, institution):
+    def __init__(self, institution, session=None):
+        """
+        :param str institution: the institution to view
+        :param session: (optional) scoped session to use. Defaults to
+            the main database's session
+        """
         self._institution = institution
+        self._session = session or db.session
         self._model_stack = list()
 
         self.Term = Term
         self.Schedule = Schedule
         self.Course = Course
         self.Section = Section
+        self.CourseCatalog = CourseCatalog
 
     def create(self):
-        """Create the database, if it did not already exist
+        """Create the database, if it did not already exist and
+        AUTO_CREATE_DB is set
+        """
+        if app.config.get('AUTO_CREATE_DB'):
+            self.create_schema()
+
+    def create_schema(self):
+        """Create any missing tables, columns and indexes, including those
+        of this institution's own database, if it has one
         """
         db.create_all()
+        create_missing_columns(db.engine)
+        create_missing_indexes(db.engine)
+        engine = self._own_engine()
+        if engine is not None:
+            db.Model.metadata.create_all(bind=engine, tables=self._own_tables())
+            create_missing_columns(engine, self._own_tables())
+            create_missing_indexes(engine, self._own_tables())
+
+    def drop_schema(self):
+        """Drop the tables of this institution's own database, if it
+        has one
+        """
+        engine = self._own_engine()
+        if engine is not None:
+            db.Model.metadata.drop_all(bind=engine, tables=self._own_tables())
+
+    def _own_engine(self):
+        bind_key = institution_bind(self._institution)
+        if bind_key is None:
+            return None
+        return db.get_engine(app, bind=bind_key)
+
+    @staticmethod
+    def _own_tables():
+        return [table for name, table in db.Model.metadata.tables.items()
+                if name not in SHARED_TABLES]
 
     def push_datatype(self, datatype):
         datatype = datatype.lower()
-        if 'term' in datatype:
+        if 'catalog' in datatype:
+            self.push_catalogs()
+        elif 'term' in datatype:
             self.push_terms()
         elif 'schedule' in datatype:
             self.push_schedules()
@@ -82,6 +127,16 @@ class StandardLocalDatabase(object):
         self._model_stack.append(Section)
         return self
 
+    def push_catalogs(self):
+        """Filter all requests to CourseCatalog objects only. Returns self,
+        so this method should be chained with other methods.
+
+        :returns: self
+        :rtype: StandardLocalDatabase
+        """
+        self._model_stack.append(CourseCatalog)
+        return self
+
     def pop_datatype(self):
         self._model_stack.pop()
         return self
@@ -114,16 +169,15 @@ class StandardLocalDatabase(object):
         self.push_datatype(datatype)
 
         identifiers = (self._institution,) + identifiers
-        retval = self.cur_datatype_model().query.get(identifiers)
+        retval = self._session.query(self.cur_datatype_model()).get(identifiers)
 
         self.pop_datatype()
         return retval
 
     def query(self, datatype):
         self.push_datatype(datatype)
-        retval = self.cur_datatype_model() \
-                 .query \
-                 .filter_by(institution=self._institution)
+        retval = self._session.query(self.cur_datatype_model()) \
+                              .filter_by(institution=self._institution)
         self.pop_datatype()
         return retval
 
@@ -137,7 +191,7 @@ class StandardLocalDatabase(object):
         self.push_datatype(datatype)
 
         model_dict['institution'] = self._institution
-        db.session.add(self.cur_datatype_model()(model_dict))
+        self._session.add(self.cur_datatype_model()(model_dict))
 
         self.pop_datatype()
 
@@ -147,13 +201,36 @@ class StandardLocalDatabase(object):
         for attr, value in model_dict.iteritems():
             setattr(db_obj, attr, value)
 
+    def bump_versions(self, terms):
+        """Adds 'bump commands' to the running transaction for the
+        :py:class:`DataVersion` of each term. They are kept in this
+        institution's own database, if it has one.
+
+        :param terms: term identifiers. An empty term stands for the
+            list of terms itself.
+        """
+        for term in terms:
+            data_version = self._session.query(DataVersion).get((self._institution, term))
+            if data_version is None:
+                data_version = DataVersion({
+                    'institution': self._institution,
+                    'term': term
+                })
+                self._session.add(data_version)
+            data_version.bump()
+
     def commit(self):
-        """Commits the running transaction to the database
+        """Commits the running transaction to the database, and to the
+        main database if this institution has its own
 
         If the commit fails, it will be rolled back to a safe state.
         """
-        try:
-            db.session.commit()
-        except:
-            db.session.rollback()
-            raise
+        sessions = [self._session]
+        if self._session is not db.session:
+            sessions.append(db.session)
+        for session in sessions:
+            try:
+                session.commit()
+            except:
+                session.rollback()
+                raise
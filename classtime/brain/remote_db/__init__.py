@@ -1,4 +1,3 @@
 
 from .abstract_remotedb import AbstractRemoteDatabase
-from .ldapdb import RemoteLDAPDatabase
 from .remotedb_factory import RemoteDatabaseFactory
@@ -2,7 +2,6 @@
 import os
 import json
 
-from .ldapdb import RemoteLDAPDatabase
 import classtime.brain.institutions
 
 class RemoteDatabaseFactory(object):
@@ -25,6 +24,8 @@ class RemoteDatabaseFactory(object):
         course_db = None
         db_type = config.get('type')
         if db_type == 'ldap':
+            # python-ldap is only imported by processes which fetch data
+            from .ldapdb import RemoteLDAPDatabase
             course_db = RemoteLDAPDatabase(server=config.get('server'),
                                            basedn=config.get('basedn'))
             for name, params in config.get('saved_searches').items():
@@ -1,4 +1,9 @@
 
 from .schedule import Schedule
 from .schedule import ScheduleScorer
+from .schedule import SectionRecord
 from .schedule_generator import find_schedules
+from .schedule_generator import count_schedules
+from .schedule_generator import explain_infeasible
+from .swaps import swap_options
+from .budget import Budget
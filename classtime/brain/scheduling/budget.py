@@ -0,0 +1,160 @@
+import time
+
+from classtime.logging import logging
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+
+class Budget(object):
+    """Limits how much work a single schedule request may do
+
+    Any limit which is None is unlimited. When a work limit is reached,
+    generation degrades gracefully: the best schedules found so far are
+    still returned, and :py:attr:`truncated` is set.
+    """
+
+    REQUEST_LIMITS = {
+        'solutions': 'max_solutions',
+        'iterations': 'max_iterations',
+        'clauses': 'max_clauses',
+        'combinations': 'max_combinations',
+        'seconds': 'seconds'
+    }
+    """Map from the keys of a request's "budget" object to limits"""
+
+    def __init__(self, max_solutions=None, max_iterations=None, max_clauses=None,
+                 max_combinations=None, seconds=None, score_bound=None):
+        """
+        :param int max_solutions: stop after this many solutions in total
+        :param int max_iterations: max solutions enumerated by the SAT
+            solver for any one elective combination
+        :param int max_clauses: skip elective combinations which need
+            more than this many clauses
+        :param int max_combinations: max number of elective
+            combinations to try
+        :param float seconds: stop after this much wall-clock time
+        :param float score_bound: stop once every kept schedule
+            scores at least this much
+        """
+        self.max_solutions = max_solutions
+        self.max_iterations = max_iterations
+        self.max_clauses = max_clauses
+        self.max_combinations = max_combinations
+        self.seconds = seconds
+        self.score_bound = score_bound
+        self.deadline = None
+        if seconds is not None:
+            self.deadline = time.time() + seconds
+
+        self.num_solutions = 0
+        self.exhausted_by = None
+        """Name of the limit which stopped generation, if any"""
+        self.truncated = False
+        """Whether any work limit cut generation short"""
+        self.deferred = None
+        """Set to a list to keep the enumerations cut short by
+        max_iterations, so they can be resumed later"""
+
+    @classmethod
+    def from_config(cls, config, request_budget=None):
+        """Builds a budget from the app's SCHEDULER_* settings
+
+        :param dict request_budget: (optional) the request's "budget"
+            object. Its limits can only tighten the configured ones.
+        """
+        limits = {
+            'max_solutions': config.get('SCHEDULER_MAX_SOLUTIONS'),
+            'max_iterations': config.get('SCHEDULER_MAX_ITERATIONS'),
+            'max_clauses': config.get('SCHEDULER_MAX_CLAUSES'),
+            'max_combinations': config.get('SCHEDULER_MAX_COMBINATIONS'),
+            'seconds': config.get('SCHEDULER_TIME_BUDGET')
+        }
+        for key, value in (request_budget or dict()).items():
+            limit = Budget.REQUEST_LIMITS.get(key)
+            if limit is None:
+                logging.warning('Unknown budget limit <{}>'.format(key))
+                continue
+            try:
+                value = float(value) if limit == 'seconds' else int(value)
+            except (TypeError, ValueError):
+                logging.warning('Invalid budget limit <{}={}>'.format(key, value))
+                continue
+            if limits[limit] is None or value < limits[limit]:
+                limits[limit] = value
+        return cls(score_bound=config.get('SCHEDULER_SCORE_BOUND'), **limits)
+
+    def renew(self):
+        """Grants the same limits again, for resuming generation where
+        it stopped
+
+        The time limit restarts from now, and the solution count, and
+        whether the limits were reached, are reset.
+        """
+        if self.seconds is not None:
+            self.deadline = time.time() + self.seconds
+        self.num_solutions = 0
+        self.exhausted_by = None
+        self.truncated = False
+
+    def time_limit(self):
+        """Returns a budget with only this budget's time limit, for
+        further work on the same request
+
+        The deadline is shared rather than restarted, so that the
+        request as a whole stays within its time limit.
+
+        :rtype: Budget
+        """
+        budget = Budget(seconds=self.seconds)
+        budget.deadline = self.deadline
+        return budget
+
+    def defer(self, schedules):
+        """Keeps an enumeration cut short by max_iterations, if this
+        budget keeps them
+
+        :param schedules: iterator over the rest of the enumeration
+        """
+        if self.deferred is not None:
+            self.deferred.append(schedules)
+
+    def add_solution(self):
+        self.num_solutions += 1
+
+    def truncate(self, limit):
+        """Records that a work limit cut generation short
+
+        :param str limit: name of the limit
+        """
+        if not self.truncated:
+            logging.info('Schedule generation truncated by <{}> limit'.format(limit))
+        self.truncated = True
+
+    def out_of_time(self):
+        """Checks the wall-clock budget, truncating if it has run out
+        """
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.truncate('seconds')
+            return True
+        return False
+
+    def exhausted(self, top=None):
+        """Checks whether generation should stop altogether
+
+        :param TopSchedules top: the schedules kept so far, used to
+            check the score bound
+        :returns: whether any request-level limit has been reached
+        :rtype: boolean
+        """
+        if self.exhausted_by is not None:
+            return True
+        if self.max_solutions is not None \
+        and self.num_solutions >= self.max_solutions:
+            self.truncate('solutions')
+            self.exhausted_by = 'solutions'
+        elif self.out_of_time():
+            self.exhausted_by = 'seconds'
+        elif self.score_bound is not None \
+        and top is not None and top.is_full() \
+        and top.worst_score() >= self.score_bound:
+            self.exhausted_by = 'score'
+        return self.exhausted_by is not None
@@ -0,0 +1,129 @@
+import itertools
+
+
+class CNF(object):
+    """A formula in conjunctive normal form, as used by pycosat
+
+    Variables are positive integers, and literals are variables or their
+    negations. The first ``num_vars`` variables are reserved by the
+    caller. Auxiliary variables are allocated after them.
+    """
+
+    PAIRWISE_MAX = 5
+    """At-most-one constraints over this many literals or fewer are
+    encoded pairwise, which is smaller for few literals"""
+
+    MAX_DUPLICATE_MODELS = 64
+    """Consecutive duplicate models tolerated by :py:meth:`iter_projected`
+    before it restarts the solver with the solutions found so far blocked"""
+
+    def __init__(self, num_vars=0):
+        """
+        :param int num_vars: number of variables reserved by the caller
+        """
+        self.num_vars = num_vars
+        self.clauses = list()
+
+    def __len__(self):
+        return len(self.clauses)
+
+    def new_var(self):
+        """Allocates an auxiliary variable
+
+        :returns: the new variable
+        """
+        self.num_vars += 1
+        return self.num_vars
+
+    def add(self, clause):
+        self.clauses.append(list(clause))
+
+    def at_least_one(self, literals):
+        self.add(literals)
+
+    def at_most_one(self, literals):
+        """Constrains at most one of the literals to be true
+
+        Uses the sequential counter encoding for many literals: O(n)
+        clauses and n-1 auxiliary variables, instead of O(n^2) clauses.
+        Each auxiliary variable is fully determined by the literals,
+        so every assignment of the literals has exactly one model.
+        """
+        literals = list(literals)
+        if len(literals) <= 1:
+            return
+        if len(literals) <= CNF.PAIRWISE_MAX:
+            for i, literal in enumerate(literals):
+                for other in literals[i+1:]:
+                    self.add([-literal, -other])
+            return
+
+        # counter[i] <=> any of literals[0..i] is true
+        counter = [self.new_var() for _ in literals[:-1]]
+        self.add([-literals[0], counter[0]])
+        self.add([-counter[0], literals[0]])
+        for i in range(1, len(literals) - 1):
+            self.add([-literals[i], counter[i]])
+            self.add([-counter[i-1], counter[i]])
+            self.add([-literals[i], -counter[i-1]])
+            self.add([-counter[i], counter[i-1], literals[i]])
+        self.add([-literals[-1], -counter[-1]])
+
+    def at_most(self, literals, k):
+        """Constrains at most k of the literals to be true
+
+        Forbids every k+1 of them from being true together, which is only
+        small for few literals, such as one per day.
+        """
+        for subset in itertools.combinations(literals, k + 1):
+            self.add([-literal for literal in subset])
+
+    def exactly_one(self, literals):
+        self.at_least_one(literals)
+        self.at_most_one(literals)
+
+    def satisfiable(self):
+        """
+        :returns: whether the formula has any model
+        """
+        # the solver is only imported by processes which solve formulas
+        import pycosat
+
+        return isinstance(pycosat.solve(self.clauses, vars=self.num_vars), list)
+
+    def iter_projected(self, num_projected):
+        """Lazily solves the formula, projected onto its first variables
+
+        pycosat's itersolve blocks each model over every variable, so
+        models which differ only in other variables would repeat the same
+        solution. Those duplicates are skipped here. If too many come in a
+        row, the solver is restarted with every solution found so far
+        blocked over the projected variables only.
+
+        :param int num_projected: number of leading variables to project
+            onto
+        :returns: iterator over each distinct assignment of the projected
+            variables, as the list of those which are true
+        """
+        # the solver is only imported by processes which solve formulas
+        import pycosat
+
+        seen = set()
+        blocking = list()
+        while True:
+            duplicates = 0
+            for model in pycosat.itersolve(self.clauses + blocking, vars=self.num_vars):
+                projected = tuple(literal for literal in model
+                                  if abs(literal) <= num_projected)
+                if projected in seen:
+                    duplicates += 1
+                    if duplicates > CNF.MAX_DUPLICATE_MODELS:
+                        break
+                    continue
+                seen.add(projected)
+                duplicates = 0
+                yield [literal for literal in projected if literal > 0]
+            else:
+                return
+            blocking = [[-literal for literal in projected]
+                        for projected in seen]
@@ -0,0 +1,100 @@
+import collections
+
+from classtime.brain.scheduling.schedule import Schedule
+
+
+class ConflictIndex(object):
+    """Interval index of sections by day and block
+
+    Finding the sections which overlap a section is a lookup of the
+    blocks it occupies, instead of a comparison with every other section.
+    Sections can be added and removed one at a time, so the index can be
+    kept up to date when a section's times change.
+    """
+
+    def __init__(self, sections=None):
+        """
+        :param list sections: (optional) :py:class:`SectionRecord` objects
+            to index, keyed by their position in the list
+        """
+        self._slots = collections.defaultdict(set)
+        """Map from (day, block) to the keys of sections occupying it"""
+        self._section_slots = dict()
+        """Map from key to the (day, block) slots its section occupies"""
+        for key, section in enumerate(sections or list()):
+            self.add(key, section)
+
+    def __len__(self):
+        return len(self._section_slots)
+
+    def add(self, key, section):
+        """Indexes a section, replacing any section already indexed
+        under the same key
+
+        :param key: hashable, orderable key of the section
+        :param SectionRecord section: the section to index
+        """
+        self.remove(key)
+        slots = list()
+        if section.dayMask is not None and section.startBlock is not None:
+            slots = [(day, block)
+                     for day in range(Schedule.NUM_DAYS)
+                     if section.dayMask & (1 << day)
+                     for block in range(section.startBlock, section.endBlock + 1)]
+        for slot in slots:
+            self._slots[slot].add(key)
+        self._section_slots[key] = slots
+
+    def remove(self, key):
+        """Removes a section from the index, if it is indexed
+
+        :param key: key of the section
+        """
+        for slot in self._section_slots.pop(key, list()):
+            self._slots[slot].discard(key)
+            if not self._slots[slot]:
+                del self._slots[slot]
+
+    def overlapping(self, key):
+        """Returns the keys of the other sections which overlap a section
+
+        :param key: key of an indexed section
+        :rtype: set
+        """
+        overlapping = set()
+        for slot in self._section_slots.get(key, list()):
+            overlapping.update(self._slots[slot])
+        overlapping.discard(key)
+        return overlapping
+
+    def overlapping_groups(self):
+        """Returns the groups of sections which all occupy some block
+
+        At most one section of each group can be scheduled. Groups which
+        are contained in another group are left out.
+
+        :returns: list of sorted key lists, largest first
+        """
+        groups = set(frozenset(keys)
+                     for keys in self._slots.itervalues()
+                     if len(keys) >= 2)
+        maximal = list()
+        for group in sorted(groups, key=lambda group: (-len(group), sorted(group))):
+            if not any(group <= other for other in maximal):
+                maximal.append(group)
+        return [sorted(group) for group in maximal]
+
+    def overlapping_pairs(self):
+        """Returns every pair of overlapping sections
+
+        :returns: sorted list of (key, other key) with key < other key
+        """
+        pairs = set()
+        for keys in self._slots.itervalues():
+            if len(keys) < 2:
+                continue
+            keys = sorted(keys)
+            for i, key in enumerate(keys):
+                for other in keys[i+1:]:
+                    pairs.add((key, other))
+        return sorted(pairs)
@@ -0,0 +1,107 @@
+"""Hard constraints on schedules
+
+Unlike preferences, which only score the schedules found, hard
+constraints rule schedules out before any are generated. Times which
+are ruled out are compiled into the busy times, so sections during them
+are pruned before solving. The number of days is a cardinality
+constraint on the solver.
+
+Currently supported constraints:
+
+:earliest-start: no classes before this time. Uses :ref:`time format <time-format>`
+:latest-end: no classes after this time. Uses :ref:`time format <time-format>`
+
+Times are ruled out by 30-minute block, so a class starting in the
+same block as the earliest start is ruled out. End times are exclusive,
+so a class ending exactly at the latest end is allowed.
+:days-off: days with no classes. Uses :ref:`day format <day-format>`
+:max-days: at most this many days with classes
+"""
+from classtime.logging import logging
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+from classtime.brain.scheduling.schedule import Schedule
+
+ALL_DAYS = (1 << Schedule.NUM_DAYS) - 1
+
+
+def compile_constraints(constraints):
+    """Compiles a request's hard constraints
+
+    Invalid constraints are logged and left out.
+
+    :param dict constraints: the request's "constraints" parameter
+    :returns: (busy times, max days). The busy times cover every time
+        ruled out, in the same format as the request's busy times. Max
+        days is None if the number of days is not constrained.
+    """
+    constraints = constraints or dict()
+    busy_times = list()
+    for name in ['earliest-start', 'latest-end', 'days-off']:
+        if constraints.get(name) is None:
+            continue
+        try:
+            busy_times.append(_ruled_out(name, constraints.get(name)))
+        except ValueError as e:
+            logging.warning('Invalid constraint <{}>: {}'.format(name, e))
+
+    max_days = None
+    if constraints.get('max-days') is not None:
+        try:
+            max_days = int(constraints.get('max-days'))
+            if max_days < 0:
+                raise ValueError('must not be negative')
+        except (ValueError, TypeError) as e:
+            logging.warning('Invalid constraint <max-days>: {}'.format(e))
+            max_days = None
+        if max_days >= Schedule.NUM_DAYS:
+            max_days = None
+    return busy_times, max_days
+
+
+def request_constraints(schedule_params):
+    """Compiles everything in a request which rules schedules out
+
+    :param dict schedule_params: the request's parameters
+    :returns: (busy mask, max days, locked section ids). The busy mask
+        combines the request's busy times with its hard constraints.
+    """
+    busy_times = list(schedule_params.get('busy-times') or list())
+    constraint_busy_times, max_days = compile_constraints(
+        schedule_params.get('constraints'))
+    busy_mask = Schedule.busy_mask(busy_times + constraint_busy_times)
+    locked = frozenset(schedule_params.get('locked-sections') or list())
+    return busy_mask, max_days, locked
+
+
+def num_days(day_mask):
+    """
+    :param int day_mask: bit ``i`` is set if day ``i`` is used
+    :returns: the number of days used
+    """
+    return bin(day_mask or 0).count('1')
+
+
+def _ruled_out(name, value):
+    """
+    :returns: busy time covering the times ruled out by a constraint
+    :raises ValueError: if the value is invalid
+    """
+    # pylint: disable=W0212
+    if name == 'earliest-start':
+        # the first block allowed is the first starting at or after it
+        first_allowed = (Schedule._timestr_to_minutes(value) + 29) / 30
+        return _busy_blocks(ALL_DAYS, 0, first_allowed - 1)
+    if name == 'latest-end':
+        # the first block ruled out is the one it falls in. Classes
+        # ending exactly at it do not use that block.
+        return _busy_blocks(ALL_DAYS, Schedule._timestr_to_blocknum(value),
+                            Schedule.NUM_BLOCKS - 1)
+    return _busy_blocks(Schedule._daystr_to_daymask(value), 0, Schedule.NUM_BLOCKS - 1)
+
+def _busy_blocks(day_mask, start, end):
+    return {
+        'dayMask': day_mask,
+        'startBlock': start,
+        'endBlock': end
+    }
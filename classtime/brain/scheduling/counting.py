@@ -0,0 +1,165 @@
+import collections
+import itertools
+
+from classtime.brain.scheduling.schedule import Schedule
+from classtime.brain.scheduling.constraints import num_days
+
+CHECK_TIME_EVERY = 1000
+"""Number of steps between checks of the budget's time limit"""
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def count_schedules(sections, budget=None, max_days=None):
+    """Counts the valid schedules of the given sections, without
+    generating them
+
+    Applies the same constraints as schedule generation: one section
+    per component, no two sections in the same block, and autoEnroll
+    dependencies. Busy times should already have been pruned.
+
+    Each course's valid combinations of sections are listed first, and
+    grouped by timetable. Courses which can never conflict with each
+    other are counted separately and multiplied. The rest are counted
+    by dynamic programming over courses, memoized on the blocks which
+    are occupied and which later courses could still use. With max_days,
+    courses are never independent, since they share the days, and the
+    days used so far are memoized too.
+
+    :param list sections: :py:class:`SectionRecord` objects
+    :param Budget budget: (optional) only its time limit is used
+    :param int max_days: (optional) most days a schedule can have
+        classes on
+    :returns: the number of valid schedules, or None if the budget's
+        time limit was reached first
+    :rtype: int
+    """
+    try:
+        courses = [_course_timetables(components, budget)
+                   for components in _components_by_course(sections).itervalues()]
+        if max_days is not None:
+            return _count_group(courses, budget, max_days)
+        total = 1
+        for group in _independent_groups(courses):
+            if total == 0:
+                break
+            total *= _count_group(group, budget)
+        return total
+    except OutOfTime:
+        return None
+
+
+def _components_by_course(sections):
+    courses = collections.OrderedDict()
+    for section in sections:
+        courses.setdefault(section.course, collections.OrderedDict()) \
+               .setdefault(section.component, list()) \
+               .append(section)
+    return courses
+
+
+def _course_timetables(components, budget):
+    """Lists a course's valid combinations of one section per component
+
+    :param dict components: map from component to its sections
+    :returns: map from packed timetable to the number of combinations
+        which have it
+    """
+    timetables = collections.Counter()
+    for steps, combination in enumerate(itertools.product(*components.values()), 1):
+        if steps % CHECK_TIME_EVERY == 0:
+            _check_time(budget)
+        timetable = 0
+        valid = True
+        for i, section in enumerate(combination):
+            section_timetable = section.timetable
+            if timetable & section_timetable \
+            or not all(Schedule.dependency_permits(section, other)
+                       and Schedule.dependency_permits(other, section)
+                       for other in combination[:i]):
+                valid = False
+                break
+            timetable |= section_timetable
+        if valid:
+            timetables[timetable] += 1
+    return timetables
+
+
+def _independent_groups(courses):
+    """Splits courses into groups which never conflict with each other
+
+    :param list courses: one map from timetable to count per course
+    :returns: list of lists of courses
+    """
+    used = [reduce(lambda a, b: a | b, timetables.keys(), 0)
+            for timetables in courses]
+    groups = list()
+    unassigned = set(range(len(courses)))
+    while unassigned:
+        group = [unassigned.pop()]
+        group_used = used[group[0]]
+        grew = True
+        while grew:
+            grew = False
+            for course in sorted(unassigned):
+                if used[course] & group_used:
+                    unassigned.discard(course)
+                    group.append(course)
+                    group_used |= used[course]
+                    grew = True
+        groups.append([courses[course] for course in sorted(group)])
+    return groups
+
+
+def _count_group(courses, budget, max_days=None):
+    """Counts the combinations of one timetable per course with no two
+    timetables sharing a block, on at most max_days days
+    """
+    # a course with fewer options first keeps the memo small
+    courses = sorted(courses, key=len)
+    # blocks which any later course could use
+    later_used = [0] * (len(courses) + 1)
+    for i in reversed(range(len(courses))):
+        later_used[i] = later_used[i+1] | reduce(lambda a, b: a | b, courses[i].keys(), 0)
+
+    memo = dict()
+    steps = [0]
+    def _count(i, occupied, days):
+        if i == len(courses):
+            return 1
+        key = (i, occupied & later_used[i], days)
+        if key in memo:
+            return memo[key]
+        steps[0] += 1
+        if steps[0] % CHECK_TIME_EVERY == 0:
+            _check_time(budget)
+        total = 0
+        for timetable, num_combinations in courses[i].iteritems():
+            if timetable & occupied:
+                continue
+            timetable_days = days
+            if max_days is not None:
+                timetable_days |= _days(timetable)
+                if num_days(timetable_days) > max_days:
+                    continue
+            total += num_combinations * _count(i + 1, occupied | timetable, timetable_days)
+        memo[key] = total
+        return total
+    return _count(0, 0, 0)
+
+
+def _days(timetable):
+    """
+    :returns: day mask of the days a packed timetable uses
+    """
+    day_blocks = (1 << Schedule.NUM_BLOCKS) - 1
+    return sum(1 << day
+               for day in range(Schedule.NUM_DAYS)
+               if timetable >> (day * Schedule.NUM_BLOCKS) & day_blocks)
+
+
+def _check_time(budget):
+    if budget is not None and budget.out_of_time():
+        raise OutOfTime()
@@ -0,0 +1,180 @@
+"""Cursors, which page through a request's schedules without regenerating
+them
+
+A request's first page leaves its :py:class:`ResultStream` in a store,
+under a cursor. Each later page resumes generation where the previous
+page's budget stopped it, and returns the best schedules generated so
+far which were not on an earlier page. Enumerations which max_iterations
+cut short are resumed too, once every elective combination has been
+tried.
+
+An elective combination cut short by the time limit, and combinations
+beyond max_combinations, are not resumed.
+
+Pages are ranked among the schedules generated so far, so a later page
+can hold a schedule which scores better than some on an earlier page,
+if it was only found later. Only the best SCHEDULER_CURSOR_LOOKAHEAD
+pages' worth of the schedules generated are kept, counting the page
+being returned; the rest are dropped.
+
+Streams are kept in the memory of the worker process which created
+them, so each worker has its own cursors.
+"""
+import threading
+
+from classtime.logging import logging, lazy
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+import classtime
+import classtime.brain
+
+from classtime.brain.scheduling import schedule_generator
+from classtime.brain.scheduling.budget import Budget
+from classtime.brain.scheduling.topk import TopSchedules
+from classtime.brain.scheduling.sessions import SessionStore
+
+
+class ResultStream(object):
+    """A request's schedules, generated and returned one page at a time
+    """
+
+    def __init__(self, schedule_params, page_size):
+        """Nothing is generated until the first page is requested
+
+        :param dict schedule_params: parameters to build the schedule with.
+            Check :ref:`api/generate-schedules <api-generate-schedules>`
+            for available parameters.
+        :param int page_size: number of schedules per page
+        """
+        self.params = dict(schedule_params)
+        self.page_size = page_size
+        self.page = 0
+        self.budget = Budget.from_config(classtime.app.config,
+                                         self.params.get('budget'))
+        self.budget.deferred = list()
+        self.finished = False
+        """Whether generation has run to completion, or stopped for good"""
+        self._cal = classtime.brain.get_calendar(self.params.get('institution', 'ualberta'))
+        self._course_sections = dict()
+        """Sections of each course of the request, loaded once"""
+        self._conflicts = list()
+        """Conflicts which rule out every schedule, found before generating"""
+        self._pending = self._pending_pool()
+        """The best candidates generated but not returned yet. Each item
+        is (timetable bitmaps, sections)"""
+        self._candidates = schedule_generator.find_candidates(self.params, self.budget,
+                                                              self._cal, self._pending.size,
+                                                              self._course_sections,
+                                                              self._conflicts)
+        self._returned = set()
+        """Timetable bitmaps of the schedules already returned"""
+        self._lock = threading.Lock()
+
+    def has_more(self):
+        """
+        :returns: whether another page could have any schedules
+        """
+        return len(self._pending) > 0 or not self.finished
+
+    def next_page(self):
+        """Resumes generation with a renewed budget, and returns the best
+        schedules not returned yet
+
+        Check ``budget.truncated`` afterwards to find out whether this
+        page's generation was cut short.
+
+        :returns: list of :py:class:`Schedule`
+        """
+        with self._lock:
+            if self.page > 0:
+                self.budget.renew()
+            top = schedule_generator.candidate_pool(self.params, self.page_size)
+            for score, bitmaps, sections in _candidates(self._pending):
+                top.push(score, bitmaps, sections)
+            self._extend(top)
+
+            schedules = schedule_generator.best_schedules(self._cal, top, self.page_size,
+                                                          self.params)
+            self._returned.update(tuple(schedule.timetable_bitmap) for schedule in schedules)
+            pending = self._pending
+            self._pending = self._pending_pool()
+            for score, bitmaps, sections in _candidates(pending):
+                if bitmaps not in self._returned:
+                    self._pending.push(score, bitmaps, (bitmaps, sections))
+            self.page += 1
+            logging.info(lazy('Returning page {} with {} schedules, {} more pending',
+                self.page, len(schedules), len(self._pending)))
+            return schedules
+
+    def count_schedules(self):
+        """Counts every valid schedule of the request, within the time
+        left in the budget, reusing the sections already loaded
+
+        :returns: the number of schedules, or None if the time limit was
+            reached first
+        """
+        with self._lock:
+            return schedule_generator.count_schedules(self.params, self.budget, self._cal,
+                                                      self._course_sections)
+
+    def explain_infeasible(self):
+        """Explains why the request has no schedules, within the time
+        left in the budget, reusing the sections already loaded and the
+        conflicts already found
+
+        :returns: list of conflicts, as returned by
+            :py:func:`schedule_generator.explain_infeasible`
+        """
+        with self._lock:
+            return schedule_generator.explain_infeasible(self.params, self.budget, self._cal,
+                                                         self._course_sections,
+                                                         list(self._conflicts))
+
+    def _pending_pool(self):
+        lookahead = classtime.app.config.get('SCHEDULER_CURSOR_LOOKAHEAD')
+        return TopSchedules(self.page_size * lookahead)
+
+    def _extend(self, top):
+        """Generates candidates until the budget is exhausted
+        """
+        while not self.finished:
+            for score, bitmaps, sections in self._candidates:
+                if bitmaps in self._returned:
+                    continue
+                self._pending.push(score, bitmaps, (bitmaps, sections))
+                top.push(score, bitmaps, sections)
+                self.budget.add_solution()
+                if self.budget.exhausted(top):
+                    logging.info('Paused generating schedules, reached {} budget'.format(
+                        self.budget.exhausted_by))
+                    return
+            if self.budget.deferred:
+                self._candidates = schedule_generator.to_candidates(
+                    self.budget.deferred.pop(0))
+            else:
+                self.finished = True
+                # nothing is left to generate, so let the generators go
+                self._candidates = None
+
+
+def _candidates(pool):
+    """Yields each (score, timetable bitmaps, sections) kept by a pool
+    of pending candidates, including duplicate layouts
+    """
+    for score, item, duplicates in pool.best():
+        for bitmaps, sections in [item] + duplicates:
+            yield score, bitmaps, sections
+
+
+_store = None
+
+def store():
+    """Returns the process's cursor store, creating it from the app's
+    configuration on first use
+    """
+    global _store # pylint: disable=W0603
+    if _store is None:
+        _store = SessionStore.from_config(classtime.app.config,
+                                          max_sessions='SCHEDULER_MAX_CURSORS',
+                                          ttl='SCHEDULER_CURSOR_TTL')
+    return _store
@@ -0,0 +1,104 @@
+import heapq
+import itertools
+
+
+class InfeasibleSubsets(object):
+    """Memo of the elective courses, and pairs of elective courses, which
+    cannot be scheduled together with the required courses
+
+    Any combination of electives containing one of them has no schedule,
+    so it can be skipped without being solved. Courses and pairs are
+    only checked once a combination containing them has no schedule,
+    and each is only checked once, however many combinations it is
+    part of.
+    """
+
+    def __init__(self, satisfiable):
+        """
+        :param function satisfiable: takes a tuple of elective course ids,
+            and returns whether they can be scheduled together with the
+            required courses
+        """
+        self._satisfiable = satisfiable
+        self._feasible = dict()
+        """Map from sorted tuple of course ids to whether it is feasible"""
+
+    def __len__(self):
+        return sum(1 for feasible in self._feasible.itervalues()
+                   if not feasible)
+
+    def contains_infeasible(self, combination):
+        """Checks whether a combination of electives contains a course or
+        pair of courses already found to be infeasible. Nothing new is
+        checked.
+
+        :param tuple combination: elective course ids
+        :rtype: boolean
+        """
+        return any(self._feasible.get(key) is False
+                   for key in _subsets(combination))
+
+    def learn(self, combination):
+        """Checks the courses and pairs of courses of a combination which
+        has no schedule, until one is found to be infeasible, so that
+        later combinations containing it are skipped
+
+        :param tuple combination: elective course ids
+        """
+        for key in _subsets(combination):
+            if not self.feasible(key):
+                return
+
+    def feasible(self, subset):
+        key = tuple(sorted(subset))
+        if key not in self._feasible:
+            self._feasible[key] = self._satisfiable(key)
+        return self._feasible[key]
+
+
+def _subsets(combination):
+    """
+    :returns: the sorted courses, then pairs of courses, of a combination
+    """
+    return [tuple(sorted(subset))
+            for subset in [(course,) for course in combination] +
+                          list(itertools.combinations(combination, 2))]
+
+
+def by_promise(groups, estimate):
+    """Lazily generates every combination of one course from each group,
+    most promising first
+
+    Combinations come in increasing order of the sum of their courses'
+    estimates. Only the combinations generated so far, and their
+    neighbours, are held in memory.
+
+    :param list groups: one list of course ids per electives group
+    :param function estimate: takes a course id, and returns an estimate
+        of how costly it is to schedule. Lower is more promising.
+    :returns: iterator over tuples of course ids
+    """
+    costs = dict((course, estimate(course))
+                 for group in groups
+                 for course in group)
+    groups = [sorted(group, key=lambda course: costs[course])
+              for group in groups]
+    if not all(groups):
+        return
+
+    def _cost(indices):
+        return sum(costs[group[i]] for group, i in zip(groups, indices))
+
+    start = (0,) * len(groups)
+    heap = [(_cost(start), start)]
+    seen = set([start])
+    while heap:
+        _, indices = heapq.heappop(heap)
+        yield tuple(group[i] for group, i in zip(groups, indices))
+        for g in range(len(groups)):
+            if indices[g] + 1 >= len(groups[g]):
+                continue
+            neighbour = indices[:g] + (indices[g] + 1,) + indices[g+1:]
+            if neighbour not in seen:
+                seen.add(neighbour)
+                heapq.heappush(heap, (_cost(neighbour), neighbour))
@@ -0,0 +1,134 @@
+"""Detection and explanation of requests which have no schedules
+
+Each conflict is a dict with:
+
+:reason: ``'busy-times'``, ``'max-days'``, ``'conflict'``, ``'courses'`` or
+         ``'electives'``
+:names: names of the components or courses involved
+:message: human-readable explanation
+"""
+import collections
+
+from classtime.brain.scheduling.schedule import Schedule
+from classtime.brain.scheduling.constraints import num_days
+
+
+def quick_conflicts(sections, busy_mask=None, max_days=None):
+    """Finds conflicts which are visible from each component's timetables
+    alone, without solving anything
+
+    - a component whose every section overlaps busy times
+    - a component whose every section is on more than max_days days
+    - two components whose sections always overlap each other
+
+    :param list sections: :py:class:`SectionRecord` objects
+    :param tuple busy_mask: (optional) busy times, compiled by
+        :py:meth:`Schedule.busy_mask`
+    :param int max_days: (optional) most days a schedule can have
+        classes on
+    :returns: list of conflicts. Empty does not mean schedules exist.
+    """
+    components = _components(sections)
+    conflicts = list()
+    timetables = collections.OrderedDict()
+    for key, component_sections in components.iteritems():
+        if busy_mask and any(busy_mask):
+            component_sections = [section for section in component_sections
+                                  if section.bitmap is None
+                                  or not Schedule.bitmaps_overlap(section.bitmap, busy_mask)]
+        if not component_sections:
+            name = _component_name(components[key][0])
+            conflicts.append(conflict('busy-times', [name],
+                '{} always conflicts with busy times'.format(name)))
+            continue
+        if max_days is not None:
+            component_sections = [section for section in component_sections
+                                  if num_days(section.dayMask) <= max_days]
+        if not component_sections:
+            name = _component_name(components[key][0])
+            conflicts.append(conflict('max-days', [name],
+                '{} is always on more than {} days'.format(name, max_days)))
+            continue
+        timetables[key] = (_component_name(component_sections[0]),
+                           set(section.timetable for section in component_sections))
+
+    keys = timetables.keys()
+    for i, key in enumerate(keys):
+        name, component_timetables = timetables[key]
+        for other_key in keys[i+1:]:
+            other_name, other_timetables = timetables[other_key]
+            if all(timetable & other_timetable
+                   for timetable in component_timetables
+                   for other_timetable in other_timetables):
+                conflicts.append(conflict('conflict', [name, other_name],
+                    '{} always conflicts with {}'.format(name, other_name)))
+    return conflicts
+
+
+def minimal_conflict(sections, satisfiable, budget=None):
+    """Finds a minimal set of courses which cannot be scheduled together
+
+    Courses are removed one at a time, and left out for good if the
+    remaining courses still have no schedule. Every course in the result
+    is needed for the conflict.
+
+    :param list sections: :py:class:`SectionRecord` objects
+    :param function satisfiable: takes a list of sections, and returns
+        whether any schedule of them exists
+    :param Budget budget: (optional) when out of time, the courses left
+        so far are returned, and may not be minimal
+    :returns: list of conflicts, empty if the sections have a schedule
+    """
+    by_course = collections.OrderedDict()
+    for section in sections:
+        by_course.setdefault(section.course, list()).append(section)
+
+    def _sections(courses):
+        return [section for course in courses for section in by_course[course]]
+
+    courses = by_course.keys()
+    if satisfiable(_sections(courses)):
+        return list()
+    for course in list(courses):
+        if budget is not None and budget.out_of_time():
+            break
+        rest = [other for other in courses if other != course]
+        if not satisfiable(_sections(rest)):
+            courses = rest
+
+    names = [_course_name(by_course[course][0]) for course in courses]
+    if len(names) == 1:
+        message = '{} cannot be scheduled'.format(names[0])
+    else:
+        message = '{} and {} cannot be scheduled together'.format(
+            ', '.join(names[:-1]), names[-1])
+    return [conflict('courses', names, message)]
+
+
+def conflict(reason, names, message):
+    return {
+        'reason': reason,
+        'names': names,
+        'message': message
+    }
+
+
+def _components(sections):
+    components = collections.OrderedDict()
+    for section in sections:
+        components.setdefault((section.course, section.component), list()) \
+                  .append(section)
+    return components
+
+
+def _course_name(section):
+    if section.course_info is not None and section.course_info.get('asString'):
+        return section.course_info.get('asString')
+    if section.asString and section.component and section.section:
+        suffix = ' {} {}'.format(section.component, section.section)
+        if section.asString.endswith(suffix):
+            return section.asString[:-len(suffix)]
+    return section.course
+
+def _component_name(section):
+    return '{} {}'.format(_course_name(section), section.component)
@@ -3,6 +3,14 @@ from classtime.logging import logging
 logging = logging.getLogger(__name__) # pylint: disable=C0103
 
 import re
+import collections
+
+_MINUTES_CACHE_SIZE = 4096
+_minutes_cache = dict()
+"""Memo of time strings already converted to minutes"""
+_DAY_SCORES_CACHE_SIZE = 4096
+_day_scores_cache = dict()
+"""Memo of day bitmaps already measured for scoring"""
 
 class Schedule(object):
     """Represents a 5-day week of 24-hour days
@@ -49,6 +57,8 @@ class Schedule(object):
         self.scorer = ScheduleScorer(self, preferences)
         self.preferences = preferences
 
+        self.identifier = None
+        """Hash identifier, set once the schedule has been saved"""
         self.more_like_this = list()
 
         self.sections = list()
@@ -113,11 +123,12 @@ class Schedule(object):
         On success, adds it to the section list.
 
         :param section: the section to add
-        :type section: section dict
+        :type section: :py:class:`SectionRecord` or section dict
 
         If a section has null timetable info (day, startTime, endTime),
         it will not be added.
         """
+        section = SectionRecord.coerce(section)
         try:
             self.attempt_add_to_timetable(section, len(self.sections))
         except ValueError:
@@ -149,11 +160,12 @@ class Schedule(object):
         and a section
 
         :param section: the section to check for conflicts with
-        :type sections: section dict
+        :type sections: :py:class:`SectionRecord` or section dict
 
         :returns: whether it conflicts or not
         :rtype: boolean
         """
+        section = SectionRecord.coerce(section)
         if self._has_timetable_conflict(section):
             return True
         if self._has_dependency_conflict(section):
@@ -161,31 +173,92 @@ class Schedule(object):
         return False
 
     def _has_timetable_conflict(self, section):
-        other = Schedule(section)
+        if section.bitmap is None:
+            return False
         for day in range(Schedule.NUM_DAYS):
-            if other.timetable_bitmap[day] & self.timetable_bitmap[day] != 0:
+            if section.bitmap[day] & self.timetable_bitmap[day] != 0:
                 return True
         return False
 
     def _has_dependency_conflict(self, section):
-        potential_dependencies = [other
-            for other in self.sections
-            if other.get('course') == section.get('course')
-            and other.get('component') != section.get('component')]
-
-        for other in potential_dependencies:
-            if section.get('autoEnroll') is None \
-            and other.get('autoEnroll') is None:
-                continue
-            if section.get('component') != other.get('autoEnrollComponent') \
-            and section.get('autoEnrollComponent') != other.get('component'):
-                continue
-            if section.get('autoEnroll') == other.get('section') \
-            or section.get('section') == other.get('autoEnroll'):
+        for other in self.sections:
+            if other.course != section.course \
+            or other.component == section.component:
                 continue
+            if not Schedule.dependency_permits(section, other) \
+            or not Schedule.dependency_permits(other, section):
+                return True
+        return False
+
+    @staticmethod
+    def dependency_permits(dependent, other):
+        """Checks whether a section's autoEnroll allows scheduling it
+        with another section
+
+        A section which autoEnrolls in a component of its course may only
+        be scheduled with the one section of that component it names,
+        or with a section which names it back.
+
+        :param SectionRecord dependent: the section which may autoEnroll
+        :param SectionRecord other: any section of the same course
+        :rtype: boolean
+        """
+        if dependent.autoEnroll is None \
+        or dependent.autoEnrollComponent != other.component:
             return True
+        return dependent.autoEnroll == other.section \
+            or dependent.section == other.autoEnroll
+
+    @staticmethod
+    def sections_overlap(section_a, section_b):
+        """Checks whether two sections are scheduled at the same time
+
+        :param SectionRecord section_a: a section
+        :param SectionRecord section_b: another section
+        :rtype: boolean
+        """
+        if section_a.bitmap is None or section_b.bitmap is None:
+            return False
+        return Schedule.bitmaps_overlap(section_a.bitmap, section_b.bitmap)
+
+    @staticmethod
+    def bitmaps_overlap(bitmap_a, bitmap_b):
+        """Checks whether two timetable bitmaps share any block
+
+        :param bitmap_a: one int per day
+        :param bitmap_b: one int per day
+        :rtype: boolean
+        """
+        for day in range(Schedule.NUM_DAYS):
+            if bitmap_a[day] & bitmap_b[day] != 0:
+                return True
         return False
 
+    @staticmethod
+    def pack_bitmap(bitmap):
+        """Packs a timetable bitmap into a single int, so that comparing
+        two timetables is a single operation
+
+        :param bitmap: one int per day
+        :rtype: int
+        """
+        packed = 0
+        for day, day_bitmap in enumerate(bitmap):
+            packed |= day_bitmap << (day * Schedule.NUM_BLOCKS)
+        return packed
+
+    @staticmethod
+    def busy_mask(busy_times):
+        """Compiles busy times into a single timetable bitmap
+
+        Invalid busy times are logged and left out.
+
+        :param busy_times: one or more busy_times
+        :type busy_times: section dict or list of section dicts
+        :returns: tuple of one int per day
+        """
+        return tuple(Schedule(busy_times=busy_times).timetable_bitmap)
+
     def is_similar(self, other):
         return self._similarity(other) >= Schedule.SIMILARITY_THRESHOLD
 
@@ -213,7 +286,7 @@ class Schedule(object):
         """Attempts to add a section to the timetable
 
         :param section: the section to add
-        :type section: section dict
+        :type section: :py:class:`SectionRecord` or section dict
         :param int section_num: the index of :py:attr:`Schedule.SYMBOLS` to
                                 represent this section with
         :raises ValueError: if one or more of:
@@ -222,29 +295,27 @@ class Schedule(object):
                             * endTime
                             is null
         """
-        days = section.get('day')
-        start = section.get('startTime')
-        end = section.get('endTime')
-        if None in [days, start, end]:
-            raise ValueError(section.get('class_', '??'))
-        start = Schedule._timestr_to_blocknum(start)
-        end = Schedule._timestr_to_blocknum(end)
-        for day in days:
-            self._add_to_timetable(day, start, end, section_num)            
+        if isinstance(section, SectionRecord):
+            if section.bitmap is None:
+                raise ValueError(section.id)
+            day_mask, start, end = section.dayMask, section.startBlock, section.endBlock
+        else:
+            day_mask, start, end = Schedule.section_blocks(section)
+        for daynum in range(Schedule.NUM_DAYS):
+            if day_mask & (1 << daynum):
+                self._add_to_timetable(daynum, start, end, section_num)
 
-    def _add_to_timetable(self, day, start, end, section_num):
+    def _add_to_timetable(self, daynum, start, end, section_num):
         """Adds one or more blocks to the timetable
 
-        :param day: the timetable day to add to
-        :type day: str of length one
+        :param int daynum: the timetable day to add to
         :param int start: the first block
         :param int end: the last block (inclusive)
         :param int section_num: the index of Schedule.SYMBOLS to
                                 represent these blocks with
         """
-        daynum = Schedule._daystr_to_daynum(day)
+        self.timetable_bitmap[daynum] |= Schedule._blocks_to_bitmap(start, end)
         for block in range(start, end+1):
-            self.timetable_bitmap[daynum] |= 1 << (Schedule.NUM_BLOCKS-block-1)
             self.timetable[daynum][block] = section_num
 
     def clone(self):
@@ -275,6 +346,94 @@ class Schedule(object):
     def overall_score(self):
         return self.scorer.read('overall')
 
+    @staticmethod
+    def section_blocks(section):
+        """Returns the timetable blocks a section occupies
+
+        Uses the precomputed ``dayMask``, ``startBlock`` and ``endBlock``
+        of sections from the local db, and otherwise parses ``day``,
+        ``startTime`` and ``endTime``.
+
+        :param section: a section or busy_time
+        :type section: section dict
+        :returns: (day mask, first block, last block), where bit ``i`` of
+                  the day mask is set if the section is on day ``i``
+        :rtype: tuple of int
+
+        :raises ValueError: if the section has null or invalid
+                            timetable info
+        """
+        day_mask = section.get('dayMask')
+        start = section.get('startBlock')
+        end = section.get('endBlock')
+        if None not in [day_mask, start, end]:
+            return day_mask, start, end
+
+        days = section.get('day')
+        start = section.get('startTime')
+        end = section.get('endTime')
+        if None in [days, start, end]:
+            raise ValueError(section.get('class_', '??'))
+        return (Schedule._daystr_to_daymask(days),
+                Schedule._timestr_to_blocknum(start),
+                Schedule._timestr_to_end_blocknum(end))
+
+    @staticmethod
+    def section_bitmap(section):
+        """Returns the timetable bitmap of a single section
+
+        :param section: a section or busy_time
+        :type section: section dict
+        :returns: one bitmap per day, like :py:attr:`timetable_bitmap`
+        :rtype: list of int
+
+        :raises ValueError: if the section has null or invalid
+                            timetable info
+        """
+        day_mask, start, end = Schedule.section_blocks(section)
+        block_bitmap = section.get('blockBitmap')
+        if block_bitmap is None:
+            block_bitmap = Schedule._blocks_to_bitmap(start, end)
+        return [block_bitmap if day_mask & (1 << daynum) else 0
+                for daynum in range(Schedule.NUM_DAYS)]
+
+    TIMETABLE_COLUMNS = ['dayMask', 'startBlock', 'endBlock', 'blockBitmap']
+    """Internal section columns, precomputed by :py:meth:`timetable_columns`"""
+
+    @staticmethod
+    def timetable_columns(section):
+        """Precomputes the integer timetable columns of a section
+
+        :param section: the section to precompute columns for
+        :type section: section dict
+        :returns: dict of ``dayMask``, ``startBlock``, ``endBlock`` and
+                  ``blockBitmap``. If the section has null or invalid
+                  timetable info, ``dayMask`` is 0, marking it as
+                  precomputed, and the others are None.
+        """
+        try:
+            day_mask, start, end = Schedule.section_blocks(section)
+        except ValueError:
+            day_mask, start, end = 0, None, None
+        return {
+            'dayMask': day_mask,
+            'startBlock': start,
+            'endBlock': end,
+            'blockBitmap': None if start is None \
+                           else Schedule._blocks_to_bitmap(start, end)
+        }
+
+    @staticmethod
+    def _blocks_to_bitmap(start, end):
+        """Converts a range of blocks to a single day's bitmap
+
+        :param int start: the first block
+        :param int end: the last block (inclusive)
+        """
+        if end < start:
+            return 0
+        return ((1 << (end - start + 1)) - 1) << (Schedule.NUM_BLOCKS - end - 1)
+
     @staticmethod
     def _timestr_to_blocknum(time):
         """Converts a time string to a block number
@@ -286,9 +445,43 @@ class Schedule(object):
         :raises ValueError: if time does not match
                             :ref:`time format <time-format>`
         """
-        if not isinstance(time, str):
-            time = str(time)
-        match = re.search(r'(\d\d):(\d\d) (\w\w)', time)
+        return Schedule._timestr_to_minutes(time) / 30
+
+    @staticmethod
+    def _timestr_to_end_blocknum(time):
+        """Converts an end time to the last block before it. End times
+        are exclusive, so a section ending on a block boundary does not
+        use the block starting then.
+
+        :param str time: string in :ref:`time format <time-format>`
+        :returns: block number of the minute before this time
+        :rtype: int
+
+        :raises ValueError: if time does not match
+                            :ref:`time format <time-format>`
+        """
+        return (Schedule._timestr_to_minutes(time) - 1) / 30
+
+    @staticmethod
+    def _timestr_to_minutes(time):
+        """Converts a time string to minutes after midnight
+
+        Results are memoized, since the same few time strings are
+        converted over and over.
+
+        :param str time: string in :ref:`time format <time-format>`
+        :rtype: int
+
+        :raises ValueError: if time does not match
+                            :ref:`time format <time-format>`
+        """
+        minutes = _minutes_cache.get(time)
+        if minutes is not None:
+            return minutes
+        timestr = time
+        if not isinstance(timestr, str):
+            timestr = str(timestr)
+        match = re.search(r'(\d\d):(\d\d) (\w\w)', timestr)
         if match is None:
             raise ValueError(r'time must match "\d\d:\d\d [AP]M')
         hour = int(match.group(1))
@@ -297,8 +490,11 @@ class Schedule(object):
         if hour != 12 and match.group(3) == 'PM':
             ampm_offset = 12
 
-        block = (hour+ampm_offset)*2 + minute/30
-        return block
+        minutes = (hour+ampm_offset)*60 + minute
+        if len(_minutes_cache) >= _MINUTES_CACHE_SIZE:
+            _minutes_cache.clear()
+        _minutes_cache[time] = minutes
+        return minutes
 
     @staticmethod
     def _daystr_to_daynum(day):
@@ -314,10 +510,144 @@ class Schedule(object):
             raise ValueError('day must be in "{}"'.format(Schedule.DAYS))
         return Schedule.DAYS.index(day)
 
+    @staticmethod
+    def _daystr_to_daymask(days):
+        """Converts a day string to a day mask
+
+        :param str days: one or more days in Schedule.DAYS
+        :returns: mask with bit ``i`` set for each day number ``i``
+        :rtype: int
+
+        :raises ValueError: if any day is not in Schedule.DAYS
+        """
+        day_mask = 0
+        for day in days:
+            day_mask |= 1 << Schedule._daystr_to_daynum(day)
+        return day_mask
+
+
+class SectionRecord(collections.namedtuple('SectionRecord', [
+        'id', 'course', 'component', 'section', 'asString',
+        'autoEnroll', 'autoEnrollComponent',
+        'dayMask', 'startBlock', 'endBlock', 'bitmap',
+        'row', 'course_info'])):
+    """Slim, immutable view of a section, as used while scheduling
+
+    Holds only what scheduling needs, as attributes. The full section
+    row and its course's info are kept by reference, and only merged
+    together by :py:meth:`to_dict` when serializing.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, section, course_info=None):
+        """Creates a record from a section dict
+
+        :param dict section: the section's attributes, eg from
+            :py:meth:`Section.to_dict`
+        :param dict course_info: (optional) the section's course's
+            attributes, eg from :py:meth:`Course.to_dict`
+        """
+        try:
+            day_mask, start, end = Schedule.section_blocks(section)
+        except ValueError:
+            day_mask, start, end = None, None, None
+        bitmap = None
+        if day_mask is not None:
+            bitmap = tuple(Schedule.section_bitmap(section))
+
+        as_string = section.get('asString')
+        if course_info is not None:
+            as_string = ' '.join([course_info.get('asString'),
+                                  section.get('component'),
+                                  section.get('section')])
+        return cls(id=section.get('class', section.get('class_')),
+                   course=section.get('course'),
+                   component=section.get('component'),
+                   section=section.get('section'),
+                   asString=as_string,
+                   autoEnroll=section.get('autoEnroll'),
+                   autoEnrollComponent=section.get('autoEnrollComponent'),
+                   dayMask=day_mask,
+                   startBlock=start,
+                   endBlock=end,
+                   bitmap=bitmap,
+                   row=section,
+                   course_info=course_info)
+
+    @classmethod
+    def coerce(cls, section):
+        """Returns section as a record, creating one if it is a dict
+        """
+        if isinstance(section, cls):
+            return section
+        return cls.from_dict(section)
+
+    @property
+    def timetable(self):
+        """The section's timetable bitmap, with every day packed into a
+        single int, or 0 if the section has no times
+        """
+        if self.bitmap is None:
+            return 0
+        return Schedule.pack_bitmap(self.bitmap)
+
+    def without_details(self):
+        """Returns a copy holding only what scheduling needs, which is
+        cheap to send to another process
+        """
+        return self._replace(row=dict(), course_info=None)
+
+    def get(self, key, default=None):
+        """dict-style access to every attribute of the section and its course
+        """
+        if key in ('class', 'class_'):
+            return self.id
+        if key in self._fields:
+            return getattr(self, key)
+        if key in self.row:
+            return self.row.get(key)
+        if self.course_info is not None:
+            return self.course_info.get(key, default)
+        return default
+
+    def to_dict(self):
+        """Returns the section merged with its course's info, as served
+        by the API, without the internal timetable columns
+        """
+        section_dict = dict(self.course_info or dict())
+        section_dict.update(self.row)
+        for column in Schedule.TIMETABLE_COLUMNS:
+            section_dict.pop(column, None)
+        section_dict['class'] = self.id
+        section_dict['class_'] = self.id
+        section_dict['asString'] = self.asString
+        if self.autoEnrollComponent is not None:
+            section_dict['autoEnrollComponent'] = self.autoEnrollComponent
+        return section_dict
+
+    def __eq__(self, other):
+        if self.id is None:
+            return self is other
+        return isinstance(other, SectionRecord) \
+           and (self.course, self.id) == (other.course, other.id)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self.id is None:
+            return id(self)
+        return hash((self.course, self.id))
+
 
 class ScheduleScorer(object):
     """Scores a schedule using a suite of scoring functions
     """
+
+    PREFERENCES = ['no-marathons', 'day-classes', 'start-early']
+    """Names of the scoring functions, which preferences weight"""
+
     def __init__(self, schedule, preferences=None):
         """Creates a new ScheduleScorer to score the given schedule
 
@@ -329,7 +659,7 @@ class ScheduleScorer(object):
         if preferences is None:
             preferences = dict()
 
-        for preference in ['no-marathons', 'day-classes', 'start-early']:
+        for preference in ScheduleScorer.PREFERENCES:
             if preference not in preferences or preferences[preference] is None:
                 preferences[preference] = 1
 
@@ -348,6 +678,109 @@ class ScheduleScorer(object):
             }
         }
 
+    @staticmethod
+    def weights(preferences=None):
+        """
+        :param dict preferences: (optional) the request's preferences
+        :returns: map from preference name to its weight, defaulting to 1
+        """
+        preferences = preferences or dict()
+        return dict((name, 1 if preferences.get(name) is None else preferences.get(name))
+                    for name in ScheduleScorer.PREFERENCES)
+
+    @staticmethod
+    def score_bitmap(bitmap, weights):
+        """Scores a timetable as :py:meth:`Schedule.overall_score` would,
+        without building a :py:class:`Schedule`
+
+        :param bitmap: one int per day, with no busy times
+        :param dict weights: as returned by :py:meth:`weights`
+        """
+        scores = ScheduleScorer.unweighted_scores(bitmap)
+        return sum(weights[name] * scores[name]
+                   for name in ScheduleScorer.PREFERENCES)
+
+    @staticmethod
+    def unweighted_scores(bitmap):
+        """Scores a timetable with every preference weighted 1, without
+        building a :py:class:`Schedule`
+
+        Gives the same scores as the scoring functions, from the
+        timetable bitmap alone. Each day's measurements are memoized,
+        since the same day bitmaps recur across many schedules.
+
+        :param bitmap: one int per day, with no busy times
+        :returns: dict from preference name to score
+        """
+        longest = 0
+        average = 0
+        night = 0
+        start = 0
+        num_starts = 0
+        for day_bitmap in bitmap:
+            scores = _day_scores_cache.get(day_bitmap) \
+                     or ScheduleScorer._day_scores(day_bitmap)
+            longest += scores[0]
+            average += scores[1]
+            night += scores[2]
+            if scores[3] is not None:
+                start += scores[3]
+                num_starts += 1
+
+        decent_sum_of_longest = 2 * 3 * 5
+        decent_average_length = 4
+        decent_early_start_block = 9*2
+        scores = {
+            'no-marathons': 0.5 * ((decent_sum_of_longest - longest)
+                                   + (decent_average_length - average / len(bitmap))),
+            'day-classes': 1.5 * (0 - 1.0 * night / len(bitmap)),
+            'start-early': 0
+        }
+        if num_starts:
+            scores['start-early'] = decent_early_start_block - 1.0 * start / num_starts
+        return scores
+
+    @staticmethod
+    def _day_scores(day_bitmap):
+        """
+        :returns: (longest session, average session, night blocks, start
+            block) of a day, as measured by the scoring functions
+        """
+        scores = _day_scores_cache.get(day_bitmap)
+        if scores is not None:
+            return scores
+        blocks = [day_bitmap >> (Schedule.NUM_BLOCKS - 1 - block) & 1
+                  for block in range(Schedule.NUM_BLOCKS)]
+
+        longest = 0
+        remaining = day_bitmap
+        while remaining:
+            remaining &= remaining << 1
+            longest += 1
+
+        session_length = 0
+        session_lengths = 0
+        num_sessions = 0
+        for block in blocks:
+            if block:
+                session_length += 1
+            else:
+                session_lengths += session_length
+                num_sessions += 1
+                session_length = 0
+        average = (1.0 * session_lengths) / num_sessions if num_sessions else 0.0
+
+        night_zone = int('111111111111111100000000000000000011111111111111', 2)
+        night = bin(day_bitmap & night_zone).count('1')
+
+        start = blocks.index(1) if 1 in blocks else None
+
+        scores = (longest, average, night, start)
+        if len(_day_scores_cache) >= _DAY_SCORES_CACHE_SIZE:
+            _day_scores_cache.clear()
+        _day_scores_cache[day_bitmap] = scores
+        return scores
+
     def read(self, name='all'):
         """Returns a particular score, or all scores
 
@@ -498,34 +931,3 @@ class ScheduleScorer(object):
         score += _decent_early_start_block - avg_start_block
 
         return score
-
-# http://bytes.com/topic/python/answers/552476-why-cant-you-pickle-instancemethods#edit2155350
-def _pickle_method(method):
-    """Allow pickling of Schedule object
-
-    This is necessary for multiprocessing.Queue.put() and
-    multiprocessing.Queue.get()
-    """
-    func_name = method.im_func.__name__
-    obj = method.im_self
-    cls = method.im_class
-    return _unpickle_method, (func_name, obj, cls)
-
-def _unpickle_method(func_name, obj, cls):
-    """Allow pickling of Schedule object
-
-    This is necessary for multiprocessing.Queue.put() and
-    multiprocessing.Queue.get()
-    """
-    for cls in cls.mro():
-        try:
-            func = cls.__dict__[func_name]
-        except KeyError:
-            pass
-        else:
-            break
-    return func.__get__(obj, cls)
-
-import copy_reg
-import types
-copy_reg.pickle(types.MethodType, _pickle_method, _unpickle_method)
@@ -1,176 +1,737 @@
+import copy
+import functools
 import collections
-import pycosat
-import itertools
 
-from classtime.logging import logging
+from classtime.logging import logging, lazy
 logging = logging.getLogger(__name__) # pylint: disable=C0103
 
 import classtime
 
-from classtime.brain.scheduling.schedule import Schedule
+from classtime.brain.scheduling.schedule import Schedule, SectionRecord
+from classtime.brain.scheduling.conflict_index import ConflictIndex
+from classtime.brain.scheduling.cnf import CNF
+from classtime.brain.scheduling import solver_pool, counting, feasibility, constraints, electives
+from classtime.brain.scheduling.budget import Budget
+from classtime.brain.scheduling.topk import TopSchedules
 
 
-def find_schedules(schedule_params, num_requested):
+def find_schedules(schedule_params, num_requested, budget=None):
     """
     :param dict schedule_params: parameters to build the schedule with.
         Check :ref:`api/generate-schedules <api-generate-schedules>`
         for available parameters.
+    :param Budget budget: (optional) limits on the work done for this
+        request. Defaults to the configured limits, tightened by the
+        request's "budget" parameter. Check ``budget.truncated``
+        afterwards to find out whether generation was cut short.
     """
     logging.info('Received schedule request')
 
+    cal = _calendar(schedule_params)
+    if budget is None:
+        budget = Budget.from_config(classtime.app.config,
+                                    schedule_params.get('budget'))
+    top = candidate_pool(schedule_params, num_requested)
+    for score, bitmaps, sections in find_candidates(schedule_params, budget, cal, top.size):
+        top.push(score, bitmaps, sections)
+        budget.add_solution()
+        if budget.exhausted(top):
+            logging.info('Stopped generating schedules, reached {} budget'.format(
+                budget.exhausted_by))
+            break
+    schedules = best_schedules(cal, top, num_requested, schedule_params)
+
+    if not schedules:
+        logging.error(lazy('No schedules found for q={}',
+            schedule_params))
+    else:
+        logging.info(lazy('Returning {}/{} schedules from request q={}',
+            len(schedules),
+            budget.num_solutions,
+            schedule_params))
+        debug_msg = 'Request q={q}\n' + \
+                    'Response: Returning {ret} schedules\n' + \
+                    '          including {ret_like} more like them\n' + \
+                    '          out of {tot} total generated\n' + \
+                    'Returning:\n{ret_schedules}'
+        logging.debug(lazy(debug_msg,
+            q=schedule_params,
+            ret=len(schedules),
+            ret_like=lambda: sum([len(s.more_like_this)
+                                  for s in schedules]),
+            tot=budget.num_solutions,
+            ret_schedules=lambda: schedules))
+    return schedules
+
+
+def find_candidates(schedule_params, budget, cal=None, top_size=None, course_sections=None,
+                    conflicts=None):
+    """Lazily generates every schedule of a request, unranked
+
+    Nothing is generated if the required courses can never be
+    scheduled, as found by :py:func:`feasibility.quick_conflicts`.
+    The caller decides when to stop, usually with
+    :py:meth:`Budget.exhausted`.
+
+    :param dict schedule_params: parameters to build the schedule with
+    :param Budget budget: limits on the work done
+    :param AcademicCalendar cal: (optional) calendar of the request's
+        institution, if the caller already has one
+    :param int top_size: (optional) number of the best distinct layouts
+        the caller keeps. With a solver pool, each piece of work only
+        sends back that many. None sends back every candidate.
+    :param dict course_sections: (optional) map from course id to its
+        sections. Only courses missing from it are loaded, and they are
+        added to it, so that the caller can reuse them.
+    :param list conflicts: (optional) extended with the conflicts
+        found by :py:func:`feasibility.quick_conflicts`
+    :returns: iterator over (score, timetable bitmaps, sections)
+    """
+    cal, term, course_ids, busy_mask, max_days, locked, electives_groups, preferences = \
+        _parse_schedule_params(schedule_params, cal)
+    if course_sections is None:
+        course_sections = dict()
+
+    core_sections = _core_sections(cal, term, course_ids, locked, course_sections)
+    found = feasibility.quick_conflicts(core_sections, busy_mask, max_days)
+    if conflicts is not None:
+        conflicts.extend(found)
+    if found:
+        logging.info(lazy('No schedules possible for q={}: {}',
+            schedule_params,
+            lambda: '; '.join(conflict['message'] for conflict in found)))
+        return
+
+    for candidate in _generate_candidates(cal, term, course_ids, busy_mask, max_days, locked,
+                                          electives_groups, preferences, budget, top_size,
+                                          course_sections):
+        yield candidate
+
+
+def candidate_pool(schedule_params, num_requested):
+    """
+    :returns: an empty :py:class:`TopSchedules`, large enough to choose
+        num_requested schedules from with the request's diversity
+    """
+    pool_size = num_requested
+    if _diversity(schedule_params) > 0:
+        pool_size = num_requested * classtime.app.config.get('SCHEDULER_DIVERSITY_POOL', 1)
+    return TopSchedules(pool_size)
+
+
+def best_schedules(cal, top, num_requested, schedule_params):
+    """Chooses the schedules to return from a pool of candidates
+
+    :param AcademicCalendar cal: calendar of the request's institution
+    :param TopSchedules top: the candidates
+    :returns: list of :py:class:`Schedule`
+    """
+    best = top.diverse(num_requested, _diversity(schedule_params))
+    return _build_schedules(cal, best, dict(schedule_params.get('preferences') or dict()))
+
+
+def count_schedules(schedule_params, budget=None, cal=None, course_sections=None):
+    """Counts every valid schedule for a request, without generating them
+
+    :param dict schedule_params: parameters to build the schedule with.
+        Check :ref:`api/generate-schedules <api-generate-schedules>`
+        for available parameters.
+    :param Budget budget: (optional) only its time limit is used, and
+        its deadline is kept. Defaults to SCHEDULER_TIME_BUDGET.
+    :param AcademicCalendar cal: (optional) calendar of the request's
+        institution, if the caller already has one
+    :param dict course_sections: (optional) sections already loaded, as
+        for :py:func:`find_candidates`
+    :returns: the number of schedules, or None if the time limit was
+        reached first
+    """
+    if budget is None:
+        budget = Budget(seconds=classtime.app.config.get('SCHEDULER_TIME_BUDGET'))
+    count_budget = budget.time_limit()
+    if count_budget.out_of_time():
+        logging.info('No time left to count schedules')
+        return None
+    cal, term, course_ids, busy_mask, max_days, locked, electives_groups, _ = \
+        _parse_schedule_params(schedule_params, cal)
+
+    total = 0
+    for sections, no_schedules in _elective_combination_sections(cal, term, course_ids, locked,
+                                                                 electives_groups, count_budget,
+                                                                 busy_mask, max_days,
+                                                                 course_sections):
+        sections = _prune_busy_sections([SectionRecord.coerce(section)
+                                         for section in sections],
+                                        busy_mask, max_days)
+        if sections is None:
+            no_schedules()
+            continue
+        num_schedules = counting.count_schedules(sections, count_budget, max_days)
+        if num_schedules is None:
+            break
+        if num_schedules == 0:
+            no_schedules()
+        total += num_schedules
+    if count_budget.truncated:
+        logging.info('Ran out of time counting schedules')
+        return None
+    return total
+
+
+def explain_infeasible(schedule_params, budget=None, cal=None, course_sections=None,
+                       conflicts=None):
+    """Explains why a request has no schedules
+
+    Conflicts visible from timetables alone are found first. Otherwise,
+    the required courses are shrunk to a minimal set which still has no
+    schedule. If the required courses do have schedules, the electives
+    are to blame.
+
+    :param dict schedule_params: parameters to build the schedule with.
+        Check :ref:`api/generate-schedules <api-generate-schedules>`
+        for available parameters.
+    :param Budget budget: (optional) only its time limit is used, and
+        its deadline is kept. Defaults to SCHEDULER_TIME_BUDGET.
+    :param AcademicCalendar cal: (optional) calendar of the request's
+        institution, if the caller already has one
+    :param dict course_sections: (optional) sections already loaded, as
+        for :py:func:`find_candidates`
+    :param list conflicts: (optional) the conflicts already found by
+        :py:func:`find_candidates`, if it was run. They are not looked
+        for again.
+    :returns: list of conflicts, as described in
+        :py:mod:`classtime.brain.scheduling.feasibility`. Empty if no
+        reason was found.
+    """
+    if budget is None:
+        budget = Budget(seconds=classtime.app.config.get('SCHEDULER_TIME_BUDGET'))
+    explain_budget = budget.time_limit()
+    if explain_budget.out_of_time():
+        logging.info('No time left to explain why there are no schedules')
+        return list()
+    cal, term, course_ids, busy_mask, max_days, locked, electives_groups, _ = \
+        _parse_schedule_params(schedule_params, cal)
+
+    sections = _core_sections(cal, term, course_ids, locked, course_sections)
+    if conflicts is None:
+        conflicts = feasibility.quick_conflicts(sections, busy_mask, max_days)
+    if conflicts:
+        return conflicts
+    sections = _prune_busy_sections(sections, busy_mask, max_days)
+    satisfiable = lambda sections: _satisfiable(sections, max_days)
+    conflicts = feasibility.minimal_conflict(sections, satisfiable, explain_budget)
+    if conflicts or not electives_groups:
+        return conflicts
+    return [feasibility.conflict('electives', list(),
+        'No combination of electives fits with the required courses')]
+
+
+def _satisfiable(sections, max_days=None):
+    _, to_index = _build_section_index(sections)
+    return _encode(sections, to_index, max_days).satisfiable()
+
+
+def _calendar(schedule_params):
+    return classtime.brain.get_calendar(schedule_params.get('institution', 'ualberta'))
+
+
+def _parse_schedule_params(schedule_params, cal=None):
+    """
+    :param AcademicCalendar cal: (optional) calendar to use, instead of
+        getting the request institution's
+    :returns: (calendar, term, course ids, busy mask, max days, locked
+        section ids, electives groups, preferences). Hard constraints
+        are compiled into the busy mask and max days.
+    """
     if 'term' not in schedule_params:
         logging.error("Schedule generation call did not specify <term>")
     term = schedule_params.get('term', '')
-    institution = schedule_params.get('institution', 'ualberta')
-    cal = classtime.brain.get_calendar(institution)
+    if cal is None:
+        cal = _calendar(schedule_params)
 
     if 'courses' not in schedule_params:
         logging.error("Schedule generation call did not specify <courses>")
     course_ids = schedule_params.get('courses', list())
-    busy_times = schedule_params.get('busy-times', list())
     preferences = schedule_params.get('preferences', dict())
     electives_groups = schedule_params.get('electives', list())
     for electives_group in electives_groups:
         if 'courses' not in electives_group:
             logging.warning('"courses" not found for electives. q={}'.format(
                 schedule_params))
+    busy_mask, max_days, locked = constraints.request_constraints(schedule_params)
+    return cal, term, course_ids, busy_mask, max_days, locked, electives_groups, preferences
 
-    schedules = _generate_schedules_sat(cal, term, course_ids, busy_times, electives_groups, preferences)
-    schedules = _condense_schedules(cal, schedules)
-    schedules = sorted(schedules,
-                       reverse=True,
-                       key=lambda s: s.overall_score())
-    if not schedules:
-        logging.error('No schedules found for q={}'.format(
-            schedule_params))
-    else:
-        logging.info('Returning {}/{} schedules from request q={}'.format(
-            min(num_requested, len(schedules)),
-            len(schedules),
-            schedule_params))
-        debug_msg = 'Request q={q}\n' + \
-                    'Response: Returning {ret} schedules\n' + \
-                    '          including {ret_like} more like them\n' + \
-                    '          out of {tot} total generated\n' + \
-                    'Returning:\n{ret_schedules}'
-        logging.debug(debug_msg.format(
-            q=schedule_params,
-            ret=min(num_requested,
-                len(schedules)),
-            ret_like=sum([len(s.more_like_this)
-                          for s in schedules[:num_requested]]),
-            tot=len(schedules) + sum([len(s.more_like_this)
-                                     for s in schedules]),
-            ret_schedules=schedules[:num_requested]))
-    return schedules[:num_requested]
-
-
-def _generate_schedules_sat(cal, term, course_ids, busy_times, electives_groups, preferences):
-    schedules = []
-    core_sections = [section
-                     for course in cal.course_components(term, course_ids)
-                     for component in course
-                     for section in component]
-    elective_group_course_ids = [eg.get('courses') for eg in electives_groups]
-    for elective_course_ids in itertools.product(*elective_group_course_ids):
-        sections = core_sections + [
-            section
-            for course in cal.course_components(term, elective_course_ids)
-            for component in course
-            for section in component
-        ]
-        schedules += _generate_schedules_sat_from_sections(sections, busy_times, preferences)
+
+def _diversity(schedule_params):
+    """
+    :returns: the request's "diversity", or the configured default if it
+        is missing or invalid
+    """
+    default = classtime.app.config.get('SCHEDULER_DIVERSITY', 0.0)
+    diversity = schedule_params.get('diversity')
+    if diversity is None:
+        return default
+    try:
+        diversity = float(diversity)
+    except (ValueError, TypeError):
+        diversity = -1
+    if not 0 <= diversity <= 1:
+        logging.warning('Invalid diversity <{}>, using {}'.format(
+            schedule_params.get('diversity'), default))
+        return default
+    return diversity
+
+
+def _build_schedules(cal, best, preferences):
+    """Builds :py:class:`Schedule` objects for the kept layouts
+
+    Each schedule is saved under its hash identifier, so it can be
+    looked up later. Duplicates are only saved once they are looked up.
+
+    :param list best: list of (score, sections, duplicate section lists),
+        as returned by :py:meth:`TopSchedules.diverse`
+    """
+    schedules = [Schedule(sections=sections, preferences=preferences)
+                 for _, sections, _ in best]
+    duplicates = [Schedule(sections=duplicate)
+                  for _, _, duplicate_sections in best
+                  for duplicate in duplicate_sections]
+    for schedule, identifier in zip(schedules, cal.get_schedule_identifiers(schedules)):
+        schedule.identifier = identifier
+    identifiers = iter(cal.get_schedule_identifiers(duplicates, save=False))
+    for schedule, (_, _, duplicate_sections) in zip(schedules, best):
+        schedule.more_like_this = [next(identifiers) for _ in duplicate_sections]
     return schedules
 
 
-def _generate_schedules_sat_from_sections(sections, busy_times, preferences):
-    clauses = []
+def _generate_candidates(cal, term, course_ids, busy_mask, max_days, locked, electives_groups,
+                         preferences, budget, top_size=None, course_sections=None):
+    """Lazily generates (score, timetable bitmaps, sections) for
+    every solution of every elective combination
+    """
+    section_lists = _elective_combination_sections(cal, term, course_ids, locked,
+                                                   electives_groups, budget,
+                                                   busy_mask, max_days, course_sections)
+    processes = classtime.app.config.get('SCHEDULER_PROCESSES', 1)
+    if processes > 1:
+        candidates = _generate_candidates_parallel(section_lists, busy_mask, max_days,
+                                                   preferences, budget, processes, top_size)
+        for candidate in candidates:
+            yield candidate
+        return
+    for sections, no_schedules in section_lists:
+        found = False
+        for candidate in _generate_candidates_from_sections(sections, busy_mask, max_days,
+                                                            preferences, budget):
+            found = True
+            yield candidate
+        if not found and not budget.out_of_time():
+            no_schedules()
+
+
+def _elective_combination_sections(cal, term, course_ids, locked, electives_groups, budget,
+                                   busy_mask=None, max_days=None, course_sections=None):
+    """Lazily generates one list of sections for each combination of electives,
+    until the budget's combination or time limit is reached
+
+    Combinations are tried in order of their electives' conflicts with
+    the required courses, fewest first. Each list of sections comes with
+    a function, which the caller calls if the sections have no schedule.
+    Its electives, and pairs of them, are then checked against the
+    required courses, and later combinations containing one which cannot
+    be scheduled with the required courses are skipped.
+
+    :param dict course_sections: (optional) sections already loaded, as
+        for :py:func:`find_candidates`
+    :returns: iterator over (sections, function taking no arguments)
+    """
+    if course_sections is None:
+        course_sections = dict()
+    core_sections = _core_sections(cal, term, course_ids, locked, course_sections)
+    if not electives_groups:
+        yield core_sections, lambda: None
+        return
+
+    def _sections(elective_course_ids):
+        return core_sections + _core_sections(cal, term, elective_course_ids, locked,
+                                              course_sections)
+
+    def _satisfiable_with_core(elective_course_ids):
+        sections = _prune_busy_sections(_sections(elective_course_ids), busy_mask, max_days)
+        return sections is not None and _satisfiable(sections, max_days)
+
+    core_index = ConflictIndex(core_sections)
+    def _conflicts_with_core(course_id):
+        sections = _sections([course_id])[len(core_sections):]
+        key = len(core_sections)
+        num_conflicts = 0
+        for section in sections:
+            core_index.add(key, section)
+            num_conflicts += len(core_index.overlapping(key))
+        core_index.remove(key)
+        return float(num_conflicts) / max(len(sections), 1)
+
+    infeasible = electives.InfeasibleSubsets(_satisfiable_with_core)
+    elective_group_course_ids = [eg.get('courses') or list() for eg in electives_groups]
+    num_combinations = 0
+    num_skipped = 0
+    for elective_course_ids in electives.by_promise(elective_group_course_ids,
+                                                    _conflicts_with_core):
+        if budget.max_combinations is not None \
+        and num_combinations >= budget.max_combinations:
+            budget.truncate('combinations')
+            break
+        if budget.out_of_time():
+            break
+        if infeasible.contains_infeasible(elective_course_ids):
+            num_skipped += 1
+            continue
+        num_combinations += 1
+        yield (_sections(elective_course_ids),
+               functools.partial(infeasible.learn, elective_course_ids))
+    logging.debug(lazy('Skipped {} combinations of electives, since {} electives '
+                       'or pairs of electives cannot be scheduled',
+        num_skipped, lambda: len(infeasible)))
+
+
+def _core_sections(cal, term, course_ids, locked=None, course_sections=None):
+    """
+    :param set locked: (optional) ids of locked sections. Only the
+        locked section of their components is kept.
+    :param dict course_sections: (optional) map from course id to its
+        sections. Only courses missing from it are loaded, and they are
+        added to it.
+    """
+    if course_sections is None:
+        course_sections = dict()
+    missing = [course_id for course_id in collections.OrderedDict.fromkeys(course_ids)
+               if course_id not in course_sections]
+    if missing:
+        for course_id, course in zip(missing, cal.course_components(term, missing)):
+            course_sections[course_id] = _locked_sections(
+                [SectionRecord.coerce(section)
+                 for component in course
+                 for section in component],
+                locked)
+    return [section
+            for course_id in course_ids
+            for section in course_sections[course_id]]
+
+
+def _locked_sections(sections, locked):
+    """
+    :returns: the sections, keeping only the locked section of
+        components with a locked section
+    """
+    if not locked:
+        return sections
+    locked_components = set((section.course, section.component)
+                            for section in sections
+                            if section.id in locked)
+    return [section for section in sections
+            if section.id in locked
+            or (section.course, section.component) not in locked_components]
+
+
+def _generate_candidates_from_sections(sections, busy_mask, max_days, preferences, budget):
+    return to_candidates(_generate_schedules_sat_from_sections(sections, busy_mask, preferences,
+                                                               budget, max_days))
+
+
+def to_candidates(schedules):
+    """
+    :param schedules: iterator over :py:class:`Schedule`
+    :returns: iterator over (score, timetable bitmaps, sections)
+    """
+    for schedule in schedules:
+        yield (schedule.overall_score(),
+               tuple(schedule.timetable_bitmap),
+               schedule.sections)
+
+
+def _generate_candidates_parallel(section_lists, busy_mask, max_days, preferences, budget,
+                                  processes, top_size=None):
+    """Solves the elective combinations across a pool of worker processes
+
+    Workers are sent sections without their details, and send back only
+    scores, timetable bitmaps and section indices, which are mapped back
+    onto this process's sections. Each piece of work keeps only its
+    top_size best layouts. When a combination is split into pieces, its
+    max_iterations is split between them, so the pool never enumerates
+    more of a combination than serial solving would. Once the caller
+    stops, the outstanding pieces are cancelled.
+
+    :param section_lists: iterator over (sections, function to call if
+        they have no schedule), as generated by
+        :py:func:`_elective_combination_sections`. It is only read as
+        far as the pool has room for more work.
+    """
+    no_schedules_calls = collections.deque()
+    def _section_lists():
+        for sections, no_schedules in section_lists:
+            no_schedules_calls.append(no_schedules)
+            yield sections
+
+    def _tasks():
+        for pieces in solver_pool.partition_combinations(_section_lists(), processes):
+            no_schedules = no_schedules_calls.popleft()
+            limits = solver_pool.split_limit(budget.max_iterations, len(pieces))
+            combination = _Combination(len(pieces) - limits.count(0), no_schedules)
+            if 0 in limits:
+                budget.truncate('iterations')
+                combination.truncated = True
+            for sections, max_iterations in zip(pieces, limits):
+                if max_iterations == 0:
+                    continue
+                piece_budget = copy.copy(budget)
+                piece_budget.max_iterations = max_iterations
+                slim_sections = [SectionRecord.coerce(section).without_details()
+                                 for section in sections]
+                yield (sections, combination), (slim_sections, busy_mask, max_days,
+                                                 preferences, piece_budget, top_size)
+
+    tasks = _tasks()
+    try:
+        results = solver_pool.solve(_solve_partition, tasks, processes)
+    except Exception as e: # pylint: disable=W0703
+        logging.error('Solver pool unavailable, solving serially: {}'.format(e))
+        results = None
+    try:
+        for (sections, combination), task, result in results or ((key, task, None)
+                                                                 for key, task in tasks):
+            try:
+                if result is None:
+                    compact_results, truncated = _solve_partition(task)
+                else:
+                    compact_results, truncated = result.get()
+            except Exception as e: # pylint: disable=W0703
+                logging.error('Solver pool failed, solving serially: {}'.format(e))
+                compact_results, truncated = _solve_partition(task)
+            if truncated:
+                budget.truncate('worker')
+            combination.solved(bool(compact_results), truncated)
+            for score, bitmaps, indices in compact_results:
+                yield score, bitmaps, [sections[i] for i in indices]
+    finally:
+        if results is not None:
+            results.cancel()
+
+
+class _Combination(object):
+    """Tracks the pieces of an elective combination solved by the pool,
+    to find out whether the combination has no schedule
+    """
+
+    def __init__(self, num_pieces, no_schedules):
+        """
+        :param int num_pieces: number of pieces sent to the pool
+        :param function no_schedules: called once every piece was solved
+            to completion without any schedule
+        """
+        self.num_pieces = num_pieces
+        self.found = False
+        self.truncated = False
+        self.no_schedules = no_schedules
+
+    def solved(self, found, truncated):
+        """Records a solved piece
+
+        :param bool found: whether the piece had any schedule
+        :param bool truncated: whether the piece's search was cut short
+        """
+        self.num_pieces -= 1
+        self.found = self.found or found
+        self.truncated = self.truncated or truncated
+        if self.num_pieces == 0 and not self.found and not self.truncated:
+            self.no_schedules()
+
+
+def _solve_partition(task, ticket=None):
+    """Worker process entry point for the solver pool
+
+    :param tuple task: (sections, busy_mask, max_days, preferences,
+        budget, top_size)
+    :param int ticket: (optional) the task's ticket in the solver pool.
+        Solving stops once it is cancelled.
+    :returns: (list of (score, timetable bitmaps, section indices) of
+        the top_size best layouts and their duplicates, whether the
+        search was cut short)
+    """
+    sections, busy_mask, max_days, preferences, budget, top_size = task
+    sections = [SectionRecord.coerce(section) for section in sections]
+    position = dict((id(section), i) for i, section in enumerate(sections))
+    top = TopSchedules(top_size)
+    if solver_pool.cancelled(ticket) or budget.out_of_time():
+        return list(), True
+    for score, bitmaps, schedule_sections in _generate_candidates_from_sections(
+            sections, busy_mask, max_days, preferences, budget):
+        indices = [position[id(section)] for section in schedule_sections]
+        top.push(score, bitmaps, (bitmaps, indices))
+        if solver_pool.cancelled(ticket):
+            budget.truncate('cancelled')
+            break
+    compact_results = [(score, bitmaps, indices)
+                       for score, item, duplicates in top.best()
+                       for bitmaps, indices in [item] + duplicates]
+    return compact_results, budget.truncated
+
+
+def _generate_schedules_sat_from_sections(sections, busy_mask, preferences, budget,
+                                          max_days=None):
+    """Lazily generates every schedule of the given sections
+
+    :param list sections: every section of every component to schedule
+    :param tuple busy_mask: (optional) busy times, compiled by
+        :py:meth:`Schedule.busy_mask`
+    :param int max_days: (optional) most days a schedule can have
+        classes on
+    """
+    sections = [SectionRecord.coerce(section) for section in sections]
+    sections = _prune_busy_sections(sections, busy_mask, max_days)
+    if sections is None:
+        return
 
     # Map from input domain to SAT domain
     # - input domain: course sections
     # - SAT domain: integers
-    from_index, from_string, to_index = _build_section_index(sections)
-
-    # Constraint: Must schedule one section for each core component
-    core_clauses = collections.defaultdict(list)
-    for core_section in sections:
-        index = to_index[core_section.get('asString')]
-        core_clauses[core_section.get('course') + core_section.get('component')].append(index)
-    clauses += [v for k, v in core_clauses.iteritems()]
-
-    # Constraint: Must not schedule conflicting sections together
-    # Note: sections in the same component conflict
-    # Note: recall (A' + B') == (AB)'
-    conflict_clauses = []
-    for a, b in _get_conflicts(sections, busy_times):
-        if a.get('asString') != b.get('asString'):
-            conflict_clauses.append([-1 * to_index[a.get('asString')],
-                                     -1 * to_index[b.get('asString')]])
-        else:
-            conflict_clauses.append([-1 * to_index[a.get('asString')]])
-    clauses += conflict_clauses
-
-    # Solve the SAT problem and map back to input domain from SAT domain
-    schedules = []
-    for solution in pycosat.itersolve(clauses):
-        sections = [from_index[i] for i in solution
-                    if i > 0]
-        schedules.append(Schedule(sections=sections,
-                                  preferences=preferences))
-        if len(schedules) > 100:
+    from_index, to_index = _build_section_index(sections)
+    cnf = _encode(sections, to_index, max_days)
+    logging.debug(lazy('Encoded {} sections as {} clauses over {} variables',
+        len(sections), len(cnf), cnf.num_vars))
+    if budget.max_clauses is not None \
+    and len(cnf) > budget.max_clauses:
+        budget.truncate('clauses')
+        return
+    if budget.out_of_time():
+        return
+
+    # Solve the SAT problem and map back to input domain from SAT domain.
+    # Each solution is a distinct set of sections
+    solutions = cnf.iter_projected(len(sections))
+    for num_solutions, solution in enumerate(solutions, 1):
+        yield Schedule(sections=[from_index[i] for i in solution],
+                       preferences=preferences)
+        if budget.max_iterations is not None \
+        and num_solutions >= budget.max_iterations:
+            budget.truncate('iterations')
+            budget.defer(Schedule(sections=[from_index[i] for i in rest],
+                                  preferences=preferences)
+                         for rest in solutions)
             break
-    return schedules
+        if budget.out_of_time():
+            break
+
+
+def _prune_busy_sections(sections, busy_mask, max_days=None):
+    """Removes the sections which overlap busy times, or are on more
+    than max_days days
+
+    :returns: the remaining sections, or None if every section of some
+        component was removed
+    """
+    busy = busy_mask and any(busy_mask)
+    if not busy and max_days is None:
+        return sections
+    components = set((section.course, section.component) for section in sections)
+    sections = [section for section in sections
+                if section.bitmap is None
+                or not (busy and Schedule.bitmaps_overlap(section.bitmap, busy_mask))
+                and not (max_days is not None
+                         and constraints.num_days(section.dayMask) > max_days)]
+    if len(components) > len(set((section.course, section.component)
+                                 for section in sections)):
+        logging.debug('Every section of some component overlaps busy times or constraints')
+        return None
+    return sections
 
 
 def _build_section_index(components):
     from_index = {}
-    from_string = {}
     to_index = {}
     for index, section in enumerate(components, 1):
         from_index[index] = section
-        from_string[section.get('asString')] = section
-        to_index[section.get('asString')] = index
-        index += 1
-    return from_index, from_string, to_index
-
-
-def _get_conflicts(components, busy_times):
-    conflicts = []
-    for i, a in enumerate(components, 1):
-        for j, b in enumerate(components, 1):
-            if j <= i:
-                continue
-            if _conflicts(a, b, busy_times):
-                conflicts.append([a,b])
-    return conflicts
-
-
-def _conflicts(section_a, section_b, busy_times):
-    if section_a.get('course') == section_b.get('course') and \
-       section_a.get('component') == section_b.get('component'):
-        return True
-    schedule = Schedule(busy_times=busy_times)
-    if schedule.conflicts(section_a):
-        return True
-    schedule.add_section(section_a)
-    if schedule.conflicts(section_b):
-        return True
-    return False
-
-
-def _condense_schedules(cal, schedules):
-    schedules = sorted(schedules,
-                       key=lambda s: (s.overall_score(), s.timetable_bitmap))
-    lag, lead = 0, 1
-    condensed_indices = list()
-    while lead < len(schedules):
-        schedule, lead_schedule = schedules[lag], schedules[lead]
-        if schedule.is_similar(lead_schedule):
-            more_like_this_id = cal.get_schedule_identifier(lead_schedule)
-            schedule.more_like_this.append(more_like_this_id)
-            condensed_indices.append(lead)
-        else:
-            lag = lead
-        lead += 1
-    return [s for i, s in enumerate(schedules)
-            if i not in condensed_indices]
+        to_index[section.asString] = index
+    return from_index, to_index
+
+
+def _dependency_clauses(sections, to_index):
+    """Encodes autoEnroll dependencies, which only apply within a course
+
+    Each section which autoEnrolls is resolved once against an index of
+    its course's components, giving the sections it permits. Since exactly
+    one section of that component is scheduled, requiring one of the
+    permitted sections forbids every other.
+
+    :returns: list of clauses
+    """
+    by_component = collections.defaultdict(list)
+    for section in sections:
+        by_component[(section.course, section.component)].append(section)
+
+    clauses = []
+    for dependent in sections:
+        if dependent.autoEnroll is None \
+        or dependent.autoEnrollComponent == dependent.component:
+            continue
+        others = by_component.get((dependent.course, dependent.autoEnrollComponent))
+        if not others:
+            continue
+        permitted = [to_index[other.asString]
+                     for other in others
+                     if Schedule.dependency_permits(dependent, other)
+                     and Schedule.dependency_permits(other, dependent)]
+        clauses.append([-1 * to_index[dependent.asString]] + permitted)
+    return clauses
+
+
+def _encode(sections, to_index, max_days=None):
+    """Encodes the constraints on which sections can be scheduled together
+
+    :param int max_days: (optional) most days a schedule can have
+        classes on
+    :returns: :py:class:`CNF` whose first variables are the sections
+    """
+    cnf = CNF(num_vars=len(sections))
+
+    # Constraint: Must schedule exactly one section for each component
+    components = collections.OrderedDict()
+    for section in sections:
+        components.setdefault((section.course, section.component), list()) \
+                  .append(to_index[section.asString])
+    for literals in components.itervalues():
+        cnf.exactly_one(literals)
+
+    # Constraint: Sections which autoEnroll require a permitted section
+    # of the component they autoEnroll in
+    for clause in _dependency_clauses(sections, to_index):
+        cnf.add(clause)
+
+    # Constraint: Must schedule at most one section in each block
+    for keys in ConflictIndex(sections).overlapping_groups():
+        cnf.at_most_one([to_index[sections[key].asString] for key in keys])
+
+    # Constraint: Must schedule classes on at most max_days days
+    if max_days is not None:
+        cnf.at_most(_day_vars(cnf, sections, to_index), max_days)
+    return cnf
+
+
+def _day_vars(cnf, sections, to_index):
+    """Adds one variable per day, true exactly when any section on that
+    day is scheduled
+
+    :returns: list of the day variables, leaving out days with no sections
+    """
+    day_vars = list()
+    for day in range(Schedule.NUM_DAYS):
+        on_day = [to_index[section.asString]
+                  for section in sections
+                  if section.dayMask is not None
+                  and section.dayMask & (1 << day)]
+        if not on_day:
+            continue
+        day_var = cnf.new_var()
+        for literal in on_day:
+            cnf.add([-literal, day_var])
+        cnf.add([-day_var] + on_day)
+        day_vars.append(day_var)
+    return day_vars
@@ -0,0 +1,297 @@
+"""Refinement sessions, which keep a solved request for follow-up edits
+
+Users tweak a request one step at a time: lock a section, add a busy
+time, change a preference's weight. A session keeps the candidates
+generated for the request, so most edits only filter or rescore them:
+
+- busy times, constraints and locked sections which only rule more
+  schedules out filter the candidates
+- preferences rescore the candidates. Each score is a weighted sum of
+  scores which only depend on the timetable, so those are measured once
+  per timetable, and only the weighted sums are redone
+- diversity only changes which candidates are returned
+
+The request is only solved again when an edit could allow schedules
+which were never generated, when the courses change, or when too few
+candidates are left and generation had been cut short.
+
+Sessions are kept in-process by a :py:class:`SessionStore`, which
+expires them after SCHEDULER_SESSION_TTL seconds unused, and holds at
+most SCHEDULER_MAX_SESSIONS.
+"""
+import time
+import uuid
+import threading
+import collections
+
+from classtime.logging import logging, lazy
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+import classtime
+import classtime.brain
+
+from classtime.brain.scheduling import schedule_generator, constraints
+from classtime.brain.scheduling.schedule import Schedule, ScheduleScorer, SectionRecord
+from classtime.brain.scheduling.budget import Budget
+
+SOLVED_PARAMS = ['institution', 'term', 'courses', 'electives', 'budget']
+"""Parameters which need the request to be solved again when changed"""
+
+
+class Candidate(collections.namedtuple('Candidate', [
+        'sections', 'bitmaps', 'timetable', 'days', 'section_ids'])):
+    """A generated schedule, with what filtering it needs precomputed
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, bitmaps, sections):
+        return cls(sections=sections,
+                   bitmaps=bitmaps,
+                   timetable=Schedule.pack_bitmap(bitmaps),
+                   days=constraints.num_days(sum(1 << day
+                                                 for day, bitmap in enumerate(bitmaps)
+                                                 if bitmap)),
+                   section_ids=frozenset(section.id for section in sections))
+
+
+class RefinementSession(object):
+    """A request, with every candidate schedule generated for it
+    """
+
+    def __init__(self, schedule_params, num_requested):
+        """Solves the request
+
+        :param dict schedule_params: parameters to build the schedule with.
+            Check :ref:`api/generate-schedules <api-generate-schedules>`
+            for available parameters.
+        :param int num_requested: number of schedules to return
+        """
+        self.params = dict(schedule_params)
+        self.num_requested = num_requested
+        self.num_solves = 0
+        self.truncated = False
+        self._cal = None
+        self._cal_institution = None
+        self._candidates = list()
+        self._scores = list()
+        self._scored_with = None
+        self._unweighted_scores = dict()
+        """Map from packed timetable to its score for each preference"""
+        self._solved_with = None
+        self._section_ids = frozenset()
+        """Ids of every section of the request's courses and electives"""
+        self._complete = False
+        self._lock = threading.Lock()
+        self._solve()
+
+    def update(self, changes):
+        """Applies edits to the request
+
+        :param dict changes: parameters to replace. A parameter set to
+            None is removed.
+        """
+        with self._lock:
+            params = dict(self.params)
+            for name, value in changes.iteritems():
+                if value is None:
+                    params.pop(name, None)
+                else:
+                    params[name] = value
+            resolve = any(params.get(name) != self.params.get(name)
+                          for name in SOLVED_PARAMS)
+            self.params = params
+
+            if resolve or not self._narrows(self._request_constraints()):
+                self._solve()
+                return
+            if self._preferences() != self._scored_with:
+                self._rescore()
+            if len(self._matching()) < self.num_requested and not self._complete:
+                logging.debug('Too few candidates left, solving again')
+                self._solve()
+
+    def schedules(self):
+        """
+        :returns: the best schedules of the request as it stands, as
+            :py:func:`find_schedules` would return them
+        :rtype: list of :py:class:`Schedule`
+        """
+        with self._lock:
+            top = schedule_generator.candidate_pool(self.params, self.num_requested)
+            for i in self._matching():
+                candidate = self._candidates[i]
+                top.push(self._scores[i], candidate.bitmaps, candidate.sections)
+            return schedule_generator.best_schedules(self._cal, top, self.num_requested,
+                                                     self.params)
+
+    def _solve(self):
+        start = time.time()
+        institution = self.params.get('institution', 'ualberta')
+        if self._cal is None or institution != self._cal_institution:
+            self._cal = classtime.brain.get_calendar(institution)
+            self._cal_institution = institution
+        budget = Budget.from_config(classtime.app.config, self.params.get('budget'))
+        self._candidates = list()
+        self._scores = list()
+        self._unweighted_scores = dict()
+        self._section_ids = self._request_section_ids()
+        for score, bitmaps, sections in schedule_generator.find_candidates(
+                self.params, budget, self._cal):
+            self._candidates.append(Candidate.create(bitmaps, sections))
+            self._scores.append(score)
+            budget.add_solution()
+            if budget.exhausted():
+                break
+        self.truncated = budget.truncated
+        self._complete = not budget.truncated
+        self._scored_with = self._preferences()
+        self._solved_with = self._request_constraints()
+        self.num_solves += 1
+        logging.info(lazy('Solved session request with {} candidates in {:.3f}s',
+            len(self._candidates), time.time() - start))
+
+    def _rescore(self):
+        preferences = self._preferences()
+        weights = ScheduleScorer.weights(preferences)
+        self._scores = list()
+        for candidate in self._candidates:
+            scores = self._unweighted(candidate)
+            self._scores.append(sum(weights[name] * scores[name]
+                                    for name in ScheduleScorer.PREFERENCES))
+        self._scored_with = preferences
+
+    def _unweighted(self, candidate):
+        scores = self._unweighted_scores.get(candidate.timetable)
+        if scores is None:
+            scores = ScheduleScorer.unweighted_scores(candidate.bitmaps)
+            self._unweighted_scores[candidate.timetable] = scores
+        return scores
+
+    def _request_section_ids(self):
+        course_ids = list(self.params.get('courses') or list())
+        for electives_group in self.params.get('electives') or list():
+            course_ids.extend(electives_group.get('courses') or list())
+        return frozenset(SectionRecord.coerce(section).id
+                         for components in self._cal.course_components(
+                             self.params.get('term', ''), course_ids)
+                         for component in components
+                         for section in component)
+
+    def _request_constraints(self):
+        """Compiles the request's constraints, ignoring locked sections
+        which are not of its courses, as generation does
+        """
+        busy_mask, max_days, locked = constraints.request_constraints(self.params)
+        return busy_mask, max_days, locked & self._section_ids
+
+    def _preferences(self):
+        return dict(self.params.get('preferences') or dict())
+
+    def _narrows(self, request_constraints):
+        """Checks whether constraints only rule out schedules which the
+        constraints the candidates were generated with also rule out,
+        so that filtering the candidates is enough
+        """
+        busy_mask, max_days, locked = request_constraints
+        solved_mask, solved_max_days, solved_locked = self._solved_with
+        solved_timetable = Schedule.pack_bitmap(solved_mask)
+        return solved_timetable & ~Schedule.pack_bitmap(busy_mask) == 0 \
+           and (solved_max_days is None
+                or max_days is not None and max_days <= solved_max_days) \
+           and solved_locked <= locked
+
+    def _matching(self):
+        """
+        :returns: indices of the candidates allowed by the current busy
+            times, constraints and locked sections
+        """
+        busy_mask, max_days, locked = self._request_constraints()
+        busy = Schedule.pack_bitmap(busy_mask)
+        return [i for i, candidate in enumerate(self._candidates)
+                if not candidate.timetable & busy
+                and (max_days is None or candidate.days <= max_days)
+                and locked <= candidate.section_ids]
+
+
+class SessionStore(object):
+    """Bounded, in-process store of sessions, which expire when unused
+    """
+
+    def __init__(self, max_sessions, ttl):
+        """
+        :param int max_sessions: most sessions to keep. The least
+            recently used are dropped first.
+        :param float ttl: seconds a session is kept after it was last used
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = collections.OrderedDict()
+        """Map from session id to (expiry time, session), least recently
+        used first"""
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, max_sessions='SCHEDULER_MAX_SESSIONS',
+                    ttl='SCHEDULER_SESSION_TTL'):
+        """Builds a store from the app's settings
+
+        :param str max_sessions: (optional) name of the setting for
+            ``max_sessions``
+        :param str ttl: (optional) name of the setting for ``ttl``
+        """
+        return cls(max_sessions=config.get(max_sessions),
+                   ttl=config.get(ttl))
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._sessions)
+
+    def add(self, session):
+        """
+        :returns: the new session's id
+        :rtype: str
+        """
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = (time.time() + self.ttl, session)
+            self._expire()
+        return session_id
+
+    def get(self, session_id):
+        """Returns a session, and keeps it for another ttl seconds
+
+        :returns: the session, or None if it expired or never existed
+        """
+        with self._lock:
+            self._expire()
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (time.time() + self.ttl, entry[1])
+            return entry[1]
+
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire(self):
+        now = time.time()
+        while self._sessions:
+            session_id, (expires, _) = next(self._sessions.iteritems())
+            if expires > now and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+
+_store = None
+
+def store():
+    """Returns the process's session store, creating it from the app's
+    configuration on first use
+    """
+    global _store # pylint: disable=W0603
+    if _store is None:
+        _store = SessionStore.from_config(classtime.app.config)
+    return _store
@@ -0,0 +1,210 @@
+import math
+import itertools
+import collections
+import threading
+import multiprocessing
+
+from classtime.logging import logging
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+_pool = None
+_pool_processes = None
+_pool_lock = threading.Lock()
+
+CANCELLED_SLOTS = 64
+"""Number of recently cancelled tickets the workers can see"""
+_cancelled = None
+"""Ring of cancelled tickets, shared with the pool's workers"""
+_tickets = itertools.count(1)
+
+
+def get_pool(processes):
+    """Returns this process's solver pool, creating it on first use
+
+    The pool is shared by every request served by this process, so
+    worker processes are only forked once.
+
+    :param int processes: number of worker processes
+    """
+    global _pool, _pool_processes, _cancelled # pylint: disable=W0603
+    with _pool_lock:
+        if _pool is None or _pool_processes != processes:
+            if _pool is not None:
+                _pool.terminate()
+            logging.info('Starting solver pool with {} processes'.format(
+                processes))
+            _cancelled = multiprocessing.Array('l', CANCELLED_SLOTS)
+            _pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                         initargs=(_cancelled,))
+            _pool_processes = processes
+        return _pool
+
+
+def _init_worker(cancelled):
+    global _cancelled # pylint: disable=W0603
+    _cancelled = cancelled
+
+
+def cancelled(ticket):
+    """Checks whether the tasks of a ticket were cancelled. Called by
+    workers between solutions, so that they stop early.
+
+    :param int ticket: the ticket the task was submitted with, or None
+        if it was not submitted to the pool
+    """
+    return ticket is not None and _cancelled is not None \
+       and _cancelled[ticket % CANCELLED_SLOTS] == ticket
+
+
+def close_pool():
+    """Shuts down this process's solver pool, if there is one
+    """
+    global _pool, _pool_processes # pylint: disable=W0603
+    with _pool_lock:
+        if _pool is not None:
+            _pool.terminate()
+            _pool.join()
+        _pool = None
+        _pool_processes = None
+
+
+class SolverTasks(object):
+    """Tasks running in the solver pool, submitted a few at a time
+
+    Only twice as many tasks as there are workers are outstanding at
+    once, so tasks are only built as workers become free. Iterating
+    gives ``(key, task, result)`` for each task, in order, where result
+    is the task's ``AsyncResult``.
+
+    Once the caller stops, :py:meth:`cancel` tells the workers to drop
+    the outstanding tasks, so they are free for other requests.
+    """
+
+    def __init__(self, solve_partition, tasks, processes):
+        """
+        :param function solve_partition: module-level function which
+            takes ``(task, ticket)``, and should stop early once
+            :py:func:`cancelled` is true for the ticket
+        :param tasks: iterator over (key, task). Only the task is sent
+            to the workers.
+        :param int processes: number of worker processes
+        """
+        self._pool = get_pool(processes)
+        self._solve_partition = solve_partition
+        self._tasks = iter(tasks)
+        self._window = 2 * processes
+        self._outstanding = collections.deque()
+        self.ticket = next(_tickets)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        while len(self._outstanding) < self._window:
+            try:
+                key, task = next(self._tasks)
+            except StopIteration:
+                break
+            self._outstanding.append((key, task, self._pool.apply_async(
+                self._solve_partition, (task, self.ticket))))
+        if not self._outstanding:
+            raise StopIteration
+        return self._outstanding.popleft()
+
+    def cancel(self):
+        """Tells the workers to stop the outstanding tasks
+        """
+        with _pool_lock:
+            if _cancelled is not None:
+                _cancelled[self.ticket % CANCELLED_SLOTS] = self.ticket
+        self._outstanding.clear()
+
+
+def solve(solve_partition, tasks, processes):
+    """Solves each task in a worker process
+
+    :param function solve_partition: module-level function which takes
+        ``(task, ticket)`` and returns a compact result
+    :param tasks: iterator over (key, task)
+    :param int processes: number of worker processes
+    :returns: :py:class:`SolverTasks`
+    """
+    return SolverTasks(solve_partition, tasks, processes)
+
+
+def partition(section_lists, processes):
+    """Splits the search into independent pieces of work
+
+    Each elective combination is already independent. If there are
+    fewer combinations than processes, each combination is further split
+    by branching on its largest component: every piece keeps all other
+    sections, but only a slice of the largest component's sections.
+    Since exactly one section is scheduled per component, the pieces'
+    solutions never overlap.
+
+    :param list section_lists: one section list per elective combination
+    :param int processes: number of worker processes
+    :returns: list of section lists
+    """
+    return [piece
+            for pieces in partition_combinations(section_lists, processes)
+            for piece in pieces]
+
+
+def partition_combinations(section_lists, processes):
+    """Like :py:func:`partition`, but keeps the pieces of each elective
+    combination together, so that limits on one combination can be
+    shared between its pieces
+
+    Section lists are read lazily, at most ``processes`` ahead of the
+    pieces generated.
+
+    :param section_lists: iterator over one section list per elective
+        combination
+    :returns: iterator over lists of section lists, one per elective
+        combination
+    """
+    section_lists = iter(section_lists)
+    first = list(itertools.islice(section_lists, processes))
+    if len(first) >= processes:
+        for sections in itertools.chain(first, section_lists):
+            yield [sections]
+        return
+    if not first:
+        return
+    pieces_each = int(math.ceil(1.0 * processes / len(first)))
+    for sections in first:
+        yield _branch_on_largest_component(sections, pieces_each)
+
+
+def split_limit(limit, pieces):
+    """Splits a limit as evenly as possible between pieces of work
+
+    :param int limit: the limit, or None if unlimited
+    :param int pieces: number of pieces
+    :returns: list of one limit per piece, adding up to ``limit``
+    """
+    if limit is None:
+        return [None] * pieces
+    share, remainder = divmod(limit, pieces)
+    return [share + (1 if i < remainder else 0)
+            for i in range(pieces)]
+
+
+def _branch_on_largest_component(sections, pieces):
+    components = collections.OrderedDict()
+    for section in sections:
+        key = (section.get('course'), section.get('component'))
+        components.setdefault(key, list()).append(section)
+    if not components:
+        return [sections]
+
+    largest = max(components.values(), key=len)
+    pieces = min(pieces, len(largest))
+    if pieces <= 1:
+        return [sections]
+    largest_ids = set(id(section) for section in largest)
+    rest = [section for section in sections
+            if id(section) not in largest_ids]
+    return [rest + largest[i::pieces]
+            for i in range(pieces)]
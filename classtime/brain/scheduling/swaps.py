@@ -0,0 +1,91 @@
+"""Alternatives for one course's sections, with the rest of a schedule fixed
+
+The fixed sections' combined timetable is a mask: each of the course's
+sections which overlaps it is dropped in a single pass, and only the
+survivors are combined into groups of one section per component,
+pruning any partial group which overlaps itself. Each group is scored
+from the timetable bitmaps alone, with
+:py:meth:`ScheduleScorer.score_bitmap`, so no search is needed.
+"""
+from classtime.logging import logging, lazy
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
+from classtime.brain.scheduling.schedule import Schedule, ScheduleScorer, SectionRecord
+
+
+def swap_options(sections, course, course_components, preferences=None, busy_mask=None):
+    """Ranks every valid group of one section per component of a course,
+    with the schedule's other sections fixed
+
+    :param list sections: the schedule's :py:class:`SectionRecord` objects
+    :param str course: id of the course to swap
+    :param list course_components: the course's sections, one list per
+        component
+    :param dict preferences: (optional) weights of the scoring functions
+    :param tuple busy_mask: (optional) busy times, compiled by
+        :py:meth:`Schedule.busy_mask`
+    :returns: list of (score delta, sections), best first. The delta is
+        the alternative's overall score less the schedule's. The
+        course's current group of sections is left out.
+    """
+    fixed = [section for section in sections if section.course != course]
+    current = frozenset(section.id for section in sections if section.course == course)
+    fixed_bitmap = _combined_bitmap(fixed)
+    mask = Schedule.pack_bitmap(fixed_bitmap)
+    if busy_mask:
+        mask |= Schedule.pack_bitmap(busy_mask)
+
+    weights = ScheduleScorer.weights(preferences)
+    current_bitmap = _combined_bitmap(section for section in sections
+                                      if section.course == course)
+    base_score = ScheduleScorer.score_bitmap(_union(fixed_bitmap, current_bitmap), weights)
+
+    # (section, packed timetable, day bitmaps) of each section which
+    # does not overlap the fixed sections
+    candidates = [[(section, section.timetable, section.bitmap or _empty_bitmap())
+                   for section in (SectionRecord.coerce(section) for section in component)
+                   if not section.timetable & mask]
+                  for component in course_components]
+    current_timetable = Schedule.pack_bitmap(current_bitmap)
+    dependencies = any(section.autoEnroll is not None
+                       for component in candidates
+                       for section, _, _ in component)
+    options = list()
+    # map from group timetable to score, since many sections share times
+    scores = dict()
+    def _add_groups(i, group, timetable, bitmap):
+        if i == len(candidates):
+            if timetable != current_timetable \
+            or frozenset(section.id for section in group) != current:
+                if timetable not in scores:
+                    scores[timetable] = ScheduleScorer.score_bitmap(bitmap, weights)
+                options.append((scores[timetable] - base_score, group))
+            return
+        for section, section_timetable, section_bitmap in candidates[i]:
+            if timetable & section_timetable \
+            or dependencies and not all(Schedule.dependency_permits(section, other)
+                       and Schedule.dependency_permits(other, section)
+                       for other in group):
+                continue
+            _add_groups(i + 1, group + [section], timetable | section_timetable,
+                        _union(bitmap, section_bitmap))
+    _add_groups(0, list(), 0, fixed_bitmap)
+
+    options.sort(key=lambda option: option[0], reverse=True)
+    logging.debug(lazy('Found {} alternatives for <{}> among {} sections',
+        len(options), course, lambda: sum(len(component) for component in candidates)))
+    return options
+
+
+def _empty_bitmap():
+    return [0] * Schedule.NUM_DAYS
+
+def _combined_bitmap(sections):
+    bitmap = _empty_bitmap()
+    for section in sections:
+        if section.bitmap is not None:
+            bitmap = _union(bitmap, section.bitmap)
+    return bitmap
+
+def _union(bitmap_a, bitmap_b):
+    return [day_a | day_b for day_a, day_b in zip(bitmap_a, bitmap_b)]
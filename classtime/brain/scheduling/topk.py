@@ -0,0 +1,122 @@
+import heapq
+import itertools
+
+from classtime.brain.scheduling.schedule import Schedule
+
+
+class TopSchedules(object):
+    """Keeps the best distinct schedule layouts seen so far
+
+    A layout is identified by its timetable bitmaps. Candidates with the
+    same layout as a kept one are recorded as its duplicates instead of
+    taking up another slot, so memory stays proportional to ``size``
+    (plus the duplicates of kept layouts).
+    """
+
+    def __init__(self, size=None):
+        """
+        :param int size: max number of distinct layouts to keep.
+            None keeps every layout.
+        """
+        self.size = size
+        self._heap = list()
+        self._layouts = dict()
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def is_full(self):
+        return self.size is not None and len(self._heap) >= self.size
+
+    def worst_score(self):
+        """Returns the lowest score currently kept, or None if empty
+        """
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def push(self, score, bitmaps, item):
+        """Offers a candidate
+
+        :param float score: the candidate's overall score
+        :param tuple bitmaps: the candidate's timetable bitmaps
+        :param item: the candidate itself, usually its section list
+
+        :returns: whether the candidate was kept
+        :rtype: boolean
+        """
+        layout = self._layouts.get(bitmaps)
+        if layout is not None:
+            layout[2].append(item)
+            return True
+
+        # ties are broken in favour of the earliest candidate
+        entry = (score, -next(self._order), bitmaps)
+        if self.is_full():
+            if score <= self.worst_score():
+                return False
+            _, _, evicted = heapq.heapreplace(self._heap, entry)
+            del self._layouts[evicted]
+        else:
+            heapq.heappush(self._heap, entry)
+        self._layouts[bitmaps] = (score, item, list())
+        return True
+
+    def best(self):
+        """Returns the kept layouts, best first
+
+        :returns: list of (score, item, duplicate items)
+        """
+        ranked = sorted(self._heap, reverse=True)
+        return [self._layouts[bitmaps] for _, _, bitmaps in ranked]
+
+    def diverse(self, num, diversity):
+        """Returns up to num kept layouts, balancing score against how
+        different each is from those already chosen
+
+        Uses maximal marginal relevance. Each layout is chosen to maximize
+        ``(1 - diversity) * score + diversity * distance``, where score is
+        scaled to [0, 1] across the kept layouts, and distance is the
+        Hamming distance of its blocks to the nearest chosen layout, as a
+        fraction of their blocks. Each layout's timetable is packed into
+        one int, so a distance is a single xor and popcount, and the
+        nearest distances are updated once per choice.
+
+        :param int num: number of layouts to choose
+        :param float diversity: from 0, which ranks by score alone, to 1,
+            which ignores score after the best layout
+        :returns: list of (score, item, duplicate items), in the order
+            chosen
+        """
+        ranked = sorted(self._heap, reverse=True)
+        if not ranked or num <= 0 or diversity <= 0:
+            return [self._layouts[bitmaps] for _, _, bitmaps in ranked[:num]]
+
+        scores = [score for score, _, _ in ranked]
+        score_range = (max(scores) - min(scores)) or 1.0
+        relevance = [(score - min(scores)) / score_range for score in scores]
+        packed = [Schedule.pack_bitmap(bitmaps) for _, _, bitmaps in ranked]
+        sizes = [_popcount(timetable) for timetable in packed]
+
+        chosen = [0]
+        nearest = [1.0] * len(ranked)
+        remaining = set(range(1, len(ranked)))
+        while remaining and len(chosen) < num:
+            last = chosen[-1]
+            for i in remaining:
+                blocks = sizes[i] + sizes[last]
+                if blocks:
+                    distance = float(_popcount(packed[i] ^ packed[last])) / blocks
+                    nearest[i] = min(nearest[i], distance)
+                else:
+                    nearest[i] = 0.0
+            best = max(remaining, key=lambda i: ((1 - diversity) * relevance[i]
+                                                 + diversity * nearest[i], -i))
+            remaining.discard(best)
+            chosen.append(best)
+        return [self._layouts[ranked[i][2]] for i in chosen]
+
+
+def _popcount(n):
+    return bin(n).count('1')
@@ -1,14 +1,60 @@
 import os
+import json
+import importlib
 
-from flask import Flask, request, Response
+from flask import Flask, request, Response, g
 from flask import render_template, url_for, redirect, send_from_directory
 from flask import send_file, make_response, abort
 
+from classtime.logging import logging
+logging = logging.getLogger(__name__) # pylint: disable=C0103
+
 from classtime import app
 
-# Initializes the Flask-Restless API
-import classtime.api.api
-import classtime.api.apiv1
+@app.before_request
+def select_institution():
+    """Sets ``g.institution``, which chooses the database of institutions
+    listed in INSTITUTION_DATABASES. See :py:class:`InstitutionSession`.
+    Registered before the API, so it runs before the API's own hooks.
+    """
+    g.institution = None
+    if app.config.get('INSTITUTION_DATABASES'):
+        g.institution = _request_institution(request.args)
+
+def _request_institution(args):
+    """Finds the institution a request is for, in the ``institution``
+    argument, or in the ``q`` argument's institution or filters
+    """
+    if args.get('institution'):
+        return args.get('institution')
+    try:
+        query = json.loads(args.get('q', '{}'))
+    except ValueError:
+        return None
+    if not isinstance(query, dict):
+        return None
+    if query.get('institution'):
+        return query.get('institution')
+    for query_filter in query.get('filters', list()):
+        if isinstance(query_filter, dict) \
+        and query_filter.get('name') == 'institution' \
+        and query_filter.get('op') in ['==', 'eq', 'equals', 'equals_to']:
+            return query_filter.get('val')
+    return None
+
+API_MODULES = {
+    'v0': 'classtime.api.api',
+    'v1': 'classtime.api.apiv1'
+}
+"""Map from API version to the module which registers it"""
+
+# Initializes the Flask-Restless API, for the configured versions only
+for version in app.config.get('API_VERSIONS'):
+    if version not in API_MODULES:
+        logging.error('Unknown API version <{}>'.format(version))
+        continue
+    importlib.import_module(API_MODULES[version])
+import classtime.api.caching
 
 # flask-sqlalchemy database
 from classtime.core import db
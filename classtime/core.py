@@ -1,12 +1,117 @@
+from functools import partial
+
+from flask import g, has_request_context
+from sqlalchemy import orm, inspect
+from sqlalchemy.schema import CreateColumn
 
 from classtime import app
 
 from flask.ext.sqlalchemy import SQLAlchemy
+# pylint: disable=E0611
+from flask.ext.sqlalchemy import _SignallingSession
+# pylint: enable=E0611
 from flask.ext.restless import APIManager
 from flask.ext.cors import CORS
 from flask.ext.compress import Compress
 
-db = SQLAlchemy(app)
+SHARED_TABLES = ['institution']
+"""Tables which stay in the main database, even for institutions with
+databases of their own"""
+
+
+def institution_bind(institution):
+    """Returns the bind key of an institution's own database, or None if
+    its data is in the main database. See INSTITUTION_DATABASES.
+    """
+    if institution in app.config.get('INSTITUTION_DATABASES', dict()):
+        return 'institution:{}'.format(institution)
+    return None
+
+app.config['SQLALCHEMY_BINDS'] = dict(
+    (institution_bind(institution), uri)
+    for institution, uri in app.config.get('INSTITUTION_DATABASES', dict()).items())
+
+
+class InstitutionSession(_SignallingSession): # pylint: disable=R0904
+    """Session which sends an institution's data to its own database, if
+    it has one
+
+    The institution is either fixed, for the sessions of local databases,
+    or else that of the current request, ``g.institution``.
+    """
+
+    def __init__(self, sqlalchemy, institution=None, **options):
+        self.institution = institution
+        _SignallingSession.__init__(self, sqlalchemy, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        institution = self.institution
+        if institution is None and has_request_context():
+            institution = getattr(g, 'institution', None)
+        bind_key = institution_bind(institution)
+        if bind_key is not None \
+        and (mapper is None or mapper.mapped_table.name not in SHARED_TABLES):
+            return db.get_engine(self.app, bind=bind_key)
+        return _SignallingSession.get_bind(self, mapper, clause)
+
+
+class ClasstimeSQLAlchemy(SQLAlchemy):
+    def create_scoped_session(self, options=None):
+        options = dict(options or dict())
+        scopefunc = options.pop('scopefunc', None)
+        return orm.scoped_session(partial(InstitutionSession, self, **options),
+                                  scopefunc=scopefunc)
+
+
+db = ClasstimeSQLAlchemy(app)
+
+
+def create_missing_columns(engine, tables=None):
+    """Adds any columns missing from tables which already exist
+
+    ``create_all`` skips existing tables entirely, so columns added to
+    a model later are never created on an existing database. Added
+    columns are empty, and primary key columns cannot be added.
+
+    :param engine: the database to update
+    :param list tables: (optional) tables to check. Defaults to every
+        table
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+    for table in tables or db.Model.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = set(column['name'] for column in inspector.get_columns(table.name))
+        for column in table.columns:
+            if column.name in existing_columns or column.primary_key:
+                continue
+            engine.execute('ALTER TABLE {} ADD COLUMN {}'.format(
+                preparer.format_table(table),
+                CreateColumn(column).compile(dialect=engine.dialect)))
+
+
+def create_missing_indexes(engine, tables=None):
+    """Creates any indexes missing from tables which already exist
+
+    ``create_all`` skips existing tables entirely, so indexes added to
+    a model later are never created on an existing database. Run
+    :py:func:`create_missing_columns` first, for indexes on new columns.
+
+    :param engine: the database to update
+    :param list tables: (optional) tables to check. Defaults to every
+        table
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in tables or db.Model.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = set(index['name'] for index in inspector.get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
 Compress(app)
 
 cors = CORS(app, resources={r"/api/*": {"origins": "*"}})
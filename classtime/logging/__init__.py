@@ -1,6 +1,80 @@
+"""Logging configuration
 
+Configured from the environment, before anything else is imported:
+
+:LOG_LEVEL: minimum level to log. Default DEBUG in development, and
+            INFO in production (SECRET_KEY is set)
+:LOG_FORMAT: ``text`` (default) for human-readable lines, or ``json`` for
+             one JSON object per line, for log aggregation in production
+"""
+import os
+import json
 import logging
-logging.basicConfig(
-	format='%(levelname)s:\t%(message)s\t\t%(asctime)s  [%(name)s]',
-    datefmt='%I:%M:%S',
-    level=logging.DEBUG)
+
+TEXT_FORMAT = '%(levelname)s:\t%(message)s\t\t%(asctime)s  [%(name)s]'
+TEXT_DATEFMT = '%I:%M:%S'
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each record as a single-line JSON object
+    """
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class lazy(object): # pylint: disable=C0103,R0903
+    """A log message which is only formatted if it is emitted
+
+    Usage::
+     logging.debug(lazy('{} sections of <{}>', len(sections), course))
+
+    Arguments which are functions are only called when formatting, so
+    expensive payloads are only built if the level is enabled.
+    """
+    def __init__(self, message, *args, **kwargs):
+        self.message = message
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        args = [arg() if callable(arg) else arg
+                for arg in self.args]
+        kwargs = dict((key, value() if callable(value) else value)
+                      for key, value in self.kwargs.items())
+        return self.message.format(*args, **kwargs)
+
+
+def _default_level():
+    if os.environ.get('SECRET_KEY', 'debug') == 'debug':
+        return 'DEBUG'
+    return 'INFO'
+
+def configure(level=None, log_format=None):
+    """Configures the root logger
+
+    :param str level: name of the minimum level to log
+    :param str log_format: 'text' or 'json'
+    """
+    level = (level or os.environ.get('LOG_LEVEL') or _default_level()).upper()
+    log_format = (log_format or os.environ.get('LOG_FORMAT') or 'text').lower()
+
+    handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT, TEXT_DATEFMT))
+    root = logging.getLogger()
+    for old_handler in list(root.handlers):
+        root.removeHandler(old_handler)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level, logging.INFO))
+
+configure()
@@ -4,3 +4,5 @@ from classtime.models.course import Course
 from classtime.models.section import Section
 from classtime.models.institution import Institution
 from classtime.models.schedule import Schedule
+from classtime.models.course_catalog import CourseCatalog
+from classtime.models.data_version import DataVersion
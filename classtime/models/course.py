@@ -22,6 +22,9 @@ class Course(db.Model):
 
     __table_args__ = (db.ForeignKeyConstraint(['institution', 'term'],
                                            ['term.institution', 'term.term']),
+                      # courses-min, sorted by faculty then subject
+                      db.Index('ix_course_faculty_subject',
+                               'institution', 'term', 'faculty', 'subject', 'asString'),
                       {})
 
     def __init__(self, jsonobj):
@@ -0,0 +1,28 @@
+from classtime.core import db
+
+CATALOG_HASH_LENGTH = 40
+
+class CourseCatalog(db.Model):
+    """Ready-to-serve :ref:`api/v1/courses-min <api-courses-min>`
+    response for one term, stored as gzipped JSON
+    """
+    institution = db.Column(db.Text, primary_key=True)
+    term = db.Column(db.Text, primary_key=True)
+    hash_id = db.Column(db.String(CATALOG_HASH_LENGTH))
+    numCourses = db.Column(db.Integer)
+    data = db.Column(db.LargeBinary)
+
+    __table_args__ = (db.ForeignKeyConstraint(['institution', 'term'],
+                                              ['term.institution', 'term.term']),
+                      {})
+
+    def __init__(self, jsonobj):
+        for key, value in jsonobj.items():
+            self.__setattr__(key, value)
+
+    def __repr__(self):
+        return '<CourseCatalog: <term={term}> ({num} courses, {hash_id}) @ {institution}>'.format(
+                term=self.term,
+                num=self.numCourses,
+                hash_id=self.hash_id,
+                institution=self.institution)
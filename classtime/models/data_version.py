@@ -0,0 +1,47 @@
+import datetime
+
+from classtime.core import db
+
+class DataVersion(db.Model):
+    """Counts changes to one institution's data for one term
+
+    ``term`` is empty for changes to the institution's list of terms.
+    Each institution's versions are kept in its own database, if it has
+    one. Both ``institution`` and ``term`` are empty for the global
+    version, which counts changes to the list of institutions, and is
+    always kept in the main database.
+    """
+    institution = db.Column(db.Text, primary_key=True)
+    term = db.Column(db.Text, primary_key=True)
+    version = db.Column(db.Integer)
+    updated = db.Column(db.DateTime)
+
+    def __init__(self, jsonobj):
+        self.version = 0
+        self.updated = datetime.datetime.utcnow()
+        for key, value in jsonobj.items():
+            self.__setattr__(key, value)
+
+    def __repr__(self):
+        return '<DataVersion: <term={term}> v{version} @ {institution}>'.format(
+                term=self.term,
+                version=self.version,
+                institution=self.institution)
+
+    def bump(self):
+        self.version += 1
+        self.updated = datetime.datetime.utcnow()
+
+    @staticmethod
+    def bump_global(session):
+        """Adds a bump of the global version to the session's running
+        transaction
+        """
+        data_version = session.query(DataVersion).get(('', ''))
+        if data_version is None:
+            data_version = DataVersion({
+                'institution': '',
+                'term': ''
+            })
+            session.add(data_version)
+        data_version.bump()
@@ -22,7 +22,9 @@ sections = db.Table('sections',
     db.ForeignKeyConstraint(['institution', 'term', 'course', 'section_id'],
         ['section.institution', 'section.term', 'section.course', 'section.class_']),
     db.ForeignKeyConstraint(['institution', 'term', 'schedule_id'],
-        ['schedule.institution', 'schedule.term', 'schedule.hash_id'])
+        ['schedule.institution', 'schedule.term', 'schedule.hash_id']),
+    db.Index('ix_sections_schedule', 'institution', 'term', 'schedule_id'),
+    db.Index('ix_sections_section', 'institution', 'term', 'course', 'section_id')
 )
 
 class Schedule(db.Model):
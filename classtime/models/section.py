@@ -35,12 +35,24 @@ class Section(db.Model):
     endTime = db.Column(db.Text)
     location = db.Column(db.Text)
 
+    # Precomputed from day, startTime, endTime when saved.
+    # dayMask is 0 for sections without valid times.
+    # See Schedule.timetable_columns
+    dayMask = db.Column(db.Integer)
+    startBlock = db.Column(db.Integer)
+    endBlock = db.Column(db.Integer)
+    blockBitmap = db.Column(db.BigInteger)
+
     schedule = db.Column(db.Text)
 
     __table_args__ = (db.ForeignKeyConstraint(['institution', 'term', 'course'],
                                               ['course.institution', 'course.term', 'course.course']),
                       db.ForeignKeyConstraint(['institution', 'term', 'schedule'],
                                               ['schedule.institution', 'schedule.term', 'schedule.hash_id']),
+                      # sections of one component, in timetable order
+                      db.Index('ix_section_component_times',
+                               'institution', 'term', 'course', 'component',
+                               'day', 'startTime', 'endTime'),
                       {})
 
     def __init__(self, jsonobj):
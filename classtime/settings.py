@@ -1,5 +1,6 @@
 
 import os
+import json
 from classtime.logging import logging
 logging = logging.getLogger(__name__)
 
@@ -11,3 +12,61 @@ else:
 
 SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:////tmp/classtime.db')
 logging.info('Using SQLALCHEMY_DATABASE_URI {}'.format(SQLALCHEMY_DATABASE_URI))
+
+# Optional databases of their own for some institutions, as JSON:
+# {"<institution>": "<database uri>"}. Other institutions share the
+# main database. See classtime.core.InstitutionSession
+INSTITUTION_DATABASES = json.loads(os.environ.get('INSTITUTION_DATABASES', '{}'))
+
+# Whether the app creates missing tables itself. In production the schema
+# is managed with `python manage.py create_db`, so web workers skip it
+AUTO_CREATE_DB = os.environ.get('AUTO_CREATE_DB', str(DEBUG)).lower() in ['1', 'true', 'yes']
+
+# API versions to register. v0 is the original, unversioned /api
+API_VERSIONS = [version.strip()
+                for version in os.environ.get('API_VERSIONS', 'v0,v1').split(',')
+                if version.strip()]
+
+SCHEDULER_PROCESSES = int(os.environ.get('SCHEDULER_PROCESSES', 1))
+
+# Limits on the work done by a single schedule request. See
+# classtime.brain.scheduling.budget
+SCHEDULER_MAX_SOLUTIONS = int(os.environ.get('SCHEDULER_MAX_SOLUTIONS', 2000))
+SCHEDULER_MAX_ITERATIONS = int(os.environ.get('SCHEDULER_MAX_ITERATIONS', 100))
+SCHEDULER_MAX_CLAUSES = int(os.environ.get('SCHEDULER_MAX_CLAUSES', 200000))
+SCHEDULER_MAX_COMBINATIONS = int(os.environ.get('SCHEDULER_MAX_COMBINATIONS', 64))
+SCHEDULER_TIME_BUDGET = float(os.environ.get('SCHEDULER_TIME_BUDGET', 10))
+SCHEDULER_SCORE_BOUND = os.environ.get('SCHEDULER_SCORE_BOUND')
+if SCHEDULER_SCORE_BOUND is not None:
+    SCHEDULER_SCORE_BOUND = float(SCHEDULER_SCORE_BOUND)
+
+# Default weight of diversity when choosing which schedules to return,
+# from 0 (by score alone) to 1. Requests can override it. See
+# classtime.brain.scheduling.topk
+SCHEDULER_DIVERSITY = float(os.environ.get('SCHEDULER_DIVERSITY', 0))
+# With diversity, candidates are chosen from this many times as many
+# of the best schedules as are returned
+SCHEDULER_DIVERSITY_POOL = int(os.environ.get('SCHEDULER_DIVERSITY_POOL', 1))
+
+# Refinement sessions are kept in-process for this many seconds unused,
+# and at most this many at once. See classtime.brain.scheduling.sessions
+SCHEDULER_SESSION_TTL = float(os.environ.get('SCHEDULER_SESSION_TTL', 15*60))
+SCHEDULER_MAX_SESSIONS = int(os.environ.get('SCHEDULER_MAX_SESSIONS', 200))
+
+# Cursors to later pages of generated schedules are kept in-process for
+# this many seconds unused, and at most this many at once.
+# See classtime.brain.scheduling.cursors
+SCHEDULER_CURSOR_TTL = float(os.environ.get('SCHEDULER_CURSOR_TTL', 10*60))
+SCHEDULER_MAX_CURSORS = int(os.environ.get('SCHEDULER_MAX_CURSORS', 200))
+# Each page of a cursor keeps this many pages' worth of the best
+# schedules generated so far, counting the page itself
+SCHEDULER_CURSOR_LOOKAHEAD = int(os.environ.get('SCHEDULER_CURSOR_LOOKAHEAD', 4))
+
+# Seconds that clients and proxies may cache a term's courses-min catalog
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 24*60*60))
+
+# Seconds that clients and proxies may cache other read-only endpoints,
+# which are revalidated with ETag / Last-Modified. See classtime.api.caching
+DATA_MAX_AGE = int(os.environ.get('DATA_MAX_AGE', 60))
+# Seconds that each process caches data versions before rechecking the db
+VERSION_CACHE_SECONDS = float(os.environ.get('VERSION_CACHE_SECONDS', 5))
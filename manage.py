@@ -1,17 +1,27 @@
 
+import sys
 import argparse
+import subprocess
 
 from classtime.logging import logging
 logging = logging.getLogger(__name__) # pylint: disable=C0103
 
-from classtime.core import db
+from classtime import app
+from classtime.core import db, create_missing_columns, create_missing_indexes
 import classtime.brain as brain
+from classtime.brain.local_db import LocalDatabaseFactory
 
 def create_db():
     db.create_all()
+    create_missing_columns(db.engine)
+    create_missing_indexes(db.engine)
+    for institution in app.config.get('INSTITUTION_DATABASES'):
+        LocalDatabaseFactory.build(institution).create_schema()
     logging.info('DB created!')
 
 def delete_db():
+    for institution in app.config.get('INSTITUTION_DATABASES'):
+        LocalDatabaseFactory.build(institution).drop_schema()
     db.drop_all()
     logging.info('DB deleted!')
 
@@ -27,11 +37,112 @@ def refresh_db(args):
     delete_db()
     seed_db(args)
 
+def hot_queries(institution, term, course):
+    """Queries which run on (almost) every request, by name
+    """
+    from classtime.models import Course, Section, Schedule
+    from classtime.models.schedule import sections as schedule_sections
+    return [
+        ('sections of a component',
+         Section.query.filter_by(institution=institution, term=term,
+                                 course=course, component='LEC')
+                      .order_by(Section.day.desc())
+                      .order_by(Section.startTime.desc())
+                      .order_by(Section.endTime.desc())),
+        ('courses-min',
+         Course.query.filter_by(institution=institution, term=term)
+                     .order_by(Course.faculty.asc())
+                     .order_by(Course.subject.asc())
+                     .order_by(Course.asString.asc())),
+        ('sections known for a course',
+         Section.query.filter_by(institution=institution, term=term,
+                                 course=course)
+                      .limit(1)),
+        ('sections of a schedule',
+         db.session.query(schedule_sections)
+                   .filter_by(institution=institution, term=term,
+                              schedule_id='')),
+        ('schedule by hash',
+         Schedule.query.filter_by(hash_id=''))
+    ]
+
+def explain(query):
+    """Returns the database's query plan for a query, as a list of rows
+    """
+    dialect = db.engine.dialect
+    compiled = query.statement.compile(dialect=dialect)
+    if dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    return db.engine.execute(prefix + unicode(compiled), params).fetchall()
+
+def explain_queries(args):
+    from classtime.models import Course
+    institution = 'ualberta'
+    term = '1490'
+    if args.term:
+        term = args.term
+    course = Course.query.filter_by(institution=institution, term=term).first()
+    course = course.course if course is not None else '000001'
+    for name, query in hot_queries(institution, term, course):
+        print '-- {}'.format(name)
+        print query.statement
+        for row in explain(query):
+            print '   ' + ' | '.join(unicode(col) for col in row)
+        print
+
+IMPORT_TIMES_SCRIPT = '''
+import sys
+import time
+import __builtin__
+
+_import = __builtin__.__import__
+times = dict()
+
+def timed_import(name, *args, **kwargs):
+    if name in sys.modules or name in times:
+        return _import(name, *args, **kwargs)
+    start = time.time()
+    try:
+        return _import(name, *args, **kwargs)
+    finally:
+        times.setdefault(name, time.time() - start)
+
+__builtin__.__import__ = timed_import
+start = time.time()
+import {module}
+total = time.time() - start
+__builtin__.__import__ = _import
+
+for name, seconds in sorted(times.items(), key=lambda item: -item[1])[:{limit}]:
+    print '{{:8.1f}} ms  {{}}'.format(seconds * 1000, name)
+print '{{:8.1f}} ms  total, {{}} modules'.format(total * 1000, len(times))
+'''
+
+def import_report(module='classtime', limit=25):
+    """Reports how long a cold import of a module takes, and which of its
+    imports take longest. Times include each module's own imports.
+
+    Runs in a fresh interpreter, since this one has already imported
+    classtime.
+    """
+    script = IMPORT_TIMES_SCRIPT.format(module=module, limit=limit)
+    return subprocess.check_output([sys.executable, '-c', script])
+
+def import_times(args):
+    print import_report(args.module or 'classtime')
+
 def main():
     parser = argparse.ArgumentParser(description='Manage the academic database')
-    parser.add_argument('command', help='seed_db, refresh_db, create_db, delete_db')
+    parser.add_argument('command', help='seed_db, refresh_db, create_db, delete_db, explain_queries, import_times')
     parser.add_argument('--term', help='the id of the term to fill the db with (eg 1490)')
     parser.add_argument('--startfrom', help='the course id to begin filling at')
+    parser.add_argument('--module', help='the module to time importing (default classtime)')
     args = parser.parse_args()
 
     if args.command == 'delete_db':
@@ -42,6 +153,10 @@ def main():
         create_db()
     elif args.command == 'refresh_db':
         refresh_db(args)
+    elif args.command == 'explain_queries':
+        explain_queries(args)
+    elif args.command == 'import_times':
+        import_times(args)
     else:
         parser.print_usage()
         raise Exception('Invalid command')
@@ -0,0 +1,66 @@
+from sqlalchemy import inspect
+
+from classtime import app
+from classtime.core import db, institution_bind
+from classtime.models import Term, DataVersion
+from classtime.brain.local_db import LocalDatabaseFactory
+
+INSTITUTION = 'test-own-database'
+
+def setup_module():
+    app.config['INSTITUTION_DATABASES'] = {INSTITUTION: 'sqlite://'}
+    app.config['SQLALCHEMY_BINDS'] = {institution_bind(INSTITUTION): 'sqlite://'}
+    db.create_all()
+
+def teardown_module():
+    LocalDatabaseFactory.build(INSTITUTION).drop_schema()
+    app.config['INSTITUTION_DATABASES'] = dict()
+    app.config['SQLALCHEMY_BINDS'] = dict()
+
+def test_shared_database_by_default():
+    assert LocalDatabaseFactory.session('ualberta') is db.session
+
+def test_own_database():
+    local_db = LocalDatabaseFactory.build(INSTITUTION)
+    local_db.create_schema()
+    local_db.add({'term': '1490', 'termTitle': 'Fall Term 2014'}, datatype='terms')
+    local_db.commit()
+
+    assert local_db.exists(datatype='terms', identifiers=('1490',))
+    assert Term.query.filter_by(institution=INSTITUTION).first() is None
+
+def test_create_schema_adds_missing_indexes():
+    local_db = LocalDatabaseFactory.build(INSTITUTION)
+    local_db.create_schema()
+    engine = db.get_engine(app, bind=institution_bind(INSTITUTION))
+    engine.execute('DROP INDEX ix_section_component_times')
+
+    local_db.create_schema()
+    indexes = [index['name'] for index in inspect(engine).get_indexes('section')]
+    assert 'ix_section_component_times' in indexes
+
+def test_create_schema_adds_missing_columns():
+    local_db = LocalDatabaseFactory.build(INSTITUTION)
+    local_db.create_schema()
+    engine = db.get_engine(app, bind=institution_bind(INSTITUTION))
+    engine.execute('DROP TABLE section')
+    engine.execute('CREATE TABLE section (institution TEXT, term TEXT, course TEXT, class_ TEXT, '
+                   'PRIMARY KEY (institution, term, course, class_))')
+
+    local_db.create_schema()
+    columns = [column['name'] for column in inspect(engine).get_columns('section')]
+    assert 'dayMask' in columns and 'blockBitmap' in columns
+    indexes = [index['name'] for index in inspect(engine).get_indexes('section')]
+    assert 'ix_section_component_times' in indexes
+
+def test_versions_in_own_database():
+    local_db = LocalDatabaseFactory.build(INSTITUTION)
+    local_db.create_schema()
+    local_db.bump_versions(['1490'])
+    local_db.commit()
+
+    session = LocalDatabaseFactory.session(INSTITUTION)
+    assert session.query(DataVersion).get((INSTITUTION, '1490')).version == 1
+    assert DataVersion.query.get((INSTITUTION, '1490')) is None
+    # the global version only counts changes to the list of institutions
+    assert DataVersion.query.get(('', '')) is None
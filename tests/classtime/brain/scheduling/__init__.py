@@ -0,0 +1,67 @@
+"""Helpers shared by the scheduling tests"""
+import collections
+
+from classtime.brain.scheduling import SectionRecord
+
+def section_dict(course, component, section, day=None, start_time=None, end_time=None,
+                 auto_enroll=None):
+    """Builds a section as the local database returns it. Its class is
+    unique within the course, and auto_enroll names a LEC section.
+    """
+    return {
+        'class': course + component + section,
+        'course': course,
+        'component': component,
+        'section': section,
+        'asString': '{} {} {}'.format(course, component, section),
+        'day': day,
+        'startTime': start_time,
+        'endTime': end_time,
+        'autoEnroll': auto_enroll,
+        'autoEnrollComponent': 'LEC' if auto_enroll else None
+    }
+
+def section_record(*args, **kwargs):
+    """Builds a section as :py:func:`section_dict` does, as a
+    :py:class:`SectionRecord`
+    """
+    return SectionRecord.from_dict(section_dict(*args, **kwargs))
+
+SECTIONS = [
+    section_dict('000001', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+    section_dict('000001', 'LEC', 'A2', 'TR', '03:30 PM', '04:50 PM'),
+    section_dict('000002', 'LEC', 'B1', 'MWF', '10:00 AM', '10:50 AM'),
+    section_dict('000002', 'LEC', 'B2', 'TR', '08:00 AM', '09:20 AM'),
+    section_dict('000002', 'LEC', 'B3', 'MW', '06:00 PM', '07:20 PM'),
+    section_dict('000003', 'LEC', 'C1', 'T', '01:00 PM', '03:50 PM'),
+    section_dict('000003', 'LEC', 'C2', 'F', '01:00 PM', '03:50 PM')
+]
+
+
+class FakeCalendar(object):
+    """Calendar serving the given section dicts, for any term"""
+
+    def __init__(self, sections):
+        self.saved = list()
+        self.loaded = list()
+        self.courses = collections.OrderedDict()
+        for section in sections:
+            self.courses.setdefault(section['course'], collections.OrderedDict()) \
+                        .setdefault(section['component'], list()) \
+                        .append(section)
+
+    def course_components(self, term, courses, single=False, current_status=False): # pylint: disable=W0613
+        if single:
+            self.loaded.append(courses)
+            return self.courses[courses].values()
+        self.loaded.extend(courses)
+        return [self.courses[course].values() for course in courses]
+
+    def get_schedule_identifier(self, schedule):
+        return ''.join(section.id for section in schedule.sections)
+
+    def get_schedule_identifiers(self, schedules, save=True):
+        identifiers = [self.get_schedule_identifier(schedule) for schedule in schedules]
+        if save:
+            self.saved.extend(identifiers)
+        return identifiers
@@ -0,0 +1,54 @@
+from classtime.brain.scheduling.budget import Budget
+
+CONFIG = {
+    'SCHEDULER_MAX_SOLUTIONS': 100,
+    'SCHEDULER_TIME_BUDGET': 10
+}
+
+def test_request_can_only_tighten_limits():
+    budget = Budget.from_config(CONFIG, {
+        'solutions': 1000,
+        'seconds': 1,
+        'combinations': 3
+    })
+    assert budget.max_solutions == 100
+    assert budget.seconds == 1
+    assert budget.max_combinations == 3
+
+def test_invalid_request_limits_are_ignored():
+    budget = Budget.from_config(CONFIG, {
+        'solutions': 'lots',
+        'unknown': 1
+    })
+    assert budget.max_solutions == 100
+
+def test_solution_limit_truncates():
+    budget = Budget(max_solutions=2)
+    budget.add_solution()
+    assert not budget.exhausted()
+    budget.add_solution()
+    assert budget.exhausted()
+    assert budget.exhausted_by == 'solutions'
+    assert budget.truncated
+
+def test_time_limit_truncates():
+    budget = Budget(seconds=0)
+    assert budget.exhausted()
+    assert budget.truncated
+
+def test_renew_resets_limits():
+    budget = Budget(max_solutions=1)
+    budget.add_solution()
+    assert budget.exhausted()
+    budget.renew()
+    assert not budget.exhausted()
+    assert not budget.truncated
+    assert budget.num_solutions == 0
+
+def test_time_limit_keeps_deadline():
+    budget = Budget(max_solutions=1, seconds=60)
+    budget.deadline -= 60
+    time_limit = budget.time_limit()
+    assert time_limit.max_solutions is None
+    assert time_limit.deadline == budget.deadline
+    assert time_limit.out_of_time()
@@ -0,0 +1,36 @@
+import pycosat
+
+from classtime.brain.scheduling.cnf import CNF
+
+def _models(cnf, num_literals):
+    return sorted(tuple(literal for literal in model if 0 < literal <= num_literals)
+                  for model in pycosat.itersolve(cnf.clauses, vars=cnf.num_vars))
+
+def test_at_most_one():
+    for num_literals in [2, CNF.PAIRWISE_MAX, 12]:
+        cnf = CNF(num_vars=num_literals)
+        cnf.at_most_one(range(1, num_literals + 1))
+        # one model per assignment, so auxiliary variables are determined
+        assert _models(cnf, num_literals) == \
+               sorted([()] + [(literal,) for literal in range(1, num_literals + 1)])
+
+def test_exactly_one_is_linear():
+    cnf = CNF(num_vars=40)
+    cnf.exactly_one(range(1, 41))
+    assert len(cnf) < 4 * 40
+    assert len(_models(cnf, 40)) == 40
+
+def test_iter_projected_skips_duplicate_models():
+    cnf = CNF(num_vars=2)
+    cnf.exactly_one([1, 2])
+    # unconstrained variables give each solution 2**8 models
+    for _ in range(8):
+        cnf.new_var()
+    assert sorted(cnf.iter_projected(2)) == [[1], [2]]
+
+def test_at_most():
+    cnf = CNF(num_vars=5)
+    cnf.at_most(range(1, 6), 2)
+    models = _models(cnf, 5)
+    assert len(models) == 1 + 5 + 10
+    assert max(len(model) for model in models) == 2
@@ -0,0 +1,42 @@
+import functools
+
+from classtime.brain.scheduling.conflict_index import ConflictIndex
+
+from . import section_record
+
+_section = functools.partial(section_record, '000001', 'LEC', 'A1')
+
+def test_overlapping_pairs():
+    index = ConflictIndex([
+        _section('MWF', '08:00 AM', '08:50 AM'),
+        _section('TR', '08:00 AM', '09:20 AM'),
+        _section('F', '08:30 AM', '09:50 AM'),
+        _section('R', '09:00 AM', '09:50 AM'),
+        _section(None, None, None)
+    ])
+    assert index.overlapping_pairs() == [(0, 2), (1, 3)]
+    assert index.overlapping(4) == set()
+
+def test_times_changed():
+    index = ConflictIndex([
+        _section('MWF', '08:00 AM', '08:50 AM'),
+        _section('MWF', '09:00 AM', '09:50 AM')
+    ])
+    assert index.overlapping_pairs() == []
+
+    index.add(1, _section('W', '08:30 AM', '09:50 AM'))
+    assert index.overlapping(0) == set([1])
+
+    index.remove(1)
+    assert index.overlapping(0) == set()
+    assert len(index) == 1
+
+def test_overlapping_groups():
+    index = ConflictIndex([
+        _section('MWF', '08:00 AM', '09:50 AM'),
+        _section('M', '08:00 AM', '08:50 AM'),
+        _section('M', '08:30 AM', '09:20 AM'),
+        _section('F', '09:00 AM', '09:50 AM'),
+        _section('R', '09:00 AM', '09:50 AM')
+    ])
+    assert index.overlapping_groups() == [[0, 1, 2], [0, 3]]
@@ -0,0 +1,41 @@
+from classtime.brain.scheduling import Schedule
+from classtime.brain.scheduling.constraints import compile_constraints
+
+def _mask(constraints):
+    busy_times, _ = compile_constraints(constraints)
+    return Schedule.busy_mask(busy_times)
+
+def _overlaps(mask, day, start_time, end_time):
+    section = {'day': day, 'startTime': start_time, 'endTime': end_time}
+    return Schedule.bitmaps_overlap(Schedule.section_bitmap(section), mask)
+
+def test_earliest_start_and_latest_end():
+    mask = _mask({
+        'earliest-start': '10:00 AM',
+        'latest-end': '05:00 PM'
+    })
+    assert _overlaps(mask, 'M', '09:30 AM', '10:20 AM')
+    assert not _overlaps(mask, 'M', '10:00 AM', '10:50 AM')
+    assert not _overlaps(mask, 'M', '03:30 PM', '04:50 PM')
+    assert _overlaps(mask, 'M', '04:00 PM', '05:20 PM')
+
+def test_earliest_start_rounds_up():
+    mask = _mask({'earliest-start': '10:15 AM'})
+    assert _overlaps(mask, 'M', '10:00 AM', '10:50 AM')
+    assert not _overlaps(mask, 'M', '10:30 AM', '11:20 AM')
+
+def test_latest_end_allows_ending_at_limit():
+    mask = _mask({'latest-end': '05:00 PM'})
+    assert not _overlaps(mask, 'M', '04:00 PM', '05:00 PM')
+    assert _overlaps(mask, 'M', '05:00 PM', '05:50 PM')
+
+def test_days_off():
+    mask = _mask({'days-off': 'F'})
+    assert _overlaps(mask, 'MWF', '10:00 AM', '10:50 AM')
+    assert not _overlaps(mask, 'TR', '10:00 AM', '10:50 AM')
+
+def test_max_days():
+    assert compile_constraints({'max-days': 3}) == ([], 3)
+    assert compile_constraints({'max-days': 5}) == ([], None)
+    assert compile_constraints({'max-days': 'lots'}) == ([], None)
+    assert compile_constraints(None) == ([], None)
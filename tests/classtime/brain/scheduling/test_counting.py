@@ -0,0 +1,47 @@
+from classtime.brain.scheduling import schedule_generator, Budget
+from classtime.brain.scheduling.counting import count_schedules
+
+from . import section_record as _section
+
+SECTIONS = [
+    _section('000001', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+    _section('000001', 'LEC', 'A2', 'MWF', '10:00 AM', '10:50 AM'),
+    _section('000001', 'LAB', 'D1', 'T', '02:00 PM', '04:50 PM', auto_enroll='A1'),
+    _section('000001', 'LAB', 'D2', 'R', '02:00 PM', '04:50 PM', auto_enroll='A2'),
+    _section('000002', 'LEC', 'B1', 'MWF', '09:00 AM', '09:50 AM'),
+    _section('000002', 'LEC', 'B2', 'TR', '09:30 AM', '10:50 AM'),
+    _section('000002', 'LEC', 'B3', 'MW', '10:30 AM', '11:50 AM'),
+    _section('000002', 'SEM', 'S1', 'R', '02:00 PM', '02:50 PM'),
+    _section('000002', 'SEM', 'S2', 'F', '02:00 PM', '02:50 PM'),
+    _section('000003', 'LEC', 'C1', 'F', '05:00 PM', '07:50 PM'),
+    _section('000003', 'LEC', 'C2', 'T', '05:00 PM', '07:50 PM')
+]
+
+def test_count_matches_generation():
+    schedules = list(schedule_generator._generate_schedules_sat_from_sections(
+        SECTIONS, None, {}, Budget()))
+    assert count_schedules(SECTIONS) == len(schedules)
+    assert count_schedules(SECTIONS) == 12
+
+def test_independent_courses_multiply():
+    sections = [section for section in SECTIONS
+                if section.course != '000002']
+    assert count_schedules(sections) == 2 * 2
+
+def test_no_schedules():
+    sections = [
+        _section('000001', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+        _section('000002', 'LEC', 'B1', 'M', '09:30 AM', '10:20 AM')
+    ]
+    assert count_schedules(sections) == 0
+
+def test_max_days():
+    for max_days in range(5):
+        schedules = list(schedule_generator._generate_schedules_sat_from_sections(
+            SECTIONS, None, {}, Budget(), max_days))
+        assert count_schedules(SECTIONS, max_days=max_days) == len(schedules)
+
+def test_request_out_of_time():
+    # the request's deadline has passed, so counting is skipped
+    assert schedule_generator.count_schedules({'term': '1490', 'courses': ['000001']},
+                                              Budget(seconds=0)) is None
@@ -0,0 +1,85 @@
+import classtime
+import classtime.brain
+from classtime.brain.scheduling import cursors
+
+from . import FakeCalendar, SECTIONS
+
+_get_calendar = None
+
+def setup_module():
+    global _get_calendar # pylint: disable=W0603
+    _get_calendar = classtime.brain.get_calendar
+    cal = FakeCalendar(SECTIONS)
+    classtime.brain.get_calendar = lambda institution: cal
+
+def teardown_module():
+    classtime.brain.get_calendar = _get_calendar
+
+
+def _params(**params):
+    params.setdefault('term', '1490')
+    params.setdefault('courses', ['000001', '000002', '000003'])
+    params.setdefault('diversity', 0)
+    return params
+
+def _ids(schedule):
+    return tuple(sorted(section.id for section in schedule.sections))
+
+def test_pages_cover_every_schedule_once():
+    stream = cursors.ResultStream(_params(budget={'solutions': 2, 'iterations': 3}), 2)
+    pages = list()
+    while stream.has_more():
+        pages.append(stream.next_page())
+        assert len(pages) < 10
+    schedules = [_ids(schedule) for page in pages for schedule in page]
+    assert len(schedules) == 9
+    assert len(set(schedules)) == 9
+    assert stream.finished
+    # generation resumed each page, instead of starting over
+    assert len(pages) <= 6
+
+def test_pages_ranked_when_complete():
+    stream = cursors.ResultStream(_params(), 4)
+    scores = list()
+    while stream.has_more():
+        scores.extend(schedule.overall_score() for schedule in stream.next_page())
+    assert len(scores) == 9
+    assert scores == sorted(scores, reverse=True)
+
+def test_pending_bounded_and_released():
+    lookahead = classtime.app.config.get('SCHEDULER_CURSOR_LOOKAHEAD')
+    classtime.app.config['SCHEDULER_CURSOR_LOOKAHEAD'] = 2
+    try:
+        stream = cursors.ResultStream(_params(), 1)
+        pages = [stream.next_page()]
+        # generation finished, but only two pages' worth were kept,
+        # including the page returned
+        assert stream.finished
+        assert len(stream._pending) == 1 # pylint: disable=W0212
+        while stream.has_more():
+            pages.append(stream.next_page())
+    finally:
+        classtime.app.config['SCHEDULER_CURSOR_LOOKAHEAD'] = lookahead
+    assert len(pages) == 2
+    assert stream._candidates is None # pylint: disable=W0212
+
+def test_count_reuses_loaded_sections():
+    cal = classtime.brain.get_calendar('ualberta')
+    stream = cursors.ResultStream(_params(), 50)
+    schedules = stream.next_page()
+    num_loaded = len(cal.loaded)
+    assert stream.count_schedules() == len(schedules)
+    assert len(cal.loaded) == num_loaded
+
+def test_explain_reuses_conflicts_found():
+    cal = classtime.brain.get_calendar('ualberta')
+    stream = cursors.ResultStream(_params(courses=['000003'], **{'busy-times': [{
+        'day': 'TF',
+        'startTime': '01:00 PM',
+        'endTime': '03:50 PM'
+    }]}), 50)
+    assert stream.next_page() == []
+    num_loaded = len(cal.loaded)
+    conflicts = stream.explain_infeasible()
+    assert [conflict['reason'] for conflict in conflicts] == ['busy-times']
+    assert len(cal.loaded) == num_loaded
@@ -0,0 +1,39 @@
+import itertools
+
+from classtime.brain.scheduling import electives
+
+def test_by_promise_order():
+    groups = [['a', 'b', 'c'], ['x', 'y']]
+    estimates = {'a': 2, 'b': 0, 'c': 5, 'x': 1, 'y': 0}
+    combinations = list(electives.by_promise(groups, estimates.get))
+    assert sorted(combinations) == sorted(itertools.product(*groups))
+    costs = [sum(estimates[course] for course in combination)
+             for combination in combinations]
+    assert costs == sorted(costs)
+    assert combinations[0] == ('b', 'y')
+
+def test_by_promise_empty():
+    assert list(electives.by_promise([], lambda course: 0)) == [()]
+    assert list(electives.by_promise([['a'], []], lambda course: 0)) == []
+
+def test_infeasible_subsets():
+    def has_schedule(courses):
+        return 'c' not in courses and courses != ('a', 'x')
+    checked = list()
+    def satisfiable(courses):
+        checked.append(courses)
+        return has_schedule(courses)
+    infeasible = electives.InfeasibleSubsets(satisfiable)
+
+    solved = list()
+    for combination in itertools.product(['a', 'b', 'c'], ['x', 'y']):
+        if infeasible.contains_infeasible(combination):
+            continue
+        solved.append(combination)
+        if not has_schedule(combination):
+            infeasible.learn(combination)
+    # ('c', 'y') was skipped, since ('c', 'x') had no schedule
+    assert solved == [('a', 'x'), ('a', 'y'), ('b', 'x'), ('b', 'y'), ('c', 'x')]
+    assert len(infeasible) == 2
+    # subsets are only checked for combinations without a schedule
+    assert checked == [('a',), ('x',), ('a', 'x'), ('c',)]
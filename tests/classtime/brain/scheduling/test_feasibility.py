@@ -0,0 +1,61 @@
+from classtime.brain.scheduling import schedule_generator, Budget, Schedule
+from classtime.brain.scheduling import feasibility
+
+from . import section_record as _section
+
+def test_busy_times_conflict():
+    sections = [
+        _section('CHEM 101', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+        _section('CHEM 101', 'LAB', 'D1', 'T', '02:00 PM', '04:50 PM'),
+        _section('CHEM 101', 'LAB', 'D2', 'R', '02:00 PM', '04:50 PM')
+    ]
+    busy_mask = Schedule.busy_mask([{
+        'day': 'TR',
+        'startTime': '01:00 PM',
+        'endTime': '03:00 PM'
+    }])
+    assert feasibility.quick_conflicts(sections, busy_mask) == [{
+        'reason': 'busy-times',
+        'names': ['CHEM 101 LAB'],
+        'message': 'CHEM 101 LAB always conflicts with busy times'
+    }]
+    assert feasibility.quick_conflicts(sections) == []
+
+def test_components_always_conflict():
+    sections = [
+        _section('CHEM 101', 'LAB', 'D1', 'T', '02:00 PM', '04:50 PM'),
+        _section('CHEM 101', 'LAB', 'D2', 'T', '03:00 PM', '05:50 PM'),
+        _section('MATH 114', 'LEC', 'A1', 'T', '03:30 PM', '04:50 PM'),
+        _section('MATH 114', 'SEM', 'S1', 'F', '03:30 PM', '04:50 PM')
+    ]
+    conflicts = feasibility.quick_conflicts(sections)
+    assert [conflict['message'] for conflict in conflicts] == \
+        ['CHEM 101 LAB always conflicts with MATH 114 LEC']
+
+def test_minimal_conflict():
+    # no two courses conflict, but the three together do
+    sections = [
+        _section('CHEM 101', 'LEC', 'A1', 'M', '09:00 AM', '09:50 AM'),
+        _section('CHEM 101', 'LEC', 'A2', 'M', '10:00 AM', '10:50 AM'),
+        _section('MATH 114', 'LEC', 'B1', 'M', '09:00 AM', '09:50 AM'),
+        _section('MATH 114', 'LEC', 'B2', 'M', '10:00 AM', '10:50 AM'),
+        _section('PHYS 126', 'LEC', 'C1', 'M', '09:00 AM', '09:50 AM'),
+        _section('PHYS 126', 'LEC', 'C2', 'M', '10:00 AM', '10:50 AM'),
+        _section('ENGG 100', 'LEC', 'E1', 'F', '09:00 AM', '09:50 AM')
+    ]
+    assert feasibility.quick_conflicts(sections) == []
+    conflicts = feasibility.minimal_conflict(sections, schedule_generator._satisfiable)
+    assert conflicts == [{
+        'reason': 'courses',
+        'names': ['CHEM 101', 'MATH 114', 'PHYS 126'],
+        'message': 'CHEM 101, MATH 114 and PHYS 126 cannot be scheduled together'
+    }]
+
+    feasible = [section for section in sections
+                if section.course != 'PHYS 126']
+    assert feasibility.minimal_conflict(feasible, schedule_generator._satisfiable) == []
+
+def test_request_out_of_time():
+    # the request's deadline has passed, so no reason is looked for
+    assert schedule_generator.explain_infeasible({'term': '1490', 'courses': ['000001']},
+                                                 Budget(seconds=0)) == []
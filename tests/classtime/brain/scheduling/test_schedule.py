@@ -1,7 +1,7 @@
 
 import unittest
 
-from classtime.brain.scheduling import Schedule
+from classtime.brain.scheduling import Schedule, SectionRecord
 
 class TestSchedule(unittest.TestCase): #pylint: disable=R0904
     @classmethod
@@ -265,3 +265,62 @@ class TestSchedule(unittest.TestCase): #pylint: disable=R0904
 def test_preferences_null_values():
     sched = Schedule(preferences={ 'no-marathons': None })
     sched.overall_score() # should not raise an exception
+
+def test_precomputed_timetable_columns():
+    section = {
+        'day': 'TR',
+        'startTime': '08:00 AM',
+        'endTime': '09:20 AM'
+    }
+    precomputed = dict(Schedule.timetable_columns(section))
+    assert precomputed['startBlock'] == 16
+    assert precomputed['endBlock'] == 18
+
+    # precomputed columns are used instead of the time strings
+    precomputed.update({
+        'startTime': None,
+        'endTime': None
+    })
+    assert Schedule(sections=[precomputed]).timetable_bitmap == \
+           Schedule(sections=[section]).timetable_bitmap
+
+def test_invalid_timetable_columns():
+    columns = Schedule.timetable_columns({'day': 'TR'})
+    assert columns['dayMask'] == 0
+    assert columns['startBlock'] is None
+    assert columns['blockBitmap'] is None
+    # sections without times are never scheduled
+    assert SectionRecord.from_dict(columns).bitmap is None
+
+def test_section_record():
+    course_info = {
+        'course': '000001',
+        'asString': 'CMPUT 101',
+        'courseTitle': 'Introduction to Computing'
+    }
+    section = {
+        'class': '12345',
+        'course': '000001',
+        'component': 'LEC',
+        'section': 'A1',
+        'day': 'MWF',
+        'startTime': '10:00 AM',
+        'endTime': '10:50 AM'
+    }
+    record = SectionRecord.from_dict(section, course_info)
+    assert record.asString == 'CMPUT 101 LEC A1'
+    assert record.get('courseTitle') == 'Introduction to Computing'
+    assert record.get('class') == '12345'
+    assert SectionRecord.coerce(record) is record
+
+    section_dict = record.to_dict()
+    assert section_dict['courseTitle'] == 'Introduction to Computing'
+    assert section_dict['asString'] == 'CMPUT 101 LEC A1'
+    assert 'courseTitle' not in section
+
+    section.update(Schedule.timetable_columns(section))
+    section_dict = SectionRecord.from_dict(section, course_info).to_dict()
+    assert not set(Schedule.TIMETABLE_COLUMNS) & set(section_dict)
+
+    assert Schedule(sections=[record]).timetable_bitmap == \
+           Schedule(sections=[section]).timetable_bitmap
@@ -1,6 +1,13 @@
 """Overall functionality is tested with the api.
 
 This module should test the component functions"""
+import functools
+
+from classtime.brain.scheduling import schedule_generator, Budget, Schedule
+
+from . import section_dict, section_record, FakeCalendar
+
+_section = functools.partial(section_dict, '000001')
 
 def setup_module():
     pass
@@ -8,3 +15,95 @@ def setup_module():
 def teardown_module():
     pass
 
+
+def test_auto_enroll_dependencies():
+    sections = [
+        _section('LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+        _section('LEC', 'A2', 'MWF', '10:00 AM', '10:50 AM'),
+        _section('LAB', 'D1', 'T', '02:00 PM', '04:50 PM', auto_enroll='A1'),
+        _section('LAB', 'D2', 'R', '02:00 PM', '04:50 PM', auto_enroll='A2')
+    ]
+    schedules = list(schedule_generator._generate_schedules_sat_from_sections(
+        sections, None, {}, Budget()))
+
+    pairs = sorted(tuple(section.section for section in schedule.sections)
+                   for schedule in schedules)
+    assert pairs == [('A1', 'D1'), ('A2', 'D2')]
+
+def test_busy_times_prune_sections():
+    sections = [
+        _section('LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+        _section('LEC', 'A2', 'MWF', '10:00 AM', '10:50 AM'),
+        _section('LAB', 'D1', 'T', '02:00 PM', '04:50 PM', auto_enroll='A1'),
+        _section('LAB', 'D2', 'R', '02:00 PM', '04:50 PM', auto_enroll='A2')
+    ]
+    def _schedules(busy_times):
+        busy_mask = Schedule.busy_mask(busy_times)
+        return list(schedule_generator._generate_schedules_sat_from_sections(
+            sections, busy_mask, {}, Budget()))
+
+    schedules = _schedules([{
+        'day': 'T',
+        'startTime': '03:00 PM',
+        'endTime': '03:50 PM'
+    }])
+    assert [[section.section for section in schedule.sections]
+            for schedule in schedules] == [['A2', 'D2']]
+
+    assert _schedules([{
+        'day': 'M',
+        'startTime': '09:00 AM',
+        'endTime': '10:50 AM'
+    }]) == []
+
+def test_max_days():
+    sections = [
+        _section('LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+        _section('LEC', 'A2', 'TR', '09:30 AM', '10:50 AM'),
+        _section('SEM', 'S1', 'M', '02:00 PM', '02:50 PM'),
+        _section('SEM', 'S2', 'R', '02:00 PM', '02:50 PM')
+    ]
+    def _pairs(max_days):
+        return sorted(tuple(section.section for section in schedule.sections)
+                      for schedule in schedule_generator._generate_schedules_sat_from_sections(
+                          sections, None, {}, Budget(), max_days))
+
+    assert _pairs(None) == [('A1', 'S1'), ('A1', 'S2'), ('A2', 'S1'), ('A2', 'S2')]
+    assert _pairs(3) == [('A1', 'S1'), ('A2', 'S1'), ('A2', 'S2')]
+    assert _pairs(2) == [('A2', 'S2')]
+    assert _pairs(1) == []
+
+def test_only_returned_schedules_are_saved():
+    cal = FakeCalendar([])
+    best = [(1.0, [section_record('000001', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM')],
+             [[section_record('000001', 'LEC', 'A2', 'MWF', '09:00 AM', '09:50 AM')]])]
+    schedules = schedule_generator._build_schedules(cal, best, {})
+
+    assert len(schedules) == 1
+    assert cal.saved == [schedules[0].identifier]
+    assert len(schedules[0].more_like_this) == 1
+    assert schedules[0].more_like_this[0] not in cal.saved
+
+def test_candidates_load_each_course_once():
+    cal = FakeCalendar([_section('LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+                        section_dict('000002', 'LEC', 'B1', 'TR', '09:00 AM', '09:50 AM')])
+    candidates = list(schedule_generator.find_candidates(
+        {'term': '1490', 'courses': ['000001'], 'electives': [{'courses': ['000002']}]},
+        Budget(), cal))
+    assert len(candidates) == 1
+    assert cal.loaded == ['000001', '000002']
+
+def test_default_ranking_by_score():
+    candidates = [
+        (0.9, section_record('000001', 'LEC', 'A1', 'MWF', '08:00 AM', '08:50 AM')),
+        (0.8, section_record('000001', 'LEC', 'A2', 'MWF', '08:00 AM', '09:20 AM')),
+        (0.7, section_record('000001', 'LEC', 'A3', 'TR', '02:00 PM', '02:50 PM')),
+        (0.1, section_record('000001', 'LEC', 'A4', 'TR', '05:00 PM', '05:50 PM'))
+    ]
+    top = schedule_generator.candidate_pool({}, 2)
+    for score, section in candidates:
+        top.push(score, section.bitmap, [section])
+
+    # by score alone, even though A2 is much like A1
+    schedules = schedule_generator.best_schedules(FakeCalendar([]), top, 2, {})
+    assert [schedule.sections[0].section for schedule in schedules] == ['A1', 'A2']
@@ -0,0 +1,90 @@
+import classtime.brain
+from classtime.brain.scheduling import sessions, schedule_generator, Schedule, SectionRecord
+from classtime.brain.scheduling.schedule import ScheduleScorer
+
+from . import FakeCalendar, SECTIONS
+
+_get_calendar = None
+
+def setup_module():
+    global _get_calendar # pylint: disable=W0603
+    _get_calendar = classtime.brain.get_calendar
+    cal = FakeCalendar(SECTIONS)
+    classtime.brain.get_calendar = lambda institution: cal
+
+def teardown_module():
+    classtime.brain.get_calendar = _get_calendar
+
+
+def _params(**params):
+    params.setdefault('term', '1490')
+    params.setdefault('courses', ['000001', '000002', '000003'])
+    return params
+
+def _ids(schedules):
+    return [sorted(section.id for section in schedule.sections)
+            for schedule in schedules]
+
+def test_filters_without_solving():
+    session = sessions.RefinementSession(_params(), 20)
+    assert len(session.schedules()) == 9
+
+    session.update({'busy-times': [{'day': 'T', 'startTime': '08:00 AM', 'endTime': '09:30 AM'}]})
+    session.update({'constraints': {'max-days': 4}})
+    session.update({'locked-sections': ['000001LECA1']})
+    assert session.num_solves == 1
+    schedules = session.schedules()
+    assert schedules
+    assert _ids(schedules) == _ids(schedule_generator.find_schedules(session.params, 20))
+    assert all('000001LECA1' in ids for ids in _ids(schedules))
+
+def test_loosening_solves_again():
+    session = sessions.RefinementSession(_params(constraints={'max-days': 3}), 20)
+    session.update({'constraints': None})
+    assert session.num_solves == 2
+    assert len(session.schedules()) == 9
+
+    session.update({'courses': ['000001', '000002']})
+    assert session.num_solves == 3
+    assert len(session.schedules()) == 6
+
+def test_preferences_rescore():
+    session = sessions.RefinementSession(_params(), 20)
+    session.update({'preferences': {'start-early': 5, 'no-marathons': -1}})
+    assert session.num_solves == 1
+    expected = schedule_generator.find_schedules(session.params, 20)
+    assert [schedule.overall_score() for schedule in session.schedules()] == \
+           [schedule.overall_score() for schedule in expected]
+
+def test_unweighted_scores_match_scorer():
+    for section_dicts in [SECTIONS[:1], SECTIONS[1:3], SECTIONS[3:], SECTIONS[::3]]:
+        sections = [SectionRecord.from_dict(section) for section in section_dicts]
+        schedule = Schedule(sections=sections,
+                            preferences=dict((name, 1) for name in ScheduleScorer.PREFERENCES))
+        schedule.overall_score()
+        scores = ScheduleScorer.unweighted_scores(schedule.timetable_bitmap)
+        for name in ScheduleScorer.PREFERENCES:
+            assert abs(scores[name] - schedule.scorer.read(name)) < 1e-9
+
+def test_store_expires_and_evicts():
+    store = sessions.SessionStore(max_sessions=2, ttl=60)
+    first = store.add('first')
+    second = store.add('second')
+    assert store.get(first) == 'first'
+    third = store.add('third')
+    # the least recently used is evicted
+    assert store.get(second) is None
+    assert store.get(first) == 'first'
+    assert store.get(third) == 'third'
+    store.remove(first)
+    assert store.get(first) is None
+    assert len(store) == 1
+
+    store = sessions.SessionStore(max_sessions=2, ttl=-1)
+    assert store.get(store.add('expired')) is None
+
+def test_ignores_locked_sections_of_other_courses():
+    session = sessions.RefinementSession(_params(), 20)
+    session.update({'locked-sections': ['000004LECD1']})
+    assert session.num_solves == 1
+    assert len(session.schedules()) == 9
@@ -0,0 +1,99 @@
+import time
+
+from classtime.brain.scheduling import solver_pool, schedule_generator, Budget
+
+from . import section_dict as _section, section_record
+
+def test_partition_branches_on_largest_component():
+    lec = _section('000001', 'LEC', 'A1')
+    labs = [_section('000001', 'LAB', 'D{}'.format(i))
+            for i in range(5)]
+    partitions = solver_pool.partition([[lec] + labs], 3)
+
+    assert len(partitions) == 3
+    for sections in partitions:
+        assert lec in sections
+    partitioned_labs = [section
+                        for sections in partitions
+                        for section in sections
+                        if section.get('component') == 'LAB']
+    assert sorted(partitioned_labs) == sorted(labs)
+
+def test_partition_keeps_enough_combinations():
+    section_lists = [[_section('000001', 'LEC', 'A1')],
+                     [_section('000002', 'LEC', 'A1')]]
+    assert solver_pool.partition(section_lists, 2) == section_lists
+
+def test_split_limit():
+    assert solver_pool.split_limit(7, 3) == [3, 2, 2]
+    assert solver_pool.split_limit(1, 3) == [1, 0, 0]
+    assert solver_pool.split_limit(None, 2) == [None, None]
+
+def test_pieces_share_iteration_limit():
+    sections = [section_record('000001', 'LAB', 'D' + str(i), 'MTWRF'[i % 5],
+                               '0{}:00 AM'.format(8 + i / 5), '0{}:50 AM'.format(8 + i / 5))
+                for i in range(10)]
+    budget = Budget(max_iterations=4)
+    candidates = list(schedule_generator._generate_candidates_parallel(
+        [(sections, lambda: None)], None, None, {}, budget, 3))
+    solver_pool.close_pool()
+    assert len(candidates) == 4
+    assert budget.truncated
+
+def test_combinations_without_schedules_reported():
+    labs = [section_record('000001', 'LAB', 'D' + str(i), 'M', '08:00 AM', '08:50 AM')
+            for i in range(3)]
+    lec = section_record('000002', 'LEC', 'A1', 'M', '08:00 AM', '08:50 AM')
+    reported = list()
+    section_lists = [(labs, lambda: reported.append('feasible')),
+                     (labs + [lec], lambda: reported.append('infeasible'))]
+    candidates = list(schedule_generator._generate_candidates_parallel(
+        section_lists, None, None, {}, Budget(), 2))
+    solver_pool.close_pool()
+    assert len(candidates) == 3
+    assert reported == ['infeasible']
+
+def test_combinations_read_lazily():
+    labs = [section_record('000001', 'LAB', 'D' + str(i), 'M', '08:00 AM', '08:50 AM')
+            for i in range(3)]
+    num_read = [0]
+    def section_lists():
+        while True:
+            num_read[0] += 1
+            yield labs, lambda: None
+    candidates = schedule_generator._generate_candidates_parallel(
+        section_lists(), None, None, {}, Budget(), 2)
+    next(candidates)
+    candidates.close()
+    solver_pool.close_pool()
+    # only as many combinations as the pool has room for
+    assert num_read[0] <= 8
+
+def test_pieces_send_back_top_layouts():
+    sections = [section_record('000001', 'LAB', 'D' + str(i), 'MTWRF'[i % 5],
+                               '0{}:00 AM'.format(8 + i / 5), '0{}:50 AM'.format(8 + i / 5))
+                for i in range(10)]
+    compact_results, _ = schedule_generator._solve_partition(
+        (sections, None, None, {'start-early': 1}, Budget(), 3))
+    assert len(compact_results) == 3
+    scores = [score for score, _, _ in compact_results]
+    assert scores == sorted(scores, reverse=True)
+
+def _wait_until_cancelled(task, ticket=None):
+    deadline = time.time() + task
+    while time.time() < deadline:
+        if solver_pool.cancelled(ticket):
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_cancel_stops_outstanding_tasks():
+    tasks = solver_pool.solve(_wait_until_cancelled, [(None, 5)] * 4, 2)
+    try:
+        _, _, result = next(tasks)
+        tasks.cancel()
+        start = time.time()
+        assert result.get()
+        assert time.time() - start < 2
+    finally:
+        solver_pool.close_pool()
@@ -0,0 +1,50 @@
+from classtime.brain.scheduling import Schedule
+from classtime.brain.scheduling.swaps import swap_options
+
+from . import section_record as _section
+
+LECTURES = [
+    _section('000001', 'LEC', 'A1', 'MWF', '09:00 AM', '09:50 AM'),
+    _section('000001', 'LEC', 'A2', 'MWF', '10:00 AM', '10:50 AM'),
+    _section('000001', 'LEC', 'A3', 'TR', '08:00 AM', '09:20 AM')
+]
+LABS = [
+    _section('000001', 'LAB', 'D1', 'T', '02:00 PM', '04:50 PM', auto_enroll='A1'),
+    _section('000001', 'LAB', 'D2', 'R', '02:00 PM', '04:50 PM'),
+    _section('000001', 'LAB', 'D3', 'F', '01:00 PM', '03:50 PM')
+]
+FIXED = [
+    _section('000002', 'LEC', 'B1', 'MWF', '10:00 AM', '10:50 AM'),
+    _section('000003', 'LEC', 'C1', 'R', '03:00 PM', '04:20 PM')
+]
+
+def _ids(sections):
+    return sorted(section.id for section in sections)
+
+def test_alternatives_avoid_fixed_sections():
+    schedule = FIXED + [LECTURES[0], LABS[0]]
+    options = swap_options(schedule, '000001', [LECTURES, LABS])
+
+    groups = [_ids(sections) for _, sections in options]
+    # A2 overlaps B1, D2 overlaps C1, D1 depends on A1, and A1 D1 is current
+    assert sorted(groups) == [['000001LABD3', '000001LECA1'],
+                              ['000001LABD3', '000001LECA3']]
+
+def test_deltas_match_schedule_scores():
+    preferences = {'start-early': 2, 'no-marathons': -1}
+    schedule = FIXED + [LECTURES[0], LABS[0]]
+    options = swap_options(schedule, '000001', [LECTURES, LABS], preferences)
+    base_score = Schedule(sections=schedule, preferences=dict(preferences)).overall_score()
+
+    deltas = [delta for delta, _ in options]
+    assert deltas == sorted(deltas, reverse=True)
+    for delta, sections in options:
+        score = Schedule(sections=FIXED + sections,
+                         preferences=dict(preferences)).overall_score()
+        assert abs(score - base_score - delta) < 1e-9
+
+def test_busy_times_mask_alternatives():
+    schedule = FIXED + [LECTURES[0], LABS[0]]
+    busy_mask = Schedule.busy_mask([{'day': 'T', 'startTime': '08:00 AM', 'endTime': '08:50 AM'}])
+    options = swap_options(schedule, '000001', [LECTURES, LABS], busy_mask=busy_mask)
+    assert [_ids(sections) for _, sections in options] == [['000001LABD3', '000001LECA1']]
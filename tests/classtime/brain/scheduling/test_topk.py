@@ -0,0 +1,39 @@
+from classtime.brain.scheduling.topk import TopSchedules
+
+def test_keeps_best_layouts():
+    top = TopSchedules(2)
+    top.push(1.0, (1,), 'a')
+    top.push(3.0, (2,), 'b')
+    top.push(2.0, (3,), 'c')
+    assert not top.push(0.5, (4,), 'd')
+
+    assert len(top) == 2
+    assert [item for _, item, _ in top.best()] == ['b', 'c']
+    assert top.worst_score() == 2.0
+
+def test_duplicate_layouts_dont_take_a_slot():
+    top = TopSchedules(2)
+    top.push(1.0, (1,), 'a')
+    top.push(1.0, (1,), 'a2')
+    top.push(2.0, (2,), 'b')
+
+    assert len(top) == 2
+    assert top.best()[1] == (1.0, 'a', ['a2'])
+
+def test_ties_keep_earliest():
+    top = TopSchedules(1)
+    top.push(1.0, (1,), 'a')
+    top.push(1.0, (2,), 'b')
+    assert [item for _, item, _ in top.best()] == ['a']
+
+def test_diverse():
+    top = TopSchedules()
+    # 'a' and 'b' differ by a single block, 'c' shares no blocks with 'a'
+    top.push(3.0, (0b1111, 0, 0, 0, 0), 'a')
+    top.push(2.9, (0b1110, 0, 0, 0, 0), 'b')
+    top.push(2.0, (0, 0b1111, 0, 0, 0), 'c')
+
+    assert [item for _, item, _ in top.diverse(2, 0)] == ['a', 'b']
+    assert [item for _, item, _ in top.diverse(2, 0.7)] == ['a', 'c']
+    assert [item for _, item, _ in top.diverse(5, 0.7)] == ['a', 'c', 'b']
+    assert top.diverse(0, 0.5) == []
@@ -5,7 +5,9 @@ import unittest
 
 from classtime.core import db
 from classtime.models import Course
-from classtime.brain import AcademicCalendar
+from classtime.brain import AcademicCalendar, academic_calendar
+from classtime.brain.local_db import LocalDatabaseFactory
+from classtime.brain.scheduling import Schedule
 
 class TestAcademicCalendar(unittest.TestCase): # pylint: disable=R0904
     @classmethod
@@ -30,3 +32,31 @@ def test_courses_unique_across_terms():
 	cal._save(courses_overlapping, datatype='courses')
 
 	assert len(Course.query.all()) == len(courses) + len(courses_overlapping)
+
+def test_swap_lookups_from_local_db():
+	local_db = LocalDatabaseFactory.build('test-local-lookups')
+	db.drop_all()
+	db.create_all()
+	local_db.add({'term': '1490', 'course': '000001', 'asString': 'CMPUT 101'}, 'courses')
+	for class_, component, section, day in [('10001', 'LEC', 'A1', 'MWF'),
+	                                        ('10002', 'LEC', 'A2', 'TR'),
+	                                        ('10003', 'LAB', 'D1', 'T')]:
+		section_dict = {'term': '1490', 'course': '000001', 'class_': class_,
+		                'component': component, 'section': section, 'day': day,
+		                'startTime': '09:00 AM', 'endTime': '09:50 AM'}
+		section_dict.update(Schedule.timetable_columns(section_dict))
+		local_db.add(section_dict, 'sections')
+	local_db.commit()
+	academic_calendar._add_schedule(local_db, '1490', 'somehash', # pylint: disable=W0212
+	                                [('000001', '10001'), ('000001', '10003')])
+	local_db.commit()
+
+	sections = academic_calendar.saved_schedule_sections(local_db, '1490', 'somehash')
+	assert sorted(section.id for section in sections) == ['10001', '10003']
+	assert all(section.bitmap is not None for section in sections)
+	assert academic_calendar.saved_schedule_sections(local_db, '1490', 'unknown') is None
+
+	components = academic_calendar.local_course_components(local_db, '1490', '000001')
+	assert [[section.section for section in component] for component in components] == \
+	       [['A2', 'A1'], ['D1']]
+	assert academic_calendar.local_course_components(local_db, '1490', '000002') is None
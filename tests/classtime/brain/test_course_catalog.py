@@ -0,0 +1,47 @@
+import json
+
+from classtime.brain import course_catalog
+
+COURSES = [
+    {
+        'faculty': 'Faculty of Arts',
+        'subject': 'ANTHR',
+        'subjectTitle': 'Anthropology',
+        'course': '000268',
+        'asString': 'ANTHR 101',
+        'courseTitle': 'Introduction to Anthropology'
+    },
+    {
+        'faculty': 'Faculty of Arts',
+        'subject': 'ANTHR',
+        'subjectTitle': 'Anthropology',
+        'course': '000269',
+        'asString': 'ANTHR 110',
+        'courseTitle': 'Introduction to Sociocultural Anthropology'
+    },
+    {
+        'faculty': 'Faculty of Engineering',
+        'subject': 'ENGG',
+        'subjectTitle': 'Engineering',
+        'course': '004093',
+        'asString': 'ENGG 100',
+        'courseTitle': 'Orientation to the Engineering Profession I'
+    }
+]
+
+def test_courses_min_structured():
+    faculties = course_catalog.courses_min_structured(COURSES)
+    assert [f['faculty'] for f in faculties] == ['Faculty of Arts',
+                                                 'Faculty of Engineering']
+    assert len(faculties[0]['subjects']) == 1
+    assert len(faculties[0]['subjects'][0]['courses']) == 2
+
+def test_build_catalog_is_deterministic():
+    catalog = course_catalog.build_catalog(COURSES)
+    assert catalog == course_catalog.build_catalog(COURSES)
+    assert catalog['numCourses'] == 3
+
+    response = json.loads(course_catalog.decompress(catalog['data']))
+    assert response['num_results'] == 3
+    assert response['total_pages'] == 1
+    assert response['objects'] == course_catalog.courses_min_structured(COURSES)
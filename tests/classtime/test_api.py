@@ -325,6 +325,69 @@ class TestAPI(object):
             schedules = response.get('objects')
             yield assert_valid_schedules, schedules, query
 
+    def test_generate_schedules_compact(self):
+        query = {
+            "q": {  # 1st year engineering 2014 Fall Term
+                    "institution": "ualberta",
+                    "term": "1490",
+                    "courses": ["001343",
+                                "004093",
+                                "004096",
+                                "006768",
+                                "009019"],
+                    "format": "compact"
+            }
+        }
+        response = self.get('/api/v1/generate-schedules', query)
+        assert_valid_response(response)
+        assert response.get('format') == 'compact'
+        schedules = response.get('objects')
+        assert len(schedules) > 0
+        for schedule in schedules:
+            sections = [response['sections'][section_id]
+                        for section_id in schedule.get('sections')]
+            assert_valid_sections(sections, query)
+            assert len(schedule.get('bitmaps')) == 5
+            for section in sections:
+                assert 'classNotes' not in section
+                assert section.get('course') in response['courses']
+
+    def test_swap_course_with_generated_schedule(self):
+        query = {
+            "q": {  # 1st year engineering 2014 Fall Term
+                    "institution": "ualberta",
+                    "term": "1490",
+                    "courses": ["001343",
+                                "004093",
+                                "004096",
+                                "006768",
+                                "009019"]
+            }
+        }
+        response = self.get('/api/v1/generate-schedules', query)
+        schedules = response.get('objects')
+        assert len(schedules) > 0
+        identifier = schedules[0].get('identifier')
+        assert identifier is not None
+
+        schedule = json.loads(self.client.get('/api/v1/schedules/' + identifier).data)
+        assert schedule.get('hash_id') == identifier
+
+        swap_query = {
+            "q": {
+                    "institution": "ualberta",
+                    "term": "1490",
+                    "schedule": identifier,
+                    "course": "001343"
+            }
+        }
+        response = self.get('/api/v1/swap-course', swap_query)
+        assert response.get('num_results') is not None
+        for option in response.get('objects'):
+            assert option.get('sections')
+            for section in option.get('sections'):
+                assert section.get('course') == '001343'
+
 def assert_valid_response(response):
     assert response.get('num_results') is not None
     assert response.get('objects') is not None
@@ -0,0 +1,25 @@
+import json
+
+from classtime.logging import logging, lazy, JSONFormatter
+
+def test_lazy_messages_only_format_when_emitted():
+    calls = list()
+    def _payload():
+        calls.append(True)
+        return 'payload'
+
+    logger = logging.getLogger('classtime.tests.lazy')
+    logger.setLevel(logging.INFO)
+    logger.debug(lazy('not emitted: {}', _payload))
+    assert calls == []
+
+    assert str(lazy('{} and {name}', _payload, name='value')) == 'payload and value'
+    assert calls == [True]
+
+def test_json_format():
+    record = logging.LogRecord('classtime.tests', logging.INFO, __file__, 1,
+                               lazy('Saved <{}>', 'ualberta'), None, None)
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry['level'] == 'INFO'
+    assert entry['logger'] == 'classtime.tests'
+    assert entry['message'] == 'Saved <ualberta>'
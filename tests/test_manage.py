@@ -26,6 +26,16 @@ class TestManageDatabase(unittest.TestCase): # pylint: disable=R0904
         assert_valid_terms()
         assert_valid_courses()
 
+    def test_explain_queries(self): #pylint: disable=R0201
+        manage.create_db()
+        for name, query in manage.hot_queries('ualberta', '1490', '000001'):
+            assert len(manage.explain(query)) > 0
+
+    def test_import_report(self): #pylint: disable=R0201
+        report = manage.import_report('classtime', limit=1000)
+        assert 'total' in report
+        assert 'pycosat' not in report
+
 def assert_valid_terms():
     import classtime.models as models
     for term_model in models.Term.query.all():